@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from typing import Optional
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from .cache import TTLCache
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Admission control: each class of request (auth, read, write) gets ADMIT_<CLASS>_CONCURRENCY
+# slots. Past that, up to ADMIT_<CLASS>_QUEUE requests wait, each for at most ADMIT_QUEUE_TIMEOUT
+# seconds; anything beyond is answered 503 straight away, so an overloaded worker spends its time
+# on requests that can still finish before the client gives up rather than on a growing backlog.
+# Limits are per worker process; together they should roughly match the DB pool (DB_POOL_SIZE +
+# DB_MAX_OVERFLOW), since requests admitted beyond it only wait for a connection instead.
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "true").lower() == "true"
+ADMIT_QUEUE_TIMEOUT = float(os.getenv("ADMIT_QUEUE_TIMEOUT", 1))  # Keep below client timeouts
+ADMIT_RETRY_AFTER = int(os.getenv("ADMIT_RETRY_AFTER", 1))
+ADMISSION_CLASSES = {
+    # Logins and signups are bcrypt-bound (see app.passwords), so a few at a time is all a worker can use
+    "auth": (int(os.getenv("ADMIT_AUTH_CONCURRENCY", 4)), int(os.getenv("ADMIT_AUTH_QUEUE", 16))),
+    "read": (int(os.getenv("ADMIT_READ_CONCURRENCY", 12)), int(os.getenv("ADMIT_READ_QUEUE", 48))),
+    "write": (int(os.getenv("ADMIT_WRITE_CONCURRENCY", 4)), int(os.getenv("ADMIT_WRITE_QUEUE", 16))),
+    # Streamed exports and imports hold their slot for the whole transfer, so they get their own
+    # few: slow downloads can't take the slots normal reads and writes need
+    "transfer": (int(os.getenv("ADMIT_TRANSFER_CONCURRENCY", 2)), int(os.getenv("ADMIT_TRANSFER_QUEUE", 4))),
+}
+# Never queued or shed: probes and scrapes must answer under load, and event streams are long-lived
+EXEMPT_PATHS = {"/health", "/ready", "/metrics"}
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+TRANSFER_SUFFIXES = ("/tasks/export", "/tasks/import")
+
+# Per-client token bucket on POST /auth/login: LOGIN_BURST attempts, refilled at LOGIN_RATE per
+# second. Clients are told apart by address, so run uvicorn with --proxy-headers behind a proxy.
+LOGIN_RATE = float(os.getenv("LOGIN_RATE", 0.5))
+LOGIN_BURST = int(os.getenv("LOGIN_BURST", 10))
+RATE_LIMITED_PATHS = {"/auth/login"}
+
+admission_rejections = metrics.registry.register(metrics.Counter(
+    "admission_rejections_total", "Requests turned away by admission control, by reason (queue_full, timeout, rate_limited)", ("class", "reason")))
+admission_queued = metrics.registry.register(metrics.Gauge(
+    "admission_queued", "Requests waiting for an admission slot", ("class",)))
+admission_wait = metrics.registry.register(metrics.Histogram(
+    "admission_queue_wait_seconds", "Time admitted requests spent queued", ("class",)))
+admission_in_flight = metrics.registry.register(metrics.Gauge(
+    "admission_in_flight", "Admitted requests running, read at scrape time", ("class",),
+    collect=lambda: {(name,): gate.in_flight for name, gate in gates.items()}))
+
+class Rejected(Exception):
+    def __init__(self, reason: str, status_code: int, detail: str, retry_after: int):
+        self.reason = reason
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+class Gate:
+    def __init__(self, name: str, limit: int, queue_size: int, queue_timeout: float = ADMIT_QUEUE_TIMEOUT):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.queued = 0
+        self.in_flight = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def acquire(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.limit)
+        if not self._slots.locked():
+            await self._slots.acquire()  # A slot is free: doesn't wait
+            self.in_flight += 1
+            return
+        if self.queued >= self.queue_size:
+            raise Rejected("queue_full", 503, "Server is busy, retry shortly", ADMIT_RETRY_AFTER)
+        self.queued += 1
+        admission_queued.inc(self.name)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise Rejected("timeout", 503, "Server is busy, retry shortly", ADMIT_RETRY_AFTER)
+        finally:
+            self.queued -= 1
+            admission_queued.dec(self.name)
+        self.in_flight += 1
+        admission_wait.observe(time.perf_counter() - start, self.name)
+
+    def release(self):
+        self.in_flight -= 1
+        self._slots.release() # type: ignore
+
+    def stats(self) -> dict:
+        return {"limit": self.limit, "in_flight": self.in_flight, "queue_size": self.queue_size, "queued": self.queued}
+
+class TokenBucket:
+    """Per-key token buckets; a key that hasn't been seen for a while is simply full again."""
+
+    def __init__(self, rate: float, burst: int, maxsize: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = TTLCache(maxsize=maxsize, ttl=burst / rate if rate > 0 else 3600)
+
+    def take(self, key) -> float:
+        """Takes a token for key; returns 0 on success, else the seconds until one is available."""
+        now = time.monotonic()
+        tokens, updated = self.buckets.get(key, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self.buckets.set(key, (tokens, now))
+            return (1 - tokens) / self.rate if self.rate > 0 else float("inf")
+        self.buckets.set(key, (tokens - 1, now))
+        return 0.0
+
+gates = {name: Gate(name, limit, queue) for name, (limit, queue) in ADMISSION_CLASSES.items()}
+login_buckets = TokenBucket(LOGIN_RATE, LOGIN_BURST)
+
+def request_class(method: str, path: str) -> Optional[str]:
+    if path in EXEMPT_PATHS or path.endswith("/events"):
+        return None
+    if path.startswith("/auth/"):
+        return "auth"
+    if path.endswith(TRANSFER_SUFFIXES):
+        return "transfer"
+    return "read" if method in READ_METHODS else "write"
+
+class AdmissionMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._last_warning = 0.0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not ADMISSION_CONTROL:
+            await self.app(scope, receive, send)
+            return
+        name = request_class(scope["method"], scope["path"])
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+        gate = gates[name]
+        try:
+            if scope["method"] == "POST" and scope["path"] in RATE_LIMITED_PATHS:
+                client = scope.get("client")
+                wait = login_buckets.take(client[0] if client else None)
+                if wait:
+                    raise Rejected("rate_limited", 429, "Too many login attempts, slow down", math.ceil(min(wait, 3600)))
+            await gate.acquire()
+        except Rejected as rejected:
+            admission_rejections.inc(name, rejected.reason)
+            if rejected.reason != "rate_limited" and time.monotonic() - self._last_warning > 10:  # Once per 10s, not per request
+                self._last_warning = time.monotonic()
+                logger.warning("Shedding %s requests (%s): %s", name, rejected.reason, stats())
+            response = JSONResponse({"detail": rejected.detail}, status_code=rejected.status_code, headers={"Retry-After": str(rejected.retry_after)})
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
+
+def stats() -> dict:
+    return {name: gate.stats() for name, gate in gates.items()}
@@ -0,0 +1,96 @@
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .jobs import JobRun, job_batch_seconds, job_handler
+from .models import ArchivedTask, Task
+from .response_cache import project_listings
+from .search import search
+
+logger = logging.getLogger(__name__)
+
+# Hot/cold split: tasks done for longer than TASK_ARCHIVE_AFTER_DAYS (judged by their last update)
+# are moved from `tasks` to `archived_tasks` by a periodic archive_tasks job, so the live table,
+# its indexes and every listing and access check stay the size of the working set however much
+# history builds up. Listings take include_archived to read both. The per-project counters keep
+# counting archived tasks, so GET /projects/{id}/stats is unchanged by a move. An admin can also
+# archive a whole project's tasks at once (POST /projects/{id}/archive, an archive_project job).
+TASK_ARCHIVE_AFTER_DAYS = float(os.getenv("TASK_ARCHIVE_AFTER_DAYS", 90))  # 0 turns archiving off
+TASK_ARCHIVE_INTERVAL = float(os.getenv("TASK_ARCHIVE_INTERVAL", 3600))
+
+TASK_FIELDS = [column.name for column in Task.__table__.columns]
+
+def archivable(cutoff: datetime):
+    # Tasks created done and never updated since count from created_at
+    return and_(Task.status == "done", or_(Task.updated_at < cutoff, and_(Task.updated_at.is_(None), Task.created_at < cutoff)))
+
+async def archive_batch(db: AsyncSession, condition, limit: int, after_id: int = 0) -> list:
+    """Moves up to limit tasks matching condition with ids above after_id; returns their ids, ascending.
+    Task ids are never handed out twice (see Task), so an archived row keeps its id to itself."""
+    ids = (await db.execute(
+        select(Task.id).where(Task.id > after_id, condition).order_by(Task.id).limit(limit).with_for_update()
+    )).scalars().all()
+    if not ids:
+        return []
+    # Conditions are checked again in the copy and the delete: a row edited since the SELECT above
+    # (possible on SQLite, which ignores FOR UPDATE) is left alone instead of archived stale
+    moved = and_(Task.id.in_(ids), condition)
+    await db.execute(insert(ArchivedTask).from_select(
+        TASK_FIELDS + ["archived_at"],
+        select(*(Task.__table__.c[name] for name in TASK_FIELDS), func.now()).where(moved),
+    ))
+    await db.execute(delete(Task).where(moved).execution_options(synchronize_session=False))
+    return list(ids)
+
+async def archive_in_batches(run: JobRun, condition) -> int:
+    """Moves every task matching condition, one checkpointed batch at a time; returns how many."""
+    after_id = 0
+    total = 0
+    while True:
+        start = time.perf_counter()
+        async with run.worker.session_factory() as db:
+            ids = await archive_batch(db, condition, run.worker.batch_size, after_id)
+            await run.checkpoint(db, len(ids))
+            await db.commit()
+        job_batch_seconds.observe(time.perf_counter() - start, run.kind)
+        if not ids:
+            break
+        total += len(ids)
+        after_id = ids[-1]
+        await run.pause()
+    if total:
+        # Members whose only tasks in a project were archived no longer see it listed
+        search.invalidate()
+        await project_listings.invalidate()
+    return total
+
+@job_handler("archive_tasks", every=TASK_ARCHIVE_INTERVAL if TASK_ARCHIVE_AFTER_DAYS > 0 else None)
+async def archive_tasks_job(run: JobRun):
+    cutoff = datetime.now(timezone.utc) - timedelta(days=TASK_ARCHIVE_AFTER_DAYS)
+    total = await archive_in_batches(run, archivable(cutoff))
+    logger.info("Archived %s tasks done before %s", total, cutoff.isoformat())
+
+@job_handler("archive_project")
+async def archive_project_job(run: JobRun):
+    # Every task of the project, whatever its status; the project stays, and its tasks are listed
+    # with include_archived and can be restored one by one. A job rerun after a crash just moves
+    # what is left.
+    total = await archive_in_batches(run, Task.project_id == run.target_id)
+    logger.info("Archived project %s: %s tasks", run.target_id, total)
+
+async def restore_task(db: AsyncSession, task_id: int) -> Optional[Task]:
+    """Moves an archived task back into `tasks` (the caller commits), with its version bumped:
+    clients holding the archived version get a conflict, as after any other write. Raises
+    IntegrityError if a live task has the id, which only a database that reused it can cause."""
+    archived = (await db.execute(select(ArchivedTask).where(ArchivedTask.id == task_id).with_for_update())).scalars().first()
+    if archived is None:
+        return None
+    values = {name: getattr(archived, name) for name in TASK_FIELDS}
+    # A fresh updated_at also keeps the next archive run from moving it straight back
+    values.update(version=archived.version + 1, updated_at=datetime.now(timezone.utc))
+    await db.execute(insert(Task).values(**values))
+    await db.execute(delete(ArchivedTask).where(ArchivedTask.id == task_id))
+    return await db.get(Task, task_id)
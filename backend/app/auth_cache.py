@@ -0,0 +1,36 @@
+import os
+from sqlalchemy import event, inspect
+from .cache import TTLCache
+from .models import User
+
+# Authenticated users keyed by token subject (email); a miss costs one `users` query
+principal_cache = TTLCache(
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000)),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", 60)),
+)
+# Decoded JWT payloads keyed by the raw bearer token; entries never outlive the token's exp
+token_cache = TTLCache(
+    maxsize=int(os.getenv("TOKEN_CACHE_SIZE", 10000)),
+    ttl=float(os.getenv("TOKEN_CACHE_TTL", 300)),
+)
+
+# Feed tickets (see POST /projects/{id}/events/ticket) already redeemed in this worker, by jti
+FEED_TICKET_SECONDS = float(os.getenv("FEED_TICKET_SECONDS", 30))
+redeemed_feed_tickets = TTLCache(maxsize=int(os.getenv("FEED_TICKET_CACHE_SIZE", 10000)), ttl=FEED_TICKET_SECONDS)
+
+def invalidate_user(email: str):
+    principal_cache.pop(email)
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target):
+    invalidate_user(target.email)
+    # An email change leaves the old subject cached too
+    for old_email in inspect(target).attrs.email.history.deleted or ():
+        invalidate_user(old_email)
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(mapper, connection, target):
+    invalidate_user(target.email)
+
+def cache_stats() -> dict:
+    return {"principals": principal_cache.stats(), "tokens": token_cache.stats()}
@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, List, Optional, Sequence
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Add backend to path
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.db import engine as default_engine
+from app.models import User, Project, Task, SeedRun
+from app.passwords import pwd_context
+from app.stats import rebuild_stats
+
+# Bulk synthetic data for staging and capacity tests; seed.py stays the small demo seed.
+#
+# Every row gets an explicit id inside ranges recorded in seed_runs, and all values come from
+# RNGs seeded by the run id. Rerunning the same run id therefore skips a finished run, and
+# resumes an interrupted one from its last committed chunk. Don't run it against a database
+# the API is writing to at the same time: the id ranges are claimed at the start of the run.
+
+DEFAULT_PASSWORD = "SeedPass1!"
+CHUNK_SIZE = 5000
+STATUSES = ["todo", "in_progress", "done"]
+WORDS = ["api", "billing", "search", "mobile", "report", "export", "login", "cache", "audit", "sync",
+         "invoice", "dashboard", "upload", "webhook", "onboarding", "metrics", "alerts", "backup"]
+RUN_ID = re.compile(r"^[a-z0-9][a-z0-9-]{0,62}$")
+
+def admin_count(users: int, admin_ratio: float) -> int:
+    return min(users, max(1, round(users * admin_ratio)))
+
+def user_email(run_id: str, role: str, n: int) -> str:
+    return f"{role}{n}@{run_id}.seed.test"
+
+def _picker(rng: random.Random, population: Sequence[int], distribution: str, zipf_s: float) -> Callable[[int], List[int]]:
+    # Uniform, or Zipf over a shuffled population so the heavy hitters aren't simply the lowest ids
+    if distribution == "uniform":
+        return lambda k: rng.choices(population, k=k)
+    population = list(population)
+    rng.shuffle(population)
+    cumulative, total = [], 0.0
+    for rank in range(len(population)):
+        total += 1 / (rank + 1) ** zipf_s
+        cumulative.append(total)
+    return lambda k: rng.choices(population, cum_weights=cumulative, k=k)
+
+def _user_rows(run_id: str, params: dict, first_id: int, password_hash: str) -> Iterator[List[dict]]:
+    admins = admin_count(params["users"], params["admin_ratio"])
+    for start in range(0, params["users"], params["chunk"]):
+        rows = []
+        for n in range(start, min(start + params["chunk"], params["users"])):
+            role, number = ("admin", n + 1) if n < admins else ("member", n - admins + 1)
+            rows.append({"id": first_id + n, "name": f"{role.title()} {number}", "email": user_email(run_id, role, number),
+                         "password_hash": password_hash, "role": role})
+        yield rows
+
+def _project_rows(run_id: str, params: dict, first_id: int) -> Iterator[List[dict]]:
+    rng = random.Random(f"{run_id}:projects")
+    for start in range(0, params["projects"], params["chunk"]):
+        yield [
+            {"id": first_id + n, "name": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {n + 1}",
+             "description": " ".join(rng.choices(WORDS, k=rng.randint(3, 12))), "version": 1}
+            for n in range(start, min(start + params["chunk"], params["projects"]))
+        ]
+
+def _task_rows(run_id: str, params: dict, first_id: int, first_user_id: int, first_project_id: int, started_at: datetime) -> Iterator[List[dict]]:
+    rng = random.Random(f"{run_id}:tasks")
+    admins = admin_count(params["users"], params["admin_ratio"])
+    members = range(first_user_id + admins, first_user_id + params["users"]) if params["users"] > admins else range(first_user_id, first_user_id + admins)
+    pick_project = _picker(rng, range(first_project_id, first_project_id + params["projects"]), params["task_distribution"], params["zipf_s"])
+    pick_assignee = _picker(rng, members, params["assignee_distribution"], params["zipf_s"])
+    due_from, due_to = params["due_window"]
+    # Due dates are relative to the run's start, not to now, so a resumed run generates the same rows
+    now = started_at.replace(microsecond=0, tzinfo=None)
+    for start in range(0, params["tasks"], params["chunk"]):
+        count = min(params["chunk"], params["tasks"] - start)
+        projects, assignees = pick_project(count), pick_assignee(count)
+        statuses = rng.choices(STATUSES, weights=params["status_weights"], k=count)
+        yield [
+            {"id": first_id + start + i, "project_id": projects[i], "assignee_user_id": assignees[i], "status": statuses[i],
+             "title": f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS)} {rng.choice(WORDS)}",
+             "due_date": now + timedelta(days=rng.randint(due_from, due_to)) if rng.random() < params["due_ratio"] else None,
+             "version": 1}
+            for i in range(count)
+        ]
+
+def _insert(engine: Engine, model, chunks: Iterator[List[dict]], first_id: int, total: int, log: Callable) -> int:
+    """Inserts the chunks not yet in the table, one transaction per chunk; returns rows inserted."""
+    with engine.connect() as conn:
+        done = conn.execute(select(func.count()).select_from(model).where(model.id >= first_id, model.id < first_id + total)).scalar()
+    if done:
+        log(f"  {model.__tablename__}: {done}/{total} rows already present, resuming")
+    inserted, position = 0, 0
+    start = time.perf_counter()
+    for rows in chunks:
+        # Chunks are generated even when skipped, so the RNG stays in step with the first run
+        skip = max(0, min(len(rows), done - position))
+        position += len(rows)
+        if skip == len(rows):
+            continue
+        with engine.begin() as conn:
+            conn.execute(insert(model), rows[skip:])
+        inserted += len(rows) - skip
+    elapsed = time.perf_counter() - start
+    if inserted:
+        log(f"  {model.__tablename__}: {inserted} rows in {elapsed:.1f}s ({inserted / elapsed:,.0f} rows/s)")
+    return inserted
+
+def seed_run(engine: Engine, run_id: str, users: int = 1000, projects: int = 2000, tasks: int = 100000,
+             admin_ratio: float = 0.02, task_distribution: str = "zipf", assignee_distribution: str = "zipf",
+             zipf_s: float = 1.0, status_weights: Sequence[float] = (5, 3, 2), due_ratio: float = 0.7,
+             due_window: Sequence[int] = (-30, 60), password: str = DEFAULT_PASSWORD, chunk: int = CHUNK_SIZE,
+             log: Callable = print) -> Optional[SeedRun]:
+    """Generates one run's users, projects and tasks; returns its seed_runs row, or None if it was already complete."""
+    if not RUN_ID.match(run_id):
+        raise ValueError("run_id must be 1-63 lowercase letters, digits or dashes")
+    params = {
+        "users": users, "projects": projects, "tasks": tasks, "admin_ratio": admin_ratio,
+        "task_distribution": task_distribution, "assignee_distribution": assignee_distribution, "zipf_s": zipf_s,
+        "status_weights": list(status_weights), "due_ratio": due_ratio, "due_window": list(due_window), "chunk": chunk,
+    }
+    with Session(engine) as db:
+        run = db.get(SeedRun, run_id)
+        if run is None:
+            next_id = lambda model: (db.execute(select(func.max(model.id))).scalar() or 0) + 1
+            run = SeedRun(run_id=run_id, params=json.dumps(params, sort_keys=True), first_user_id=next_id(User),
+                          first_project_id=next_id(Project), first_task_id=next_id(Task))
+            db.add(run)
+            db.commit()
+        elif run.completed_at is not None:
+            log(f"Run {run_id} already completed at {run.completed_at}; nothing to do")
+            return None
+        elif json.loads(run.params) != params: # type: ignore
+            raise ValueError(f"Run {run_id} was started with different parameters: {run.params}")
+        first_user_id, first_project_id, first_task_id = run.first_user_id, run.first_project_id, run.first_task_id
+        started_at = run.created_at
+
+    log(f"Seeding run {run_id}: {users} users, {projects} projects, {tasks} tasks")
+    started = time.perf_counter()
+    # One hash for every user: hashing each password at full bcrypt cost would dominate the run
+    password_hash = pwd_context.hash(password)
+    inserted = _insert(engine, User, _user_rows(run_id, params, first_user_id, password_hash), first_user_id, users, log) # type: ignore
+    inserted += _insert(engine, Project, _project_rows(run_id, params, first_project_id), first_project_id, projects, log) # type: ignore
+    inserted += _insert(engine, Task, _task_rows(run_id, params, first_task_id, first_user_id, first_project_id, started_at), first_task_id, tasks, log) # type: ignore
+
+    rebuild_started = time.perf_counter()
+    with Session(engine) as db:
+        rebuild_stats(db)
+        db.execute(update(SeedRun).where(SeedRun.run_id == run_id).values(completed_at=func.now()))
+        db.commit()
+        run = db.get(SeedRun, run_id)
+    log(f"  task counters rebuilt in {time.perf_counter() - rebuild_started:.1f}s")
+    elapsed = time.perf_counter() - started
+    log(f"Run {run_id} complete: {inserted} rows in {elapsed:.1f}s ({inserted / elapsed:,.0f} rows/s overall)")
+    log(f"Log in as {user_email(run_id, 'admin', 1)} / {password}")
+    return run
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-generate users, projects and tasks for staging and capacity tests.")
+    parser.add_argument("--run-id", required=True, help="Names the run; rerunning it resumes or does nothing")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--projects", type=int, default=2000)
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--admin-ratio", type=float, default=0.02)
+    parser.add_argument("--task-distribution", choices=["uniform", "zipf"], default="zipf", help="Tasks per project")
+    parser.add_argument("--assignee-distribution", choices=["uniform", "zipf"], default="zipf", help="Tasks per member")
+    parser.add_argument("--zipf-s", type=float, default=1.0, help="Zipf exponent; higher is more skewed")
+    parser.add_argument("--status-weights", default="5,3,2", help="Relative todo,in_progress,done weights")
+    parser.add_argument("--due-ratio", type=float, default=0.7, help="Share of tasks with a due date")
+    parser.add_argument("--due-window", default="-30,60", help="Due dates fall this many days from now")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--chunk", type=int, default=CHUNK_SIZE, help="Rows per INSERT transaction")
+    args = parser.parse_args()
+
+    seed_run(
+        default_engine, args.run_id, users=args.users, projects=args.projects, tasks=args.tasks, admin_ratio=args.admin_ratio,
+        task_distribution=args.task_distribution, assignee_distribution=args.assignee_distribution, zipf_s=args.zipf_s,
+        status_weights=[float(weight) for weight in args.status_weights.split(",")], due_ratio=args.due_ratio,
+        due_window=[int(days) for days in args.due_window.split(",")], password=args.password, chunk=args.chunk,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,214 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+import asyncio
+import logging
 import os
-from dotenv import load_dotenv
+import time
+from typing import Callable, List, Optional, Tuple
+from fastapi import Request
+from .cache import TTLCache
+from .settings import Settings, get_settings, load_env, pool_options
 
-load_dotenv()  # Load environment variables from .env file
+logger = logging.getLogger(__name__)
 
-SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
+load_env()  # For this and every later module's os.getenv constants
 
-if SQLALCHEMY_DATABASE_URL is None:
-    raise ValueError("DATABASE_URL environment variable not set. Check your .env file.")
+# No engine is made at import. A served app creates its async engines in its lifespan
+# (open_engines), once the worker process has been forked or spawned, so every worker opens its
+# own pool. Scripts and in-process clients that skip the lifespan call init_engines(), which the
+# first use of db.engine, db.async_engine, db.replica_async_engine or a session dependency does
+# for them. Until then the session factories below are unbound.
+# The optional read replica serves read-only endpoints (see get_read_db); without
+# REPLICA_DATABASE_URL, replica_async_engine is the primary engine.
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Sync sessions: Alembic migrations, seed.py and other scripts
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Async sessions: request handlers, so DB waits never block the event loop
+AsyncSessionLocal = async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
+ReplicaSessionLocal = async_sessionmaker(class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# How long a client that just wrote keeps reading from the primary; should exceed the replica's lag
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", 5))
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+_engine_hooks: List[Callable[[AsyncEngine, str], None]] = []
+
+def __getattr__(name: str):
+    if name == "engine":
+        _init_sync_engine(get_settings())
+        return globals()[name]
+    if name in ("async_engine", "replica_async_engine"):
+        _init_async_engines(get_settings())
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def create_async_engines(settings: Settings) -> tuple:
+    """(primary, replica) async engines; the replica is the primary without a replica URL."""
+    primary = create_async_engine(settings.async_database_url, **pool_options(settings.async_database_url, settings))
+    if not settings.async_replica_database_url:
+        return primary, primary
+    return primary, create_async_engine(settings.async_replica_database_url, **pool_options(settings.async_replica_database_url, settings))
+
+def _init_sync_engine(settings: Settings):
+    engine = create_engine(settings.database_url, **pool_options(settings.database_url, settings))
+    globals()["engine"] = engine
+    SessionLocal.configure(bind=engine)
+
+def _init_async_engines(settings: Settings):
+    primary, replica = create_async_engines(settings)
+    globals().update(async_engine=primary, replica_async_engine=replica)
+    AsyncSessionLocal.configure(bind=primary)
+    ReplicaSessionLocal.configure(bind=replica, info={"replica": True} if replica is not primary else {})
+    for hook in _engine_hooks:
+        for label, db_engine in async_engines():
+            hook(db_engine, label)
+
+def init_engines(settings: Optional[Settings] = None):
+    """Creates the sync and async engines for scripts, from settings (default: the environment),
+    and binds the session factories to them."""
+    settings = settings or get_settings()
+    _init_sync_engine(settings)
+    _init_async_engines(settings)
+
+def engines_ready() -> bool:
+    return "async_engine" in globals()
+
+def async_engines() -> List[Tuple[str, AsyncEngine]]:
+    """(label, engine) for the current primary and, if separate, replica engine."""
+    if not engines_ready():
+        return []
+    primary, replica = globals()["async_engine"], globals()["replica_async_engine"]
+    return [("async", primary)] + ([("replica", replica)] if replica is not primary else [])
+
+def has_replica() -> bool:
+    return len(async_engines()) > 1
+
+def add_engine_hook(hook: Callable[[AsyncEngine, str], None]):
+    """Calls hook(engine, label) for every async engine, current and future (e.g. instrumentation)."""
+    _engine_hooks.append(hook)
+    for label, db_engine in async_engines():
+        hook(db_engine, label)
+
+async def open_engines(settings: Settings):
+    """Creates this process's async engines (the lifespan's first step) and binds the session
+    factories to them. Engines made earlier are dropped without closing their connections, which
+    may belong to a parent process."""
+    previous = [db_engine for _, db_engine in async_engines()]
+    _init_async_engines(settings)
+    for old in previous:
+        await old.dispose(close=False)
+
+async def close_engines():
+    for _, db_engine in async_engines():
+        await db_engine.dispose()
+
+async def prewarm_pool(db_engine: AsyncEngine, connections: Optional[int] = None) -> int:
+    """Opens up to connections pool connections at once (the pool_size by default) and returns
+    them to the pool, so the first requests don't pay for connecting. Returns how many opened."""
+    pool = db_engine.sync_engine.pool
+    if connections is None:
+        connections = pool.size() if hasattr(pool, "size") else 1 # type: ignore
+    if connections <= 0:
+        return 0
+
+    async def connect():
+        conn = await db_engine.connect()
+        await conn.execute(text("SELECT 1"))
+        return conn
+
+    # All held at once: connecting one at a time would keep reusing the first
+    results = await asyncio.gather(*(connect() for _ in range(connections)), return_exceptions=True)
+    opened = [conn for conn in results if not isinstance(conn, BaseException)]
+    for conn in opened:
+        await conn.close()
+    if len(opened) < connections:
+        logger.warning("Opened %s of %s pool connections at startup: %s", len(opened), connections,
+                       next(exc for exc in results if isinstance(exc, BaseException)))
+    return len(opened)
+
+# Bearer tokens that made a successful write recently, for read-your-writes within this worker.
+# The READ_PRIMARY_COOKIE set alongside covers cookie-sending clients served by other workers.
+recent_writers = TTLCache(maxsize=int(os.getenv("RECENT_WRITERS_SIZE", 10000)), ttl=READ_YOUR_WRITES_SECONDS)
 
 Base=declarative_base()
 
 def get_db():
+    if "engine" not in globals():
+        _init_sync_engine(get_settings())
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def ensure_engines():
+    if not engines_ready():
+        _init_async_engines(get_settings())
+
+async def get_async_db():
+    ensure_engines()
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def reads_from_primary(request: Request) -> bool:
+    if not has_replica():
+        return True
+    authorization = request.headers.get("authorization")
+    if authorization and recent_writers.get(authorization):
+        return True
+    try:
+        return float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+def pinned_to_primary(request: Request) -> bool:
+    """Whether a recent write keeps this client's reads off the replica (never without one)."""
+    return has_replica() and reads_from_primary(request)
+
+def mark_write(request: Request, response):
+    """Called after a successful mutation: the client's next reads for a while go to the primary."""
+    if not has_replica():
+        return
+    authorization = request.headers.get("authorization")
+    if authorization:
+        recent_writers.set(authorization, True)
+    until = time.time() + READ_YOUR_WRITES_SECONDS
+    response.set_cookie(READ_PRIMARY_COOKIE, f"{until:.3f}", max_age=int(READ_YOUR_WRITES_SECONDS) + 1, httponly=True, samesite="lax")
+
+def read_session_factory(request: Request) -> async_sessionmaker:
+    """Session factory for read-only work: the replica, unless this client wrote recently."""
+    ensure_engines()
+    return AsyncSessionLocal if reads_from_primary(request) else ReplicaSessionLocal
+
+async def get_read_db(request: Request):
+    async with read_session_factory(request)() as db:
+        yield db
+
+READY_TIMEOUT_SECONDS = float(os.getenv("READY_TIMEOUT_SECONDS", 2))
+READY_MAX_SATURATION = float(os.getenv("READY_MAX_SATURATION", 1.0))
+
+async def check_database(db_engine: AsyncEngine) -> dict:
+    """Round-trip latency of SELECT 1 plus the pool's occupancy, for the readiness endpoint."""
+    result: dict = {"ok": True}
+    start = time.perf_counter()
+    try:
+        async with asyncio.timeout(READY_TIMEOUT_SECONDS):
+            async with db_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    except Exception as exc:
+        result.update(ok=False, error=f"{type(exc).__name__}: {exc}" if str(exc) else type(exc).__name__)
+    pool = db_engine.sync_engine.pool
+    if hasattr(pool, "checkedout"):
+        max_overflow = pool._max_overflow # type: ignore
+        checked_out = pool.checkedout() # type: ignore
+        # A negative max_overflow means unbounded, so it can't saturate
+        saturation = checked_out / (pool.size() + max_overflow) if max_overflow >= 0 else 0.0 # type: ignore
+        result["pool"] = {"size": pool.size(), "max_overflow": max_overflow, "checked_out": checked_out, # type: ignore
+                          "idle": pool.checkedin(), "saturation": round(saturation, 3)} # type: ignore
+        if result["pool"]["saturation"] >= READY_MAX_SATURATION:
+            result["ok"] = False
+    return result
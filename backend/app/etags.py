@@ -0,0 +1,57 @@
+import hashlib
+from typing import Optional
+from fastapi import HTTPException, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .pagination import decode_cursor, keyset_page
+
+# Read endpoints answer If-None-Match from a small aggregate over the rows they would return,
+# so an unchanged listing costs one aggregate query and no body.
+CACHE_CONTROL = "private, no-cache"  # browsers may keep the body but must revalidate with the ETag
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates
+
+def if_match_version(if_match: Optional[str]) -> Optional[int]:
+    """The version an If-Match header names, bare or as an ETag: 3, "3" or W/"3"."""
+    if not if_match:
+        return None
+    try:
+        return int(if_match.strip().removeprefix("W/").strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail='If-Match must be the version to update, e.g. "3"')
+
+async def listing_etag(db: AsyncSession, query, id_column, version_column, limit: int, cursor: Optional[str], *scope) -> str:
+    """ETag of one keyset page of query: aggregates only the rows paginate() would fetch (the
+    page and the extra row that decides the next cursor), so it costs an index range scan of the
+    page, not of the whole listing."""
+    # count + sum(id) catch inserts, deletes and rows moving in or out of the filter;
+    # sum(version) catches every edit, since each one bumps a row's version
+    window = keyset_page(
+        query.with_only_columns(id_column.label("id"), version_column.label("version")).order_by(None),
+        id_column, limit, decode_cursor(cursor),
+    ).subquery()
+    aggregate = select(
+        func.count(window.c.id),
+        func.coalesce(func.sum(window.c.id), 0),
+        func.coalesce(func.sum(window.c.version), 0),
+    )
+    count, id_sum, version_sum = (await db.execute(aggregate)).one()
+    return make_etag(*scope, limit, cursor, count, id_sum, version_sum)
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+def set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -0,0 +1,277 @@
+import asyncio
+import fcntl
+import json
+import os
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+FEED_BUFFER_SIZE = int(os.getenv("FEED_BUFFER_SIZE", 1000))  # Recent events kept per worker for resume
+FEED_QUEUE_SIZE = int(os.getenv("FEED_QUEUE_SIZE", 256))  # Pending events per connection before it is cut off
+EVENT_BROKER = os.getenv("EVENT_BROKER", "memory")  # "memory" (single worker) or "file" (workers on one host)
+EVENT_BROKER_PATH = os.getenv("EVENT_BROKER_PATH", "task_events.log")
+EVENT_BROKER_POLL = float(os.getenv("EVENT_BROKER_POLL", 0.1))
+EVENT_BROKER_MAX_BYTES = int(os.getenv("EVENT_BROKER_MAX_BYTES", 64 * 1024 * 1024))  # Size at which the file is rotated
+
+# Shown to members too; they say nothing about individual tasks
+BROADCAST_EVENTS = {"project.deleted", "tasks.imported"}
+
+class FeedOverflow(Exception):
+    """The subscriber fell FEED_QUEUE_SIZE events behind; it should reconnect with its last event id."""
+
+class Broker(ABC):
+    """Carries events between workers.
+
+    publish() assigns the event a globally increasing integer id and must hand it to the
+    deliver callback of every started broker, including the publisher's own.
+    """
+
+    @abstractmethod
+    async def start(self, deliver: Callable[[dict], None]) -> int:
+        """Begin delivering; returns the id of the newest event already published."""
+
+    @abstractmethod
+    async def publish(self, event: dict):
+        ...
+
+    async def stop(self):
+        pass
+
+class InProcessBroker(Broker):
+    def __init__(self):
+        # Ids continue from wall-clock microseconds so they keep increasing across restarts
+        self._last_id = time.time_ns() // 1000
+        self._deliver: Optional[Callable[[dict], None]] = None
+
+    async def start(self, deliver):
+        self._deliver = deliver
+        return self._last_id
+
+    async def publish(self, event):
+        self._last_id += 1
+        event["id"] = self._last_id
+        if self._deliver:
+            self._deliver(event)
+
+class FileBroker(Broker):
+    """Local stand-in for a Redis-style pub/sub: every worker appends JSON lines to one shared
+    file under an exclusive lock and tails it.
+
+    The file is a segment of the event stream. Its first line records the segment's base, and an
+    event's id is the base plus the event's byte offset in the segment. The appender that takes
+    the segment past max_bytes replaces it, under the lock, with a fresh one whose base continues
+    the ids; tailers finish the old segment through their open handle and move on to the new one.
+    A tailer more than a whole segment behind would miss the segments in between, so max_bytes
+    must stay far above what workers write in one poll interval.
+    """
+
+    def __init__(self, path: str, poll_interval: float = EVENT_BROKER_POLL, max_bytes: int = EVENT_BROKER_MAX_BYTES):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.max_bytes = max_bytes
+        self._reader: Optional[asyncio.Task] = None
+
+    async def start(self, deliver):
+        log, newest = await asyncio.to_thread(self._open_tail)
+        self._reader = asyncio.create_task(self._tail(log, deliver))
+        return newest
+
+    @staticmethod
+    def _header(base: int) -> str:
+        return json.dumps({"segment_base": base}) + "\n"
+
+    @staticmethod
+    def _base(log) -> int:
+        log.seek(0)
+        line = log.readline()
+        return json.loads(line).get("segment_base", 0) if line.startswith('{"segment_base"') else 0
+
+    def _locked_segment(self):
+        """The current segment, opened for appending and locked; the caller unlocks and closes it."""
+        while True:
+            log = open(self.path, "a+")
+            fcntl.flock(log, fcntl.LOCK_EX)
+            try:
+                current = os.stat(self.path).st_ino == os.fstat(log.fileno()).st_ino
+            except FileNotFoundError:
+                current = False
+            if current:
+                if log.seek(0, os.SEEK_END) == 0:
+                    log.write(self._header(0))
+                    log.flush()
+                return log
+            log.close()  # Rotated while we waited for the lock
+
+    def _open_tail(self):
+        """A handle at the end of the current segment, and the id of the newest event."""
+        log = self._locked_segment()
+        try:
+            size = log.seek(0, os.SEEK_END)
+            tail = open(self.path)  # Opened under the lock, so it is this segment
+            tail.seek(size)
+            return tail, self._base(log) + size
+        finally:
+            fcntl.flock(log, fcntl.LOCK_UN)
+            log.close()
+
+    def _append(self, event: dict):
+        log = self._locked_segment()
+        try:
+            base = self._base(log)
+            offset = log.seek(0, os.SEEK_END)
+            event["id"] = base + offset + 1  # ids start at 1 so offset 0 can't be confused with "none"
+            log.write(json.dumps(event, separators=(",", ":")) + "\n")
+            log.flush()
+            size = log.tell()
+            if size >= self.max_bytes:
+                segment = f"{self.path}.{os.getpid()}.tmp"
+                with open(segment, "w") as new:
+                    new.write(self._header(base + size))
+                os.replace(segment, self.path)
+        finally:
+            fcntl.flock(log, fcntl.LOCK_UN)
+            log.close()
+
+    async def publish(self, event):
+        await asyncio.to_thread(self._append, event)
+
+    def _read(self, log):
+        """(text appended since the last read, the handle to read next): on reaching the end
+        of a segment that has been replaced, the new segment, past its header."""
+        chunk = log.read()
+        if chunk:
+            return chunk, log
+        try:
+            rotated = os.stat(self.path).st_ino != os.fstat(log.fileno()).st_ino
+        except FileNotFoundError:
+            rotated = False
+        if not rotated:
+            return chunk, log
+        chunk = log.read()  # Appended just before the rotation
+        log.close()
+        log = open(self.path)
+        log.readline()
+        return chunk, log
+
+    async def _tail(self, log, deliver):
+        buffer = ""
+        try:
+            while True:
+                chunk, log = await asyncio.to_thread(self._read, log)
+                if not chunk:
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                buffer += chunk
+                *lines, buffer = buffer.split("\n")
+                for line in lines:
+                    if line:
+                        deliver(json.loads(line))
+        finally:
+            log.close()
+
+    async def stop(self):
+        if self._reader:
+            self._reader.cancel()
+            self._reader = None
+
+class Subscription:
+    def __init__(self, project_id: int, member_id: Optional[int]):
+        self.project_id = project_id
+        self.member_id = member_id  # Members only see events for tasks assigned to them
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=FEED_QUEUE_SIZE)
+        self.overflowed = False
+
+    def view(self, event: dict) -> Optional[dict]:
+        if event["project_id"] != self.project_id:
+            return None
+        if self.member_id is None or event["type"] in BROADCAST_EVENTS:
+            return event
+        if event.get("assignee_user_id") == self.member_id:
+            return event
+        if event.get("previous_assignee_user_id") == self.member_id:
+            # Reassigned away from this member: it leaves their board
+            return {**event, "type": "task.removed"}
+        return None
+
+    def offer(self, event: dict):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A slow consumer is cut off instead of buffering without bound; it resumes from its last id
+            self.overflowed = True
+
+    async def next_event(self, timeout: float) -> Optional[dict]:
+        """The next event, or None if nothing arrived within timeout (time for a heartbeat)."""
+        if self.overflowed and self.queue.empty():
+            raise FeedOverflow()
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+class ChangeFeed:
+    def __init__(self, broker: Broker):
+        self.broker = broker
+        self.recent: deque = deque(maxlen=FEED_BUFFER_SIZE)
+        self.subscriptions: set = set()
+        self.horizon = 0  # Events with ids up to here can no longer be replayed by this worker
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._started = False
+
+    async def _ensure_started(self):
+        if self._started:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if not self._started:
+                self.horizon = await self.broker.start(self._deliver)
+                self._started = True
+
+    def _deliver(self, event: dict):
+        if len(self.recent) == self.recent.maxlen:
+            self.horizon = self.recent[0]["id"]
+        self.recent.append(event)
+        for subscription in list(self.subscriptions):
+            view = subscription.view(event)
+            if view is not None:
+                subscription.offer(view)
+
+    async def publish(self, event_type: str, project_id: int, **fields):
+        await self._ensure_started()
+        await self.broker.publish({"type": event_type, "project_id": project_id, "ts": time.time(), **fields})
+
+    async def subscribe(self, project_id: int, member_id: Optional[int], last_event_id: Optional[int] = None) -> Subscription:
+        await self._ensure_started()
+        subscription = Subscription(project_id, member_id)
+        if last_event_id is not None:
+            if last_event_id < self.horizon:
+                # Older than anything we can replay: the client must refetch its listing
+                subscription.offer({"id": self.horizon, "type": "reset", "project_id": project_id})
+            else:
+                for event in self.recent:
+                    view = subscription.view(event) if event["id"] > last_event_id else None
+                    if view is not None:
+                        subscription.offer(view)
+        self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscriptions.discard(subscription)
+
+    async def stop(self):
+        await self.broker.stop()
+        self._started = False
+
+def create_broker() -> Broker:
+    if EVENT_BROKER == "file":
+        return FileBroker(EVENT_BROKER_PATH)
+    return InProcessBroker()
+
+feed = ChangeFeed(create_broker())
@@ -0,0 +1,256 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from .db import AsyncSessionLocal
+from .models import ArchivedTask, Job, Project, Task
+from .stats import clear_project_stats
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Background jobs persisted in the `jobs` table and run by an in-process worker in every API
+# process (unless JOBS_ENABLED is false). Work is done in small transactions of JOB_BATCH_SIZE
+# rows, JOB_BATCH_PAUSE seconds apart, so a large job never holds locks or a pooled connection
+# for long and leaves room for requests. Each batch records its progress and extends the job's lease in the same transaction;
+# if the process dies, another worker (or this one after a restart) claims the job once the lease
+# has lapsed and carries on from the rows that are left.
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 2))
+JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", 500))
+JOB_BATCH_PAUSE = float(os.getenv("JOB_BATCH_PAUSE", 0.05))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 60))  # Must exceed the time one batch can take
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", 10))  # Times the attempt number
+JOB_SCHEDULE_INTERVAL = float(os.getenv("JOB_SCHEDULE_INTERVAL", 60))  # How often periodic jobs are checked for being due
+
+OPEN_STATUSES = ("queued", "running")
+
+jobs_finished = metrics.registry.register(metrics.Counter(
+    "jobs_finished_total", "Background jobs by outcome (done, retried, failed)", ("kind", "result")))
+job_rows = metrics.registry.register(metrics.Counter(
+    "job_rows_processed_total", "Rows processed by background job batches", ("kind",)))
+job_batch_seconds = metrics.registry.register(metrics.Histogram(
+    "job_batch_seconds", "Duration of one background job batch, including its commit", ("kind",)))
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+class LeaseLost(Exception):
+    """Another worker claimed the job after this one's lease lapsed; the current batch is rolled back."""
+
+class JobRun:
+    def __init__(self, worker: "JobWorker", job_id: int, kind: str, target_id: int):
+        self.worker = worker
+        self.id = job_id
+        self.kind = kind
+        self.target_id = target_id
+
+    async def checkpoint(self, db: AsyncSession, processed: int):
+        """Adds processed to the job's progress and renews its lease, in the batch's transaction."""
+        now = utcnow()
+        result = await db.execute(
+            update(Job)
+            .where(Job.id == self.id, Job.status == "running", Job.locked_by == self.worker.worker_id)
+            .values(progress=Job.progress + processed, lease_until=now + timedelta(seconds=JOB_LEASE_SECONDS), updated_at=now)
+        )
+        if result.rowcount != 1: # type: ignore
+            raise LeaseLost()
+        if processed:
+            job_rows.inc(self.kind, amount=processed)
+
+    async def pause(self):
+        await asyncio.sleep(self.worker.batch_pause)
+
+JobHandler = Callable[[JobRun], Awaitable[None]]
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+PERIODIC_JOBS: Dict[str, float] = {}  # Kind -> seconds between runs; these jobs have target_id 0
+
+def job_handler(kind: str, every: Optional[float] = None):
+    def register(handler: JobHandler) -> JobHandler:
+        JOB_HANDLERS[kind] = handler
+        if every:
+            PERIODIC_JOBS[kind] = every
+        return handler
+    return register
+
+@job_handler("delete_project")
+async def delete_project_job(run: JobRun):
+    # Tasks, then archived tasks, go in id-ordered batches; the project row and its counters go with
+    # the last, empty one. The project is already hidden (deleted_at), so the half-deleted state is
+    # never served.
+    session_factory = run.worker.session_factory
+    while True:
+        start = time.perf_counter()
+        async with session_factory() as db:
+            for model in (Task, ArchivedTask):
+                task_ids = (await db.execute(
+                    select(model.id).where(model.project_id == run.target_id).order_by(model.id).limit(run.worker.batch_size)
+                )).scalars().all()
+                if task_ids:
+                    await db.execute(delete(model).where(model.id.in_(task_ids)))
+                    break
+            else:
+                await clear_project_stats(db, run.target_id)
+                await db.execute(delete(Project).where(Project.id == run.target_id))
+            await run.checkpoint(db, len(task_ids))
+            await db.commit()
+        job_batch_seconds.observe(time.perf_counter() - start, run.kind)
+        if not task_ids:
+            return
+        await run.pause()
+
+def claimable(now: datetime):
+    # Queued and past any retry delay, or running under a lease that has lapsed
+    return and_(Job.status.in_(OPEN_STATUSES), or_(Job.lease_until.is_(None), Job.lease_until < now))
+
+async def enqueue(db: AsyncSession, kind: str, target_id: int, created_by: Optional[int] = None) -> Job:
+    """Adds a job to the session (the caller commits), or returns the open one for the same target."""
+    existing = (await db.execute(
+        select(Job).where(Job.kind == kind, Job.target_id == target_id, Job.status.in_(OPEN_STATUSES)).limit(1)
+    )).scalars().first()
+    if existing is not None:
+        return existing
+    job = Job(kind=kind, target_id=target_id, status="queued", progress=0, attempts=0, created_by=created_by)
+    db.add(job)
+    await db.flush()
+    return job
+
+class JobWorker:
+    def __init__(self, session_factory: async_sessionmaker = AsyncSessionLocal, batch_size: int = JOB_BATCH_SIZE,
+                 batch_pause: float = JOB_BATCH_PAUSE, poll_interval: float = JOB_POLL_INTERVAL):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"[:64]
+        self.current: Optional[JobRun] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._next_schedule = 0.0
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._loop())
+            logger.info("Job worker %s started", self.worker_id)
+
+    def wake(self):
+        """Called after a job is committed, so it starts now rather than at the next poll."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                if time.monotonic() >= self._next_schedule:
+                    self._next_schedule = time.monotonic() + JOB_SCHEDULE_INTERVAL
+                    await self.schedule_periodic()
+                if await self.run_next():
+                    continue
+            except Exception:
+                logger.exception("Job worker could not claim a job")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval) # type: ignore
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear() # type: ignore
+
+    async def schedule_periodic(self):
+        """Queues each periodic job whose last run was created longer ago than its interval.
+        Every worker does this; enqueue() keeps it to one open job per kind."""
+        for kind, every in PERIODIC_JOBS.items():
+            async with self.session_factory() as db:
+                last = (await db.execute(select(func.max(Job.created_at)).where(Job.kind == kind))).scalar()
+                if last is not None and last.replace(tzinfo=last.tzinfo or timezone.utc) > utcnow() - timedelta(seconds=every):
+                    continue
+                await enqueue(db, kind, 0)
+                await db.commit()
+
+    async def claim(self) -> Optional[JobRun]:
+        async with self.session_factory() as db:
+            now = utcnow()
+            candidates = (await db.execute(select(Job.id).where(claimable(now)).order_by(Job.id).limit(5))).scalars().all()
+            for job_id in candidates:
+                # Compare-and-set, so two workers polling at once can't both take it
+                result = await db.execute(
+                    update(Job).where(Job.id == job_id, claimable(now))
+                    .values(status="running", locked_by=self.worker_id, lease_until=now + timedelta(seconds=JOB_LEASE_SECONDS),
+                            attempts=Job.attempts + 1, updated_at=now)
+                )
+                await db.commit()
+                if result.rowcount == 1: # type: ignore
+                    job = await db.get(Job, job_id)
+                    return JobRun(self, job_id, job.kind, job.target_id) # type: ignore
+        return None
+
+    async def run_next(self) -> bool:
+        """Claims and runs one job; False if there was none."""
+        run = await self.claim()
+        if run is None:
+            return False
+        self.current = run
+        try:
+            await self._execute(run)
+        finally:
+            self.current = None
+        return True
+
+    async def _execute(self, run: JobRun):
+        handler = JOB_HANDLERS.get(run.kind)
+        logger.info("Job %s (%s %s) running", run.id, run.kind, run.target_id)
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for job kind '{run.kind}'")
+            await handler(run)
+        except LeaseLost:
+            logger.warning("Job %s lost its lease to another worker", run.id)
+            return
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back at once instead of waiting out the lease
+            await self._finish(run, status="queued", lease_until=None)
+            raise
+        except Exception as exc:
+            await self._failed(run, exc)
+            return
+        await self._finish(run, status="done", finished_at=utcnow(), lease_until=None, error=None)
+        jobs_finished.inc(run.kind, "done")
+        logger.info("Job %s (%s %s) done", run.id, run.kind, run.target_id)
+
+    async def _failed(self, run: JobRun, exc: Exception):
+        async with self.session_factory() as db:
+            attempts = (await db.execute(select(Job.attempts).where(Job.id == run.id))).scalar_one()
+        error = f"{type(exc).__name__}: {exc}"[:1024]
+        if attempts >= JOB_MAX_ATTEMPTS:
+            logger.exception("Job %s (%s %s) failed after %s attempts", run.id, run.kind, run.target_id, attempts)
+            await self._finish(run, status="failed", finished_at=utcnow(), lease_until=None, error=error)
+            jobs_finished.inc(run.kind, "failed")
+        else:
+            logger.exception("Job %s (%s %s) failed, retrying", run.id, run.kind, run.target_id)
+            retry_at = utcnow() + timedelta(seconds=JOB_RETRY_DELAY * attempts)
+            await self._finish(run, status="queued", lease_until=retry_at, error=error)
+            jobs_finished.inc(run.kind, "retried")
+
+    async def _finish(self, run: JobRun, **values):
+        async with self.session_factory() as db:
+            await db.execute(
+                update(Job).where(Job.id == run.id, Job.locked_by == self.worker_id)
+                .values(locked_by=None, updated_at=utcnow(), **values)
+            )
+            await db.commit()
+
+job_worker = JobWorker()
@@ -1,196 +1,402 @@
-from dotenv import load_dotenv
+import asyncio
 import os
+import json
+import secrets
 import logging
 import time
-from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from typing import List, Literal, Optional
-from fastapi import FastAPI, Depends, HTTPException, status, Form, Header, Query
+from fastapi import APIRouter, FastAPI, Depends, HTTPException, status, Form, Header, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import HTTPConnection
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from .db import get_db, Base, engine
-from .models import User, Project, Task
-from .schemas import UserCreate, UserResponse, ProjectCreate, ProjectResponse, TaskCreate, TaskUpdate, TaskResponse
-
-load_dotenv("../.env")
+from .db import get_async_db, get_read_db, read_session_factory, AsyncSessionLocal, check_database, mark_write, pinned_to_primary
+from . import db as database
+from .models import ArchivedTask, Job, User, Project, Task
+from .auth_cache import FEED_TICKET_SECONDS, principal_cache, redeemed_feed_tickets, token_cache, cache_stats
+from .passwords import hash_password, verify_and_update_password
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, paginate
+from .queries import PROJECT_COLUMNS, in_live_project, project_list_query, member_access_query, task_columns, task_list_query, task_source
+from .responses import models_response, project_list_adapter, rows_response, select_fields
+from .compression import CompressionMiddleware
+from .admission import AdmissionMiddleware
+from .etags import etag_matches, if_match_version, listing_etag, make_etag, not_modified, set_etag
+from .events import FeedOverflow, feed
+from . import metrics, profiling
+from .search import search, search_projects
+from .response_cache import project_listings
+from .transfer import FORMATS, TaskImport, export_rows
+from .jobs import enqueue, job_worker
+from .archive import restore_task
+from .settings import Settings, get_settings
+from .stats import STAT_FIELDS, apply_task_changes, project_stats, task_key
+from .schemas import UserCreate, UserResponse, ProjectCreate, ProjectResponse, TaskCreate, TaskUpdate, TaskResponse, TaskBatchCreate, TaskBatchUpdate, TaskBatchResult, ProjectStatsResponse, JobResponse
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(pathname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+router = APIRouter()
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """Builds the API. Database pools are opened by its lifespan, in the process that serves it:
+    run it with `uvicorn app.main:create_app --factory` or `python -m app.serve`."""
+    settings = settings or get_settings()
+    if not settings.secret_key:
+        raise ValueError("SECRET_KEY not set in .env")
+    app = FastAPI(lifespan=lifespan)
+    app.state.settings = settings
+    app.add_middleware(CompressionMiddleware)  # Innermost, so request timing below includes compression
+    app.add_middleware(BaseHTTPMiddleware, dispatch=log_requests)
+    # A request shed here costs as little as possible
+    app.add_middleware(AdmissionMiddleware)
+    # Outermost, so admission's 503/429 answers carry CORS headers too and the frontend can read
+    # their status and Retry-After instead of seeing a network error
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=list(settings.cors_origins),
+        allow_credentials=True,
+        allow_methods=["*"],  # Allow all methods (GET, POST, etc.)
+        allow_headers=["*"],  # Allow all headers
+        expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Retry-After"],  # Let the frontend follow paginated listings and back off
+    )
+    app.include_router(router)
+    return app
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings: Settings = app.state.settings
+    start = time.perf_counter()
+    await database.open_engines(settings)
+    await warm_up(settings)
+    if settings.jobs_enabled:
+        job_worker.start()
+    logger.info("Worker %s ready in %.0f ms", os.getpid(), (time.perf_counter() - start) * 1000)
+    try:
+        yield
+    finally:
+        await job_worker.stop()
+        await feed.stop()
+        await database.close_engines()
+
+def instrument_engine(db_engine, label: str):
+    metrics.instrument_engine(db_engine.sync_engine, label)
+    profiling.instrument_engine(db_engine)
+
+# Covers the lifespan's engines and those scripts and in-process clients get from database.init_engines()
+database.add_engine_hook(instrument_engine)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000"],  # Allow your frontend origin
-    allow_credentials=True,
-    allow_methods=["*"],  # Allow all methods (GET, POST, etc.)
-    allow_headers=["*"],  # Allow all headers
-)
+async def warm_up(settings: Settings):
+    """Opens pool connections and fills per-worker caches, so the first requests don't wait for them."""
+    start = time.perf_counter()
+    engines = [db_engine for _, db_engine in database.async_engines()]
+    opened = sum(await asyncio.gather(*(database.prewarm_pool(db_engine, settings.db_pool_prewarm) for db_engine in engines)))
+    if settings.warm_caches:
+        try:
+            async with AsyncSessionLocal() as db:
+                await search.warm(db)
+        except Exception:
+            logger.exception("Could not warm caches at startup")
+    logger.info("Warmed up in %.0f ms: %s pool connections opened", (time.perf_counter() - start) * 1000, opened)
 
-# Middleware for logging requests
-@app.middleware("http")
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+AUTH_PREFIX = "/auth/"
+
+# Middleware for logging requests and recording their metrics
 async def log_requests(request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    logger.info(f"{request.method} {request.url.path} - Status: {response.status_code} - Time: {process_time:.2f}s")
-    return response
+    start_time = time.perf_counter()
+    db_stats = [0, 0.0]  # Queries and seconds, added to by the engine hooks in app.metrics
+    metrics.request_db_stats.set(db_stats)
+    metrics.http_requests_in_flight.inc()
+    status_code = 500
+    profile = None
+    record = None
+    try:
+        if request.headers.get(profiling.PROFILE_HEADER) and await is_admin_request(request):
+            profile = profiling.start("header")
+        elif profiling.should_sample():
+            profile = profiling.start("sampled")
+        response = await call_next(request)
+        status_code = response.status_code
+        # Login and signup write nothing the client reads back; pinning it to the primary would
+        # send the dashboard load that follows every login there
+        if request.method in MUTATING_METHODS and status_code < 400 and not request.url.path.startswith(AUTH_PREFIX):
+            mark_write(request, response)
+        return response
+    finally:
+        metrics.http_requests_in_flight.dec()
+        process_time = time.perf_counter() - start_time
+        # Label by route template, not raw path, so ids don't explode the series count
+        route = request.scope.get("route")
+        route_path = route.path if route else "unmatched"
+        metrics.observe_request(request.method, route_path, status_code, process_time, db_stats)
+        if profile is not None:
+            record = profiling.finish(profile, request.method, request.url.path, route_path, status_code, process_time)
+        logger.info(f"{request.method} {request.url.path} - Status: {status_code} - Time: {process_time * 1000:.1f}ms - DB: {db_stats[0]} queries, {db_stats[1] * 1000:.1f}ms")
+        if record is not None:
+            profiling.save_in_background("profile", record, f"{request.method} {request.url.path} ({profile.reason})") # type: ignore
+
+async def is_admin_request(request: Request) -> bool:
+    # The profiling header is honoured for admins only; anyone else's request runs unprofiled
+    try:
+        async with AsyncSessionLocal() as db:
+            user = await authenticate(bearer_token(request.headers.get("authorization")), db, app_settings(request))
+    except HTTPException:
+        return False
+    return user.role == "admin" # type: ignore
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
-print("ACCESS_TOKEN_EXPIRE_MINUTES:", os.getenv("JWT_EXPIRATION_MINUTES"))
-SECRET_KEY = os.getenv("SECRET_KEY")
-if not SECRET_KEY:
-    raise ValueError("SECRET_KEY not set in .env")
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRATION_MINUTES", 1440))
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+def app_settings(connection: HTTPConnection) -> Settings:
+    """The settings the serving app was built with (create_app), for HTTP and WebSocket routes."""
+    return connection.app.state.settings
 
-def create_access_token(data: dict, expires_delta: timedelta | None = None):
+def create_access_token(data: dict, expires_delta: timedelta | None = None, settings: Optional[Settings] = None):
     to_encode = data.copy()
     current_time = datetime.utcnow()
-    print("Token creation UTC time:", current_time)
     if expires_delta:
         expire = current_time + expires_delta
-        print("Calculated expiration:", expire)
     else:
         expire = current_time + timedelta(minutes=15)
-        print("Default expiration:", expire)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM) # type: ignore
+    encoded_jwt = jwt.encode(to_encode, (settings or get_settings()).secret_key, algorithm=ALGORITHM) # type: ignore
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def authenticate(token: Optional[str], db: AsyncSession, settings: Settings, scope: Optional[str] = None) -> User:
+    """The user the token was issued to. Access tokens carry no scope; a scoped token (a feed
+    ticket) is only accepted where that scope is asked for."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]) # type: ignore
-        email: str = payload.get("sub") # type: ignore
-        if email is None or not isinstance(email, str):
+    if not token:
+        raise credentials_exception
+    payload = token_cache.get(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, settings.secret_key, algorithms=[ALGORITHM]) # type: ignore
+        except JWTError:
             raise credentials_exception
-    except JWTError:
+        token_cache.set(token, payload, ttl=payload.get("exp", 0) - time.time())
+    email: str = payload.get("sub") # type: ignore
+    if email is None or not isinstance(email, str) or payload.get("scope") != scope:
         raise credentials_exception
-    user = db.query(User).filter(User.email == email).first()
+    user = principal_cache.get(email)
     if user is None:
-        raise credentials_exception
+        user = (await db.execute(select(User).where(User.email == email))).scalars().first()
+        if user is None:
+            raise credentials_exception
+        principal_cache.set(email, user)
     return user
 
-@app.post("/auth/login")
-async def login(email: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_read_db), settings: Settings = Depends(app_settings)):
+    try:
+        return await authenticate(token, db, settings)
+    except HTTPException:
+        if not db.info.get("replica"):
+            raise
+    # A user who signed up moments ago may not have reached the replica yet
+    async with AsyncSessionLocal() as primary:
+        return await authenticate(token, primary, settings)
+
+async def get_live_project(db: AsyncSession, project_id: int) -> Optional[Project]:
+    project = await db.get(Project, project_id)
+    # A deleted project stays in the table until its delete_project job has purged the tasks
+    return project if project is not None and project.deleted_at is None else None
+
+async def member_has_access(db: AsyncSession, project_id: int, user_id: int) -> bool:
+    if (await db.execute(member_access_query(project_id, user_id))).first():
+        return True
+    # Access doesn't lapse when a member's tasks in the project have all been archived
+    return (await db.execute(member_access_query(project_id, user_id, ArchivedTask))).first() is not None
+
+@router.post("/auth/login")
+async def login(email: str = Form(...), password: str = Form(...), db: AsyncSession = Depends(get_async_db), settings: Settings = Depends(app_settings)):
     logger.info("Login attempt for email: %s", email)
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not pwd_context.verify(password, user.password_hash): # type: ignore
+    user = (await db.execute(select(User).where(User.email == email))).scalars().first()
+    if not user:
+        logger.warning("Failed login attempt for email: %s", email)
+        raise HTTPException(status_code=401, detail="Incorrect email or password")
+    verified, new_hash = await verify_and_update_password(password, user.password_hash) # type: ignore
+    if not verified:
         logger.warning("Failed login attempt for email: %s", email)
         raise HTTPException(status_code=401, detail="Incorrect email or password")
-    access_token = create_access_token(data={"sub": user.email, "role": user.role})
+    if new_hash:
+        # bcrypt cost factor changed since this hash was made
+        user.password_hash = new_hash # type: ignore
+        await db.commit()
+        logger.info("Password rehashed for email: %s", email)
+    access_token = create_access_token(data={"sub": user.email, "role": user.role},
+                                       expires_delta=timedelta(minutes=settings.jwt_expiration_minutes), settings=settings)
     logger.info("Login successful for email: %s", email)
     return {"access_token": access_token, "token_type": "bearer"}
 
-@app.post("/auth/signup", response_model=UserResponse, status_code=201)
-async def signup(user: UserCreate, db: Session = Depends(get_db)):
+@router.post("/auth/signup", response_model=UserResponse, status_code=201)
+async def signup(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     logger.info("Signup attempt for email: %s", user.email)
-    existing_user = db.query(User).filter(User.email == user.email).first()
+    existing_user = (await db.execute(select(User).where(User.email == user.email))).scalars().first()
     if existing_user:
         logger.warning("Duplicate email signup attempt: %s", user.email)
         raise HTTPException(status_code=400, detail="Email already registered")
     if user.role == "admin":
         raise HTTPException(status_code=403, detail="Only admins can assign admin roles via a different endpoint")
-    hashed_password = pwd_context.hash(user.password)
+    hashed_password = await hash_password(user.password)
     db_user = User(name=user.name, email=user.email, password_hash=hashed_password, role=user.role)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     logger.info("User created: %s", db_user.id)
     return db_user
 
-@app.get("/projects", response_model=List[ProjectResponse])
-async def get_projects(q: Optional[str] = Query(None), current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    if current_user.role == "member": # type: ignore
-        query = db.query(Project).join(Task).filter(Task.assignee_user_id == current_user.id).distinct()
-    else:
-        query = db.query(Project)
-    if q and q.strip():  # Apply filter only if q is non-empty
-        query = query.filter(Project.name.ilike(f"%{q.strip()}%"))
-    projects = query.all()
-    if not projects:
-        raise HTTPException(status_code=404, detail="No projects found")
-    logger.info(f"Projects fetched for {current_user.email}: {[p.name for p in projects]}")
-    return projects
-
-@app.post("/projects", response_model=ProjectResponse, status_code=201)
-async def create_project(project: ProjectCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.get("/projects", response_model=List[ProjectResponse])
+async def get_projects(request: Request, response: Response, q: Optional[str] = Query(None), fields: Optional[str] = Query(None), include_archived: bool = Query(False), limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = Query(None), if_none_match: Optional[str] = Header(None), current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_read_db)):
+    scope = current_user.id if current_user.role == "member" else "admin" # type: ignore
+    columns = select_fields(fields, PROJECT_COLUMNS)
+    shape = ",".join(column.key for column in columns)
+    if q and q.strip():
+        # Ranked search over name, description and task titles: the top `limit` matches, best
+        # first, in one page (a relevance order has no keyset cursor)
+        member_id = current_user.id if current_user.role == "member" else None # type: ignore
+        projects = await search_projects(db, q.strip(), member_id, limit) # type: ignore
+        etag = make_etag("projects", scope, q, limit, shape, *[(project.id, project.version) for project in projects])
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        if not projects:
+            raise HTTPException(status_code=404, detail="No projects found")
+        set_etag(response, etag)
+        logger.info(f"Projects found for {current_user.email}: {len(projects)}")
+        return models_response(project_list_adapter, projects, response, columns)
+
+    async def render(if_none_match: Optional[str]):
+        query = project_list_query(current_user.role, current_user.id, columns, include_archived) # type: ignore
+        etag = await listing_etag(db, query, Project.id, Project.version, limit, cursor, "projects", scope, shape, include_archived)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        projects = await paginate(db, query, Project.id, limit, cursor, response)
+        if not projects and cursor is None:
+            raise HTTPException(status_code=404, detail="No projects found")
+        set_etag(response, etag)
+        logger.info(f"Projects fetched for {current_user.email}: {len(projects)}")
+        return rows_response(projects, response)
+
+    # Every admin sees the same listing, and a member's only changes with their assignments.
+    # A client pinned to the primary skips the cache: entries rendered from a lagging replica
+    # after its write may still be missing that write
+    return await project_listings.serve(scope, request.url.query, if_none_match, render, cacheable=not pinned_to_primary(request))
+
+@router.post("/projects", response_model=ProjectResponse, status_code=201)
+async def create_project(project: ProjectCreate, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     if current_user.role != "admin": # type: ignore
         raise HTTPException(status_code=403, detail="Admin only")
     db_project = Project(**project.dict())
     db.add(db_project)
-    db.commit()
-    db.refresh(db_project)
+    await db.commit()
+    await db.refresh(db_project)
+    search.project_changed(db_project)
+    await project_listings.invalidate()
     return db_project
 
-@app.get("/projects/{project_id}", response_model=ProjectResponse)
-async def get_project(project_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    project = db.query(Project).filter(Project.id == project_id).first()
+@router.get("/projects/{project_id}", response_model=ProjectResponse)
+async def get_project(project_id: int, response: Response, if_none_match: Optional[str] = Header(None), current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_read_db)):
+    project = await get_live_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    if current_user.role == "member" and not db.query(Task).filter(Task.project_id == project_id, Task.assignee_user_id == current_user.id).first(): # type: ignore
+    if current_user.role == "member" and not await member_has_access(db, project_id, current_user.id): # type: ignore
         raise HTTPException(status_code=403, detail="Access denied")
+    etag = make_etag("project", project.id, project.version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return project
 
-@app.put("/projects/{project_id}", response_model=ProjectResponse)
-async def update_project(project_id: int, project: ProjectCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.put("/projects/{project_id}", response_model=ProjectResponse)
+async def update_project(project_id: int, project: ProjectCreate, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     if current_user.role != "admin": # type: ignore
         raise HTTPException(status_code=403, detail="Admin only")
-    db_project = db.query(Project).filter(Project.id == project_id).first()
+    db_project = await get_live_project(db, project_id)
     if not db_project:
         raise HTTPException(status_code=404, detail="Project not found")
     for key, value in project.dict().items():
         setattr(db_project, key, value)
-    db.commit()
-    db.refresh(db_project)
+    db_project.version += 1 # type: ignore
+    await db.commit()
+    await db.refresh(db_project)
+    search.project_changed(db_project)
+    await project_listings.invalidate()
     return db_project
 
-@app.delete("/projects/{project_id}", status_code=204)
-async def delete_project(project_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.delete("/projects/{project_id}", response_model=JobResponse, status_code=202)
+async def delete_project(project_id: int, response: Response, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    # The project disappears now; its tasks are purged in batches by a delete_project job
     if current_user.role != "admin": # type: ignore
         raise HTTPException(status_code=403, detail="Admin only")
-    db_project = db.query(Project).filter(Project.id == project_id).first()
+    db_project = await db.get(Project, project_id)
     if not db_project:
         raise HTTPException(status_code=404, detail="Project not found")
-    db.delete(db_project)
-    db.commit()
+    hidden_now = db_project.deleted_at is None
+    if hidden_now:
+        db_project.deleted_at = datetime.now(timezone.utc) # type: ignore
+        db_project.version = Project.version + 1 # type: ignore
+    # Deleting again returns the open job, or requeues one that failed
+    job = await enqueue(db, "delete_project", project_id, current_user.id) # type: ignore
+    await db.commit()
+    await db.refresh(job)
+    job_worker.wake()
+    response.headers["Location"] = f"/jobs/{job.id}"
+    if hidden_now:
+        search.project_removed(project_id)
+        await project_listings.invalidate()
+        await publish_event("project.deleted", project_id)
+        logger.info("Project %s deleted, purge job %s queued", project_id, job.id)
+    return job
+
+@router.post("/projects/{project_id}/archive", response_model=JobResponse, status_code=202)
+async def archive_project(project_id: int, response: Response, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    # Every task of the project moves to the archive in batches, through an archive_project job
+    if current_user.role != "admin": # type: ignore
+        raise HTTPException(status_code=403, detail="Admin only")
+    if not await get_live_project(db, project_id):
+        raise HTTPException(status_code=404, detail="Project not found")
+    job = await enqueue(db, "archive_project", project_id, current_user.id) # type: ignore
+    await db.commit()
+    await db.refresh(job)
+    job_worker.wake()
+    response.headers["Location"] = f"/jobs/{job.id}"
+    logger.info("Archive job %s queued for project %s", job.id, project_id)
+    return job
 
-@app.get("/projects/{project_id}/tasks", response_model=List[TaskResponse])
-async def get_project_tasks(project_id: int, status: Optional[Literal["todo", "in_progress", "done"]] = Query(None), assignee: Optional[int] = Query(None), current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    project = db.query(Project).filter(Project.id == project_id).first()
+@router.get("/projects/{project_id}/tasks", response_model=List[TaskResponse])
+async def get_project_tasks(project_id: int, response: Response, status: Optional[Literal["todo", "in_progress", "done"]] = Query(None), assignee: Optional[int] = Query(None), fields: Optional[str] = Query(None), include_archived: bool = Query(False), limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = Query(None), if_none_match: Optional[str] = Header(None), current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_read_db)):
+    project = await get_live_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    query = db.query(Task).filter(Task.project_id == project_id)
-    if current_user.role == "member": # type: ignore
-        query = query.filter(Task.assignee_user_id == current_user.id)
+    if assignee and current_user.role != "admin": # type: ignore
+        raise HTTPException(status_code=403, detail="Admin only for assignee filter")
     
-    if status:
-        query = query.filter(Task.status == status)
-    if assignee:
-        if current_user.role != "admin": # type: ignore
-            raise HTTPException(status_code=403, detail="Admin only for assignee filter")
-        query = query.filter(Task.assignee_user_id == assignee)
-    
-    tasks = query.all()
-    return tasks
+    member_id = current_user.id if current_user.role == "member" else None # type: ignore
+    source = task_source(include_archived)
+    columns = select_fields(fields, task_columns(source))
+    query = task_list_query(project_id, member_id, status, assignee, columns, source) # type: ignore
+    shape = ",".join(column.key for column in columns)
+    etag = await listing_etag(db, query, source.id, source.version, limit, cursor, "tasks", project_id, member_id, status, assignee, shape, include_archived)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    tasks = await paginate(db, query, source.id, limit, cursor, response)
+    set_etag(response, etag)
+    return rows_response(tasks, response)
 
-@app.post("/projects/{project_id}/tasks", response_model=TaskResponse, status_code=201)
-async def create_task(project_id: int, task: TaskCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    project = db.query(Project).filter(Project.id == project_id).first()
+@router.post("/projects/{project_id}/tasks", response_model=TaskResponse, status_code=201)
+async def create_task(project_id: int, task: TaskCreate, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    project = await get_live_project(db, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
@@ -198,46 +404,413 @@ async def create_task(project_id: int, task: TaskCreate, current_user: User = De
         raise HTTPException(status_code=403, detail="Only admins can assign to others")
     
     assignee_id = task.assignee_user_id or current_user.id
-    assignee = db.query(User).filter(User.id == assignee_id).first()
+    assignee = await db.get(User, assignee_id)
     if not assignee:
         raise HTTPException(status_code=404, detail="Assignee not found")
     
-    db_task = Task(project_id=project_id, **task.dict(), assignee_user_id=assignee_id, version=1)
+    db_task = Task(project_id=project_id, **task.dict(exclude={"assignee_user_id"}), assignee_user_id=assignee_id, version=1)
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    await apply_task_changes(db, [(None, task_key(db_task))])
+    await db.commit()
+    await db.refresh(db_task)
+    search.task_changed(db_task)
+    await project_listings.invalidate(db_task.assignee_user_id)
+    await publish_task_event("task.created", db_task)
     return db_task
 
-@app.patch("/tasks/{task_id}", response_model=TaskResponse)
-async def update_task(task_id: int, task_update: TaskUpdate, if_match: Optional[str] = Header(None), current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    db_task = db.query(Task).filter(Task.id == task_id).first()
+async def publish_event(event_type: str, project_id: int, **fields):
+    # Runs after commit: a broker failure must not turn a committed write into an error response
+    try:
+        await feed.publish(event_type, project_id, **fields)
+    except Exception:
+        logger.exception("Failed to publish %s event for project %s", event_type, project_id)
+
+async def publish_task_event(event_type: str, task: Task, previous_assignee: Optional[int] = None):
+    await publish_event(
+        event_type,
+        task.project_id, # type: ignore
+        task=TaskResponse.model_validate(task, from_attributes=True).model_dump(mode="json"),
+        assignee_user_id=task.assignee_user_id,
+        previous_assignee_user_id=previous_assignee if previous_assignee != task.assignee_user_id else None,
+    )
+
+async def load_tasks(db: AsyncSession, task_ids) -> dict:
+    # One round-trip reload; populate_existing picks up server-side created_at/updated_at values
+    if not task_ids:
+        return {}
+    result = await db.execute(select(Task).where(Task.id.in_(task_ids)).execution_options(populate_existing=True))
+    return {task.id: task for task in result.scalars()}
+
+async def existing_user_ids(db: AsyncSession, user_ids) -> set:
+    if not user_ids:
+        return set()
+    return set((await db.execute(select(User.id).where(User.id.in_(user_ids)))).scalars())
+
+@router.post("/projects/{project_id}/tasks/batch", response_model=List[TaskBatchResult])
+async def create_tasks_batch(project_id: int, batch: TaskBatchCreate, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    project = await get_live_project(db, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    assignee_ids = {task.assignee_user_id or current_user.id for task in batch.items}
+    known_users = await existing_user_ids(db, assignee_ids)
+    
+    results = []
+    created = {}
+    for index, task in enumerate(batch.items):
+        if task.assignee_user_id and current_user.role != "admin": # type: ignore
+            results.append({"index": index, "status_code": 403, "detail": "Only admins can assign to others"})
+            continue
+        assignee_id = task.assignee_user_id or current_user.id
+        if assignee_id not in known_users:
+            results.append({"index": index, "status_code": 404, "detail": "Assignee not found"})
+            continue
+        db_task = Task(project_id=project_id, **task.dict(exclude={"assignee_user_id"}), assignee_user_id=assignee_id, version=1)
+        db.add(db_task)
+        created[index] = db_task
+        results.append({"index": index, "status_code": 201})
+    
+    await apply_task_changes(db, [(None, task_key(db_task)) for db_task in created.values()])
+    await db.commit()
+    loaded = await load_tasks(db, [db_task.id for db_task in created.values()])
+    for result in results:
+        if result["index"] in created:
+            result["task"] = loaded[created[result["index"]].id]
+            search.task_changed(result["task"])
+            await publish_task_event("task.created", result["task"])
+    await project_listings.invalidate(*{db_task.assignee_user_id for db_task in created.values()})
+    logger.info("Batch created %s/%s tasks in project %s", len(created), len(batch.items), project_id)
+    return results
+
+@router.get("/projects/{project_id}/tasks/export")
+async def export_project_tasks(project_id: int, request: Request, format: Literal["ndjson", "csv"] = Query("ndjson"),
+                               status: Optional[Literal["todo", "in_progress", "done"]] = Query(None), fields: Optional[str] = Query(None),
+                               include_archived: bool = Query(False), current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_read_db)):
+    project = await get_live_project(db, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    member_id = current_user.id if current_user.role == "member" else None # type: ignore
+    source = task_source(include_archived)
+    columns = select_fields(fields, task_columns(source))
+    query = task_list_query(project_id, member_id, status, None, columns, source) # type: ignore
+    logger.info("Exporting tasks of project %s as %s", project_id, format)
+    return StreamingResponse(
+        export_rows(read_session_factory(request), query, [column.key for column in columns], format, source.id),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="project-{project_id}-tasks.{format}"'},
+    )
+
+# The body is read as it arrives: NDJSON (one TaskCreate object per line) or CSV with a header row.
+# Extra fields, such as those of an export, are ignored.
+@router.post("/projects/{project_id}/tasks/import")
+async def import_project_tasks(project_id: int, request: Request, format: Optional[Literal["ndjson", "csv"]] = Query(None),
+                               current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    project = await get_live_project(db, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    if format is None:
+        format = "csv" if request.headers.get("content-type", "").startswith("text/csv") else "ndjson"
+    task_import = TaskImport(db, project_id, current_user)
+    try:
+        await task_import.run(request.stream(), format)
+    finally:
+        if task_import.imported:
+            search.invalidate()
+            await project_listings.invalidate(*task_import.assignees)
+            await publish_event("tasks.imported", project_id, count=task_import.imported)
+    summary = task_import.summary()
+    logger.info("Imported %s/%s tasks into project %s in %.1fs (%s rows/s)",
+                summary["imported"], summary["lines"], project_id, summary["seconds"], summary["rows_per_second"])
+    return summary
+
+@router.patch("/tasks/batch", response_model=List[TaskBatchResult])
+async def update_tasks_batch(batch: TaskBatchUpdate, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    # Lock every targeted row up front so the per-item version checks hold until commit. Tasks of
+    # a deleted project are left out, so they answer 404.
+    task_ids = {item.id for item in batch.items}
+    locked = await db.execute(select(Task).where(Task.id.in_(task_ids), in_live_project()).with_for_update())
+    tasks = {task.id: task for task in locked.scalars()}
+    known_users = await existing_user_ids(db, {item.assignee_user_id for item in batch.items if item.assignee_user_id})
+    
+    results = []
+    updated = set()
+    before = {task.id: task_key(task) for task in tasks.values()}
+    for index, item in enumerate(batch.items):
+        db_task = tasks.get(item.id)
+        if not db_task:
+            results.append({"index": index, "status_code": 404, "detail": "Task not found"})
+            continue
+        if current_user.role == "member" and db_task.assignee_user_id != current_user.id: # type: ignore
+            results.append({"index": index, "status_code": 403, "detail": "Can only update own tasks"})
+            continue
+        if item.assignee_user_id and current_user.role != "admin": # type: ignore
+            results.append({"index": index, "status_code": 403, "detail": "Only admins can reassign tasks"})
+            continue
+        if item.assignee_user_id and item.assignee_user_id not in known_users:
+            results.append({"index": index, "status_code": 404, "detail": "Assignee not found"})
+            continue
+        if item.version is None or item.version != db_task.version:
+            results.append({"index": index, "status_code": 409, "detail": "Stale version - conflict detected"})
+            continue
+        for key, value in item.dict(exclude_unset=True).items():
+            if key not in ("id", "version"):
+                setattr(db_task, key, value)
+        db_task.version += 1 # type: ignore
+        db_task.updated_at = func.now() # type: ignore
+        updated.add(db_task.id)
+        results.append({"index": index, "status_code": 200})
+    
+    await apply_task_changes(db, [(before[task_id], task_key(tasks[task_id])) for task_id in updated])
+    await db.commit()
+    loaded = await load_tasks(db, updated)
+    for result, item in zip(results, batch.items):
+        if result["status_code"] == 200:
+            result["task"] = loaded[item.id]
+    reassigned = {task_id for task_id in updated if before[task_id][2] != loaded[task_id].assignee_user_id}
+    await project_listings.invalidate(*{before[task_id][2] for task_id in reassigned}, *{loaded[task_id].assignee_user_id for task_id in reassigned})
+    for task_id in updated:
+        search.task_changed(loaded[task_id])
+        await publish_task_event("task.updated", loaded[task_id], before[task_id][2])
+    logger.info("Batch updated %s/%s tasks", len(updated), len(batch.items))
+    return results
+
+@router.patch("/tasks/{task_id}", response_model=TaskResponse)
+async def update_task(task_id: int, task_update: TaskUpdate, if_match: Optional[str] = Header(None), current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    reassigning = bool(task_update.assignee_user_id) and current_user.role != "admin" # type: ignore
+    client_version = task_update.version or if_match_version(if_match)
+    
+    # Optimistic locking: one conditional UPDATE checks the version and writes atomically,
+    # so there is no window between the check and the write
+    if client_version is not None and not reassigning:
+        values = {key: value for key, value in task_update.dict(exclude_unset=True).items() if key != "version"}
+        stmt = update(Task).where(Task.id == task_id, Task.version == client_version, in_live_project())
+        if current_user.role == "member": # type: ignore
+            stmt = stmt.where(Task.assignee_user_id == current_user.id)
+        stmt = stmt.values(**values, version=Task.version + 1, updated_at=func.now()).execution_options(synchronize_session=False)
+        # Changes to counted columns need the row as it was, for the stats counters and for the
+        # change feed to drop a reassigned task from the old assignee's board. The row is locked
+        # and must already be at client_version, so it can't change before the UPDATE below.
+        before = None
+        if STAT_FIELDS.intersection(values):
+            before = (await db.execute(
+                select(Task.project_id, Task.status, Task.assignee_user_id, Task.due_date, Task.version)
+                .where(Task.id == task_id, in_live_project()).with_for_update()
+            )).first()
+        if before is not None and before.version != client_version:
+            db_task = None
+        elif db.get_bind().dialect.update_returning:
+            db_task = (await db.execute(stmt.returning(Task), execution_options={"populate_existing": True})).scalars().first()
+        else:
+            # MySQL has no UPDATE ... RETURNING: the rowcount tells us whether the version matched
+            result = await db.execute(stmt)
+            db_task = await db.get(Task, task_id, populate_existing=True) if result.rowcount == 1 else None # type: ignore
+        if db_task is not None:
+            if before is not None:
+                await apply_task_changes(db, [(task_key(before), task_key(db_task))])
+            await db.commit()
+            search.task_changed(db_task)
+            if before is not None and before.assignee_user_id != db_task.assignee_user_id:
+                await project_listings.invalidate(before.assignee_user_id, db_task.assignee_user_id)
+            await publish_task_event("task.updated", db_task, before.assignee_user_id if before is not None else None)
+            return db_task
+    
+    # Nothing was written: report why, checking in the same order as before
+    db_task = await db.get(Task, task_id)
     if not db_task:
+        if await db.get(ArchivedTask, task_id):
+            raise HTTPException(status_code=409, detail="Task is archived - restore it first")
+        raise HTTPException(status_code=404, detail="Task not found")
+    if not await get_live_project(db, db_task.project_id): # type: ignore
         raise HTTPException(status_code=404, detail="Task not found")
-    
     if current_user.role == "member" and db_task.assignee_user_id != current_user.id: # type: ignore
         raise HTTPException(status_code=403, detail="Can only update own tasks")
-    
-    if task_update.assignee_user_id and current_user.role != "admin": # type: ignore
+    if reassigning:
         raise HTTPException(status_code=403, detail="Only admins can reassign tasks")
-    
-    # Optimistic locking
-    client_version = task_update.version or (int(if_match) if if_match else None)
-    if client_version is None or client_version != db_task.version:
-        raise HTTPException(status_code=409, detail="Stale version - conflict detected")
-    
-    for key, value in task_update.dict(exclude_unset=True).items():
-        if key != "version":
-            setattr(db_task, key, value)
-    db_task.version += 1 # type: ignore
-    db_task.updated_at = func.now() # type: ignore
-    db.commit()
-    db.refresh(db_task)
+    raise HTTPException(status_code=409, detail="Stale version - conflict detected")
+
+@router.post("/tasks/{task_id}/restore", response_model=TaskResponse)
+async def restore_archived_task(task_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    archived = await db.get(ArchivedTask, task_id)
+    if not archived or not await get_live_project(db, archived.project_id): # type: ignore
+        raise HTTPException(status_code=404, detail="Archived task not found")
+    if current_user.role == "member" and archived.assignee_user_id != current_user.id: # type: ignore
+        raise HTTPException(status_code=403, detail="Can only restore own tasks")
+    try:
+        db_task = await restore_task(db, task_id)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Another task already has this task's id")
+    if db_task is None:
+        raise HTTPException(status_code=404, detail="Archived task not found")
+    await db.commit()
+    search.task_changed(db_task)
+    await project_listings.invalidate(db_task.assignee_user_id)
+    await publish_task_event("task.created", db_task)
     return db_task
 
-@app.get("/health")
-def health_check(db: Session = Depends(get_db)):
+@router.get("/projects/{project_id}/stats", response_model=ProjectStatsResponse)
+async def get_project_stats(project_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    project = await get_live_project(db, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if current_user.role == "member" and not await member_has_access(db, project_id, current_user.id): # type: ignore
+        raise HTTPException(status_code=403, detail="Access denied")
+    # Read from the counters maintained by the task write paths, never by scanning tasks;
+    # members only see counts for their own tasks, as in the task listing
+    member_id = current_user.id if current_user.role == "member" else None # type: ignore
+    return await project_stats(db, project_id, member_id) # type: ignore
+
+FEED_HEARTBEAT_SECONDS = 15
+
+# Browsers can't set headers on EventSource or WebSocket connections, and a JWT in the URL ends up
+# in proxy logs and browser history. Clients trade their token for a feed ticket instead: signed,
+# bound to one project, valid for FEED_TICKET_SECONDS and redeemable once (per worker; across
+# workers the short expiry bounds any replay).
+@router.post("/projects/{project_id}/events/ticket")
+async def create_feed_ticket(project_id: int, current_user: User = Depends(get_current_user), settings: Settings = Depends(app_settings)):
+    ticket = create_access_token({"sub": current_user.email, "scope": "feed", "project_id": project_id, "jti": secrets.token_urlsafe(16)},
+                                 timedelta(seconds=FEED_TICKET_SECONDS), settings)
+    return {"ticket": ticket, "expires_in": FEED_TICKET_SECONDS}
+
+def redeem_feed_ticket(ticket: str, project_id: int, settings: Settings):
+    invalid = HTTPException(status_code=401, detail="Invalid or used feed ticket")
+    try:
+        claims = jwt.decode(ticket, settings.secret_key, algorithms=[ALGORITHM]) # type: ignore
+    except JWTError:
+        raise invalid
+    jti = claims.get("jti")
+    if claims.get("scope") != "feed" or claims.get("project_id") != project_id or not jti or redeemed_feed_tickets.get(jti):
+        raise invalid
+    redeemed_feed_tickets.set(jti, True)
+
+async def open_feed(project_id: int, token: Optional[str], ticket: Optional[str], last_event_id: Optional[int], settings: Settings):
+    if ticket:
+        redeem_feed_ticket(ticket, project_id, settings)
+    # A short-lived session: feed connections stay open for hours and must not pin a pooled connection
+    async with AsyncSessionLocal() as db:
+        user = await authenticate(ticket or token, db, settings, scope="feed" if ticket else None)
+        project = await get_live_project(db, project_id)
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        if user.role == "member" and not await member_has_access(db, project_id, user.id): # type: ignore
+            raise HTTPException(status_code=403, detail="Access denied")
+    return await feed.subscribe(project_id, user.id if user.role == "member" else None, last_event_id) # type: ignore
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    if authorization and authorization.lower().startswith("bearer "):
+        return authorization[7:]
+    return None
+
+# Server-Sent Events, authenticated by ?ticket= (browsers) or the Authorization header (other
+# clients). A ticket is single use, so browsers reconnect with a new one and ?since= themselves
+@router.get("/projects/{project_id}/events")
+async def project_events(project_id: int, request: Request, ticket: Optional[str] = Query(None), since: Optional[int] = Query(None), last_event_id: Optional[int] = Header(None), authorization: Optional[str] = Header(None)):
+    subscription = await open_feed(project_id, bearer_token(authorization), ticket, last_event_id if last_event_id is not None else since, app_settings(request))
+
+    async def stream():
+        try:
+            yield "retry: 2000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await subscription.next_event(FEED_HEARTBEAT_SECONDS)
+                except FeedOverflow:
+                    yield f"data: {json.dumps({'type': 'overflow'})}\n\n"
+                    break
+                if event is None:
+                    yield ": heartbeat\n\n"
+                else:
+                    yield f"id: {event['id']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            feed.unsubscribe(subscription)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.websocket("/projects/{project_id}/feed")
+async def project_feed(websocket: WebSocket, project_id: int, ticket: Optional[str] = Query(None), since: Optional[int] = Query(None)):
+    await websocket.accept()
+    try:
+        subscription = await open_feed(project_id, None, ticket, since, app_settings(websocket))
+    except HTTPException as exc:
+        await websocket.close(code=4000 + exc.status_code, reason=str(exc.detail))
+        return
+    try:
+        while True:
+            try:
+                event = await subscription.next_event(FEED_HEARTBEAT_SECONDS)
+            except FeedOverflow:
+                # Client reconnects with ?since=<last id it saw>
+                await websocket.close(code=4429, reason="Feed overflow, reconnect with since")
+                break
+            await websocket.send_json(event if event is not None else {"type": "heartbeat"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        feed.unsubscribe(subscription)
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    if current_user.role != "admin": # type: ignore
+        raise HTTPException(status_code=403, detail="Admin only")
+    job = await db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/health")
+async def health_check(db: AsyncSession = Depends(get_async_db)):
     return {"status": "OK"}
 
-@app.get("/protected")
+@router.get("/ready")
+async def readiness_check(response: Response):
+    databases = {"primary": await check_database(database.async_engine)}
+    if database.replica_async_engine is not database.async_engine:
+        databases["replica"] = await check_database(database.replica_async_engine)
+    ready = all(check["ok"] for check in databases.values())
+    if not ready:
+        response.status_code = 503
+    return {"status": "ready" if ready else "not ready", "databases": databases}
+
+@router.get("/admin/cache-stats")
+async def get_cache_stats(current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin": # type: ignore
+        raise HTTPException(status_code=403, detail="Admin only")
+    return {**cache_stats(), "project_listings": project_listings.stats()}
+
+@router.get("/admin/profiles")
+async def list_profiles(
+    kind: Optional[Literal["profile", "slow_query"]] = None,
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_user),
+):
+    if current_user.role != "admin": # type: ignore
+        raise HTTPException(status_code=403, detail="Admin only")
+    return await asyncio.to_thread(profiling.store.list, kind, limit)
+
+@router.get("/admin/profiles/{profile_id}")
+async def get_profile(profile_id: str, current_user: User = Depends(get_current_user)):
+    if current_user.role != "admin": # type: ignore
+        raise HTTPException(status_code=403, detail="Admin only")
+    record = await asyncio.to_thread(profiling.store.get, profile_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return record
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    if metrics.METRICS_TOKEN and authorization != f"Bearer {metrics.METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/protected")
 async def protected_route(current_user: User = Depends(get_current_user)):
-    return {"message": "Protected data", "user_role": current_user.role}
\ No newline at end of file
+    return {"message": "Protected data", "user_role": current_user.role}
+
+def __getattr__(name: str):
+    # `app.main:app` (uvicorn, tests, benches) gets an app built on first use, so importing this
+    # module, as the --factory launcher does, builds nothing
+    if name == "app":
+        globals()["app"] = create_app()
+        return globals()["app"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,267 @@
+import bisect
+import contextvars
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Prometheus text-format metrics without a client library. Everything is updated from the event
+# loop thread (SQLAlchemy runs async-engine events there too), so plain dicts need no locks.
+# Each worker process keeps its own values; with METRICS_DIR set, workers also write snapshots
+# there and whichever worker serves /metrics adds up the snapshots of all live workers.
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", 10))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # If set, /metrics requires "Authorization: Bearer <token>"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values: Dict[Tuple, object] = {}
+
+    def snapshot(self) -> dict:
+        return {"kind": self.kind, "help": self.help, "labels": self.labels, "values": [[list(key), value] for key, value in self.values.items()]}
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount # type: ignore
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), collect: Optional[Callable[[], Dict[Tuple, float]]] = None):
+        super().__init__(name, help, labels)
+        self.collect = collect  # Read at scrape time instead of being updated inline
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount # type: ignore
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def snapshot(self) -> dict:
+        if self.collect is not None:
+            self.values = dict(self.collect())
+        return super().snapshot()
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        # [per-bucket counts (last one is +Inf), sum]; made cumulative only when rendered
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1 # type: ignore
+        entry[1] += value # type: ignore
+
+    def snapshot(self) -> dict:
+        return {**super().snapshot(), "buckets": self.buckets}
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self._last_flush = 0.0
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def snapshot(self) -> dict:
+        return {metric.name: metric.snapshot() for metric in self.metrics}
+
+    def _snapshot_path(self, pid: int) -> str:
+        return os.path.join(METRICS_DIR, f"worker-{pid}.json") # type: ignore
+
+    def flush(self, force: bool = False):
+        """Writes this worker's snapshot to METRICS_DIR, at most every METRICS_FLUSH_SECONDS."""
+        now = time.monotonic()
+        if not METRICS_DIR or (not force and now - self._last_flush < METRICS_FLUSH_SECONDS):
+            return
+        self._last_flush = now
+        try:
+            os.makedirs(METRICS_DIR, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=METRICS_DIR, suffix=".tmp")
+            with os.fdopen(fd, "w") as out:
+                json.dump(self.snapshot(), out, separators=(",", ":"))
+            os.replace(tmp_path, self._snapshot_path(os.getpid()))
+        except OSError:
+            logger.exception("Could not write metrics snapshot to %s", METRICS_DIR)
+
+    def collect_all(self) -> List[dict]:
+        """This worker's live snapshot plus the latest snapshot of every other live worker."""
+        snapshots = [self.snapshot()]
+        if not METRICS_DIR or not os.path.isdir(METRICS_DIR):
+            return snapshots
+        self.flush(force=True)
+        for filename in os.listdir(METRICS_DIR):
+            match = re.fullmatch(r"worker-(\d+)\.json", filename)
+            if not match or int(match.group(1)) == os.getpid():
+                continue
+            pid = int(match.group(1))
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                # Worker is gone; Prometheus treats its counters disappearing as a reset
+                os.remove(os.path.join(METRICS_DIR, filename))
+                continue
+            except PermissionError:
+                pass
+            try:
+                with open(os.path.join(METRICS_DIR, filename)) as snapshot:
+                    snapshots.append(json.load(snapshot))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render(self) -> str:
+        return render(merge(self.collect_all()))
+
+def merge(snapshots: List[dict]) -> dict:
+    merged: dict = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.setdefault(name, {**metric, "values": {}})
+            for labels, value in metric["values"]:
+                key = tuple(labels)
+                current = target["values"].get(key)
+                if current is None:
+                    target["values"][key] = value if metric["kind"] != "histogram" else [list(value[0]), value[1]]
+                elif metric["kind"] == "histogram":
+                    current[0] = [a + b for a, b in zip(current[0], value[0])]
+                    current[1] += value[1]
+                else:
+                    target["values"][key] = current + value
+    return merged
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def render(merged: dict) -> str:
+    lines = []
+    for name, metric in merged.items():
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        for key, value in sorted(metric["values"].items()):
+            if metric["kind"] != "histogram":
+                lines.append(f"{name}{_labels(metric['labels'], key)} {value}")
+                continue
+            counts, total = value
+            cumulative = 0
+            for bound, count in zip(list(metric["buckets"]) + ["+Inf"], counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{name}_bucket{_labels(metric['labels'], key, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(metric['labels'], key)} {total}")
+            lines.append(f"{name}_count{_labels(metric['labels'], key)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+http_requests_in_flight = registry.register(Gauge("http_requests_in_flight", "Requests currently being handled by this worker"))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Request latency from the first middleware to the response", ("method", "route", "status")))
+db_queries_per_request = registry.register(Histogram(
+    "db_queries_per_request", "SQL statements executed while handling one request", ("method", "route"), buckets=COUNT_BUCKETS))
+db_time_per_request = registry.register(Histogram(
+    "db_time_per_request_seconds", "Time spent in SQL statements while handling one request", ("method", "route")))
+db_query_duration = registry.register(Histogram("db_query_duration_seconds", "Latency of single SQL statements", ("operation",)))
+db_pool_checkout_wait = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time to get a connection from the pool, including opening a new one", ("engine",)))
+
+# Per-request DB accounting: the middleware puts a [queries, seconds] list here, the engine hooks add to it
+request_db_stats: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("request_db_stats", default=None)
+
+_instrumented: List[Tuple[str, Engine]] = []
+
+OPERATION = re.compile(r"\s*(\w+)")
+OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+def _statement_operation(statement: str) -> str:
+    match = OPERATION.match(statement)
+    operation = match.group(1).upper() if match else ""
+    return operation if operation in OPERATIONS else "OTHER"
+
+def _time_pool_checkouts(engine: Engine, label: str):
+    # The pool has no "checkout requested" event, so wrap its connect(); re-wrapped after dispose() replaces the pool
+    pool = engine.pool
+    connect = pool.connect
+
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - start, label)
+
+    pool.connect = timed_connect # type: ignore
+
+def instrument_engine(engine: Engine, label: str):
+    """Adds statement timing, per-request query accounting and pool wait timing to a (sync) Engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_start
+        db_query_duration.observe(elapsed, _statement_operation(statement))
+        stats = request_db_stats.get()
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += elapsed
+
+    @event.listens_for(engine, "engine_disposed")
+    def engine_disposed(engine):
+        _time_pool_checkouts(engine, label)
+
+    _time_pool_checkouts(engine, label)
+    # An engine replaced under the same label (see db.open_engines) stops being reported
+    _instrumented[:] = [entry for entry in _instrumented if entry[0] != label]
+    _instrumented.append((label, engine))
+
+def _pool_connections() -> Dict[Tuple, float]:
+    values = {}
+    for label, engine in _instrumented:
+        pool = engine.pool
+        # StaticPool / NullPool (SQLite in-memory, tests) have no size accounting
+        if hasattr(pool, "checkedout"):
+            values[(label, "checked_out")] = pool.checkedout()
+            values[(label, "idle")] = pool.checkedin()
+            values[(label, "size")] = pool.size()
+    return values
+
+db_pool_connections = registry.register(Gauge(
+    "db_pool_connections", "Pool connections by state, read at scrape time", ("engine", "state"), collect=_pool_connections))
+
+def observe_request(method: str, route: str, status: int, seconds: float, stats: list):
+    http_request_duration.observe(seconds, method, route, str(status))
+    db_queries_per_request.observe(stats[0], method, route)
+    db_time_per_request.observe(stats[1], method, route)
+    registry.flush()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, DateTime, Enum, Index
 from sqlalchemy.sql import func
 from .db import Base
 
@@ -17,6 +17,9 @@ class Project(Base):
     name = Column(String(255), nullable=False)
     description = Column(String(1024))
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    version = Column(Integer, default=1, server_default="1", nullable=False)  # Bumped on every update; feeds ETags
+    # Set by DELETE /projects/{id}: the project is gone for the API while a delete_project job purges its tasks
+    deleted_at = Column(DateTime(timezone=True))
 
 class Task(Base):
     __tablename__ = "tasks"
@@ -29,3 +32,94 @@ class Task(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     version = Column(Integer, default=1, nullable=False)
+
+    __table_args__ = (
+        # Each index also ends in the primary key, so keyset pages come back in id order without a sort.
+        # Admin task listing, unfiltered
+        Index("ix_tasks_project_id", "project_id"),
+        # Admin task listing filtered by status
+        Index("ix_tasks_project_status", "project_id", "status"),
+        # Member project listing, member access check, and task listings scoped to one assignee
+        Index("ix_tasks_assignee_project", "assignee_user_id", "project_id"),
+        # Member task listing filtered by status
+        Index("ix_tasks_assignee_project_status", "assignee_user_id", "project_id", "status"),
+        # Ids are never reused, even once the highest ones have been archived or deleted: restoring
+        # an archived task puts it back under its own id. SQLite needs AUTOINCREMENT for that;
+        # MySQL 8 keeps the counter across restarts
+        {"sqlite_autoincrement": True},
+    )
+
+# Done tasks moved out of `tasks` by app.archive once they have been done for a while, so the live
+# table and its indexes only hold the working set. Rows keep their id and version; a restore moves
+# the row back. Columns match Task's, so queries.task_source can UNION the two.
+class ArchivedTask(Base):
+    __tablename__ = "archived_tasks"
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    title = Column(String(255), nullable=False)
+    status = Column(Enum("todo", "in_progress", "done", name="task_status"), nullable=False)
+    assignee_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    due_date = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True))
+    version = Column(Integer, nullable=False)
+    archived_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_archived_tasks_project_id", "project_id"),
+        Index("ix_archived_tasks_assignee_project", "assignee_user_id", "project_id"),
+    )
+
+# Per-project task counters, kept current by the task write paths in the same transaction.
+# `python -m app.stats rebuild` recomputes them from `tasks` if they drift.
+class ProjectTaskCount(Base):
+    __tablename__ = "project_task_counts"
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+    status = Column(Enum("todo", "in_progress", "done", name="task_status"), primary_key=True)
+    assignee_user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
+
+# Open (not done) tasks bucketed by due day, so overdue counts need no scan of `tasks`
+class ProjectDueCount(Base):
+    __tablename__ = "project_due_counts"
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+    assignee_user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    due_day = Column(Date, primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
+
+# One row per bulk_seed run: the id ranges it owns, so a rerun with the same run_id resumes or no-ops
+class SeedRun(Base):
+    __tablename__ = "seed_runs"
+    run_id = Column(String(64), primary_key=True)
+    params = Column(String(1024), nullable=False)  # JSON of the generator arguments
+    first_user_id = Column(Integer, nullable=False)
+    first_project_id = Column(Integer, nullable=False)
+    first_task_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    completed_at = Column(DateTime(timezone=True))
+
+# Background jobs (app.jobs). A running job holds a lease: if its worker dies, another claims it once
+# lease_until passes and resumes from what the committed batches left. Queued jobs retried after an
+# error wait until lease_until as well.
+class Job(Base):
+    __tablename__ = "jobs"
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(64), nullable=False)
+    target_id = Column(Integer, nullable=False)  # No foreign key: e.g. a delete_project job outlives its project
+    status = Column(Enum("queued", "running", "done", "failed", name="job_status"), default="queued", nullable=False)
+    progress = Column(Integer, default=0, nullable=False)  # Rows processed so far
+    attempts = Column(Integer, default=0, nullable=False)
+    error = Column(String(1024))
+    created_by = Column(Integer, ForeignKey("users.id"))
+    locked_by = Column(String(64))
+    lease_until = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # Claiming scans the open jobs in id order
+        Index("ix_jobs_status", "status", "id"),
+        # One open job per kind and target
+        Index("ix_jobs_kind_target", "kind", "target_id"),
+    )
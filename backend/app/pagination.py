@@ -0,0 +1,38 @@
+import base64
+import os
+from typing import Optional
+from fastapi import HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", 100))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 500))
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    try:
+        return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_page(query, id_column, limit: int, after_id: Optional[int] = None):
+    # Keyset pagination on the primary key: each page is an index range scan, however deep it is.
+    # One extra row is fetched to know whether another page exists.
+    if after_id is not None:
+        query = query.where(id_column > after_id)
+    return query.order_by(id_column).limit(limit + 1)
+
+async def paginate(db: AsyncSession, query, id_column, limit: int, cursor: Optional[str], response: Response) -> list:
+    query = keyset_page(query, id_column, limit, decode_cursor(cursor))
+    result = await db.execute(query)
+    # A select of one ORM entity gives its objects; column selects give Rows
+    described = query.column_descriptions
+    rows = result.scalars().all() if len(described) == 1 and described[0]["expr"] is described[0]["entity"] else result.all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].id)
+    return rows
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+# bcrypt cost factor; hashes made with any other cost are upgraded on the next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_POOL = os.getenv("PASSWORD_POOL", "thread")  # "thread" or "process"
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", 2))
+PASSWORD_MAX_PENDING = int(os.getenv("PASSWORD_MAX_PENDING", 64))
+PASSWORD_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_QUEUE_TIMEOUT", 5))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+_executor: Optional[Executor] = None
+_slots: Optional[asyncio.Semaphore] = None
+_pending = 0
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed_password)
+
+def get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if PASSWORD_POOL == "process":
+            _executor = ProcessPoolExecutor(max_workers=PASSWORD_WORKERS)
+        else:
+            # bcrypt releases the GIL while hashing, so threads run in parallel
+            _executor = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="bcrypt")
+    return _executor
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+async def _run(func, *args):
+    # At most PASSWORD_WORKERS jobs run at once; callers beyond PASSWORD_MAX_PENDING, or waiting
+    # longer than PASSWORD_QUEUE_TIMEOUT for a slot, get a 503 instead of piling up
+    global _slots, _pending
+    if _slots is None:
+        _slots = asyncio.Semaphore(PASSWORD_WORKERS)
+    if _pending >= PASSWORD_MAX_PENDING:
+        logger.warning("Password hashing queue full (%s pending)", _pending)
+        raise HTTPException(status_code=503, detail="Authentication is busy, retry shortly", headers={"Retry-After": "1"})
+    _pending += 1
+    try:
+        try:
+            await asyncio.wait_for(_slots.acquire(), timeout=PASSWORD_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("Timed out waiting %.1fs for a password hashing slot", PASSWORD_QUEUE_TIMEOUT)
+            raise HTTPException(status_code=503, detail="Authentication is busy, retry shortly", headers={"Retry-After": "1"})
+        try:
+            return await asyncio.get_running_loop().run_in_executor(get_executor(), func, *args)
+        finally:
+            _slots.release()
+    finally:
+        _pending -= 1
+
+async def hash_password(password: str) -> str:
+    return await _run(_hash, password)
+
+async def verify_and_update_password(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Returns (matches, new_hash); new_hash is set when the stored hash uses an outdated cost factor."""
+    return await _run(_verify_and_update, password, hashed_password)
@@ -0,0 +1,236 @@
+import asyncio
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import tempfile
+import time
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# Opt-in request profiling. A request is profiled when an admin sends PROFILE_HEADER, or at
+# random with probability PROFILE_SAMPLE_RATE. A profiled request records a cProfile call-stack
+# profile and every SQL statement it ran with its timing. Independently, any statement slower than
+# SLOW_QUERY_MS is logged with its parameter shapes (types and sizes, never values) and an EXPLAIN.
+# Both kinds of record go to PROFILE_DIR, which keeps only the newest PROFILE_MAX_ENTRIES files.
+PROFILE_HEADER = "X-Profile"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "novavantix_profiles"))
+PROFILE_MAX_ENTRIES = int(os.getenv("PROFILE_MAX_ENTRIES", 200))
+PROFILE_TOP_FUNCTIONS = int(os.getenv("PROFILE_TOP_FUNCTIONS", 40))
+PROFILE_MAX_STATEMENTS = 500
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 200))
+EXPLAIN_INTERVAL_SECONDS = 60  # The same slow statement is explained at most this often
+
+ENTRY_ID = re.compile(r"^\d+-\d+-(profile|slow_query)$")
+
+class ProfileStore:
+    """Ring buffer of JSON records, one file each; writing past max_entries removes the oldest."""
+
+    def __init__(self, directory: str, max_entries: int):
+        self.directory = directory
+        self.max_entries = max_entries
+
+    def write(self, kind: str, record: dict) -> str:
+        entry_id = f"{time.time_ns()}-{os.getpid()}-{kind}"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as out:
+                json.dump({"id": entry_id, "kind": kind, **record}, out, default=str)
+            os.replace(tmp_path, os.path.join(self.directory, f"{entry_id}.json"))
+            for old in self._entry_ids()[:-self.max_entries]:
+                os.remove(os.path.join(self.directory, f"{old}.json"))
+        except OSError:
+            logger.exception("Could not write %s record to %s", kind, self.directory)
+        return entry_id
+
+    def _entry_ids(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        ids = [name[:-5] for name in os.listdir(self.directory) if name.endswith(".json") and ENTRY_ID.match(name[:-5])]
+        return sorted(ids, key=lambda entry_id: int(entry_id.split("-", 1)[0]))
+
+    def list(self, kind: Optional[str] = None, limit: int = 50) -> List[dict]:
+        """Summaries of the newest records, newest first."""
+        summaries = []
+        for entry_id in reversed(self._entry_ids()):
+            if kind and not entry_id.endswith(kind):
+                continue
+            record = self.get(entry_id)
+            if record is None:
+                continue
+            summaries.append({key: value for key, value in record.items() if key not in ("profile", "statements", "explain")})
+            if len(summaries) >= limit:
+                break
+        return summaries
+
+    def get(self, entry_id: str) -> Optional[dict]:
+        if not ENTRY_ID.match(entry_id):
+            return None
+        try:
+            with open(os.path.join(self.directory, f"{entry_id}.json")) as record:
+                return json.load(record)
+        except (OSError, ValueError):
+            return None
+
+store = ProfileStore(PROFILE_DIR, PROFILE_MAX_ENTRIES)
+
+class RequestProfile:
+    def __init__(self, reason: str):
+        self.reason = reason
+        self.statements: List[dict] = []
+        self.dropped_statements = 0
+        self.profiler: Optional[cProfile.Profile] = None
+
+# Set by the middleware for profiled requests only; the engine hooks append statements to it
+current_profile: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar("current_profile", default=None)
+
+# cProfile hooks the whole thread, so only one request at a time gets a call-stack profile;
+# concurrent profiled requests still record their SQL
+_profiler_busy = False
+
+def should_sample() -> bool:
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+def start(reason: str) -> RequestProfile:
+    global _profiler_busy
+    profile = RequestProfile(reason)
+    if not _profiler_busy:
+        _profiler_busy = True
+        profile.profiler = cProfile.Profile()
+        profile.profiler.enable()
+    current_profile.set(profile)
+    return profile
+
+def _format_profile(profiler: cProfile.Profile) -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+    return out.getvalue()
+
+def finish(profile: RequestProfile, method: str, path: str, route: str, status: int, seconds: float) -> dict:
+    """Stops the profiler and builds the record, for save_in_background()."""
+    global _profiler_busy
+    text = None
+    if profile.profiler is not None:
+        profile.profiler.disable()
+        _profiler_busy = False
+        text = _format_profile(profile.profiler)
+    return {
+        "time": datetime.utcnow().isoformat(), "reason": profile.reason, "method": method, "path": path, "route": route,
+        "status": status, "duration_ms": round(seconds * 1000, 2),
+        "sql_count": len(profile.statements) + profile.dropped_statements,
+        "sql_ms": round(sum(statement["ms"] for statement in profile.statements), 2),
+        "dropped_statements": profile.dropped_statements, "statements": profile.statements,
+        # Covers everything this worker ran meanwhile, including other concurrent requests
+        "profile": text if text is not None else "skipped: another request was being profiled",
+    }
+
+async def save(kind: str, record: dict) -> str:
+    return await asyncio.to_thread(store.write, kind, record)
+
+_save_tasks: set = set()  # The loop only keeps weak references to tasks
+
+def save_in_background(kind: str, record: dict, description: str):
+    """Saves the record without holding up the caller (a response on its way out), then logs
+    where to find it."""
+    async def save_and_log():
+        try:
+            record_id = await save(kind, record)
+        except Exception:
+            logger.exception("Could not save %s %s", kind, description)
+            return
+        logger.info("Saved %s of %s: /admin/profiles/%s", kind, description, record_id)
+    task = asyncio.get_running_loop().create_task(save_and_log())
+    _save_tasks.add(task)
+    task.add_done_callback(_save_tasks.discard)
+
+def _value_shape(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, (str, bytes, list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+def parameter_shapes(parameters, executemany: bool):
+    """Types and sizes of the bound parameters, so records never contain user data."""
+    if executemany:
+        rows = list(parameters)
+        return {"rows": len(rows), "first": parameter_shapes(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: _value_shape(value) for key, value in parameters.items()}
+    return [_value_shape(value) for value in parameters or ()]
+
+EXPLAINABLE = re.compile(r"\s*(SELECT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+_last_explained: dict = {}
+_explain_tasks: set = set()  # The loop only keeps weak references to tasks
+
+def _explain_prefix(dialect: str) -> str:
+    return "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+
+async def _explain_and_save(engine: AsyncEngine, record: dict, statement: str, parameters):
+    try:
+        async with engine.connect() as conn:
+            result = await conn.exec_driver_sql(_explain_prefix(engine.dialect.name) + statement, parameters)
+            columns = list(result.keys())
+            record["explain"] = [dict(zip(columns, row)) for row in result.all()]
+            await conn.rollback()
+    except Exception as exc:  # Explaining is best effort; the statement itself already ran
+        record["explain_error"] = f"{type(exc).__name__}: {exc}"
+    logger.warning("Slow query (%.1f ms): %s params=%s explain=%s", record["ms"], statement, record["parameters"],
+                   record.get("explain", record.get("explain_error")))
+    await save("slow_query", record)
+
+def instrument_engine(engine: AsyncEngine):
+    """Records statements for profiled requests and captures slow statements, on an AsyncEngine."""
+    explaining = contextvars.ContextVar("explaining", default=False)
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._profile_start = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - context._profile_start) * 1000
+        profile = current_profile.get()
+        if profile is not None and not explaining.get():
+            if len(profile.statements) < PROFILE_MAX_STATEMENTS:
+                profile.statements.append({"sql": statement, "parameters": parameter_shapes(parameters, executemany), "ms": round(elapsed_ms, 3)})
+            else:
+                profile.dropped_statements += 1
+        if elapsed_ms < SLOW_QUERY_MS or explaining.get():
+            return
+        record = {"time": datetime.utcnow().isoformat(), "sql": statement, "ms": round(elapsed_ms, 3),
+                  "parameters": parameter_shapes(parameters, executemany)}
+        now = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None or executemany or not EXPLAINABLE.match(statement) or now - _last_explained.get(statement, -EXPLAIN_INTERVAL_SECONDS) < EXPLAIN_INTERVAL_SECONDS:
+            # Not explained (bulk writes, repeats within the interval), but still recorded
+            logger.warning("Slow query (%.1f ms): %s params=%s", elapsed_ms, statement, record["parameters"])
+            if loop is not None:
+                save_in_background("slow_query", record, f"a {elapsed_ms:.1f} ms statement")
+            return
+        if len(_last_explained) > 1000:
+            _last_explained.clear()
+        _last_explained[statement] = now
+        # EXPLAIN on its own connection after this statement's transaction has moved on; the
+        # parameters are passed straight through to the driver and never stored
+        async def explain():
+            explaining.set(True)
+            await _explain_and_save(engine, record, statement, parameters)
+        task = loop.create_task(explain())
+        _explain_tasks.add(task)
+        task.add_done_callback(_explain_tasks.discard)
@@ -0,0 +1,53 @@
+from typing import Optional, Sequence
+from sqlalchemy import select, union_all
+from sqlalchemy.orm import aliased
+from .models import ArchivedTask, Project, Task
+
+# Query builders for the hot read paths. bench/query_plan_check.py EXPLAINs these exact
+# statements, so keep handlers building their SQL here rather than inline.
+#
+# The list queries select just the response schema's columns: plain rows are much cheaper
+# than ORM objects (no identity map, no instance state) and go straight to JSON in responses.py.
+# A fields= parameter narrows them further (responses.select_fields).
+PROJECT_COLUMNS = (Project.id, Project.name, Project.description, Project.created_at)
+TASK_COLUMNS = (Task.id, Task.project_id, Task.title, Task.status, Task.assignee_user_id, Task.due_date,
+                Task.created_at, Task.updated_at, Task.version)
+
+def task_source(include_archived: bool = False):
+    """Task, or live and archived tasks as one aliased UNION ALL that the builders below use like Task.
+    Filters on it are pushed into both branches, so each side still uses its own indexes."""
+    if not include_archived:
+        return Task
+    names = [column.name for column in Task.__table__.columns]
+    live = select(*(Task.__table__.c[name] for name in names))
+    archived = select(*(ArchivedTask.__table__.c[name] for name in names))
+    return aliased(Task, union_all(live, archived).subquery("all_tasks"))
+
+def task_columns(source=Task) -> tuple:
+    return tuple(getattr(source, column.key) for column in TASK_COLUMNS)
+
+def project_list_query(role: str, user_id: int, columns: Sequence = PROJECT_COLUMNS, include_archived: bool = False):
+    query = select(*columns).where(Project.deleted_at.is_(None))
+    if role == "member":
+        # Semi-join served by ix_tasks_assignee_project, instead of join + DISTINCT over every assigned task
+        source = task_source(include_archived)
+        assigned = select(source.project_id).where(source.assignee_user_id == user_id)
+        return query.where(Project.id.in_(assigned))
+    return query
+
+def in_live_project(source=Task):
+    """Condition on a task: its project isn't deleted (awaiting its purge job)."""
+    return select(Project.id).where(Project.id == source.project_id, Project.deleted_at.is_(None)).exists()
+
+def member_access_query(project_id: int, user_id: int, source=Task):
+    return select(source.id).where(source.project_id == project_id, source.assignee_user_id == user_id).limit(1)
+
+def task_list_query(project_id: int, member_id: Optional[int] = None, status: Optional[str] = None, assignee: Optional[int] = None, columns: Sequence = TASK_COLUMNS, source=Task):
+    query = select(*columns).where(source.project_id == project_id)
+    if member_id is not None:
+        query = query.where(source.assignee_user_id == member_id)
+    if status:
+        query = query.where(source.status == status)
+    if assignee:
+        query = query.where(source.assignee_user_id == assignee)
+    return query
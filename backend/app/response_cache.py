@@ -0,0 +1,339 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse
+from fastapi import Response
+from .cache import TTLCache
+from .etags import etag_matches, not_modified
+from .settings import load_env
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Server-side cache of whole GET responses, keyed by audience (e.g. "admin" or a member's id) plus
+# the normalised query string. Writes don't delete entries: they bump a generation counter, global
+# or per audience, that is part of every key, so the old entries are never read again and age out
+# through TTL and LRU eviction.
+#
+# RESPONSE_CACHE picks the backend: "memory" (single worker only), "redis" (shared by all workers;
+# anything that speaks the Redis protocol at RESPONSE_CACHE_URL, e.g. bench/resp_server.py) or
+# "off". A memory cache's generations are bumped only in the worker that handled the write, so
+# with WEB_CONCURRENCY > 1 other workers, the writer's next request included, would serve the old
+# listing until RESPONSE_CACHE_TTL; there it is turned off.
+load_env()
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "memory")
+if RESPONSE_CACHE == "memory" and int(os.getenv("WEB_CONCURRENCY", 1)) > 1:
+    if "RESPONSE_CACHE" in os.environ:
+        logger.warning("RESPONSE_CACHE=memory is per worker and WEB_CONCURRENCY > 1: response cache off, use redis to share one")
+    RESPONSE_CACHE = "off"
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL", "redis://localhost:6379/0")
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", 30))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 2000))  # Entries per worker, memory backend only
+RESPONSE_CACHE_TIMEOUT = float(os.getenv("RESPONSE_CACHE_TIMEOUT", 0.25))  # Per Redis command; a slow cache counts as a miss
+STAMPEDE_LOCK_SECONDS = float(os.getenv("STAMPEDE_LOCK_SECONDS", 5))  # Longest other workers wait for a recompute
+STAMPEDE_POLL_SECONDS = 0.02
+
+cache_lookups = metrics.registry.register(metrics.Counter(
+    "response_cache_lookups_total", "Response cache lookups by outcome (hit, miss, coalesced, error, bypass)", ("cache", "result")))
+cache_invalidations = metrics.registry.register(metrics.Counter(
+    "response_cache_invalidations_total", "Generation bumps by scope", ("cache", "scope")))
+
+class CacheError(Exception):
+    pass
+
+class CacheBackend(ABC):
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float):
+        ...
+
+    @abstractmethod
+    async def counters(self, keys: List[str]) -> List[int]:
+        ...
+
+    @abstractmethod
+    async def incr(self, key: str) -> int:
+        ...
+
+    async def acquire(self, key: str, ttl: float) -> bool:
+        """Takes a lock shared with other workers; False if someone else holds it."""
+        return True
+
+    async def release(self, key: str):
+        pass
+
+    async def close(self):
+        pass
+
+class MemoryBackend(CacheBackend):
+    def __init__(self, maxsize: int, ttl: float):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._counters: Dict[str, int] = {}  # Outside the LRU: losing one would resurrect stale entries
+
+    async def get(self, key):
+        return self.entries.get(key)
+
+    async def set(self, key, value, ttl):
+        self.entries.set(key, value, ttl=ttl)
+
+    async def counters(self, keys):
+        return [self._counters.get(key, 0) for key in keys]
+
+    async def incr(self, key):
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+class RedisBackend(CacheBackend):
+    """Minimal RESP client over one connection; commands are serialised with a lock. Eviction is
+    the server's job (maxmemory-policy allkeys-lru on a real Redis)."""
+
+    def __init__(self, url: str, timeout: float = RESPONSE_CACHE_TIMEOUT):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    async def _reply(self):
+        line = await self._reader.readline() # type: ignore
+        if not line:
+            raise CacheError("Connection closed by the cache server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise CacheError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            return None if length < 0 else (await self._reader.readexactly(length + 2))[:-2] # type: ignore
+        if kind == b"*":
+            length = int(rest)
+            return None if length < 0 else [await self._reply() for _ in range(length)]
+        raise CacheError(f"Unexpected reply from the cache server: {line!r}")
+
+    async def _call(self, *args):
+        self._writer.write(self._encode(args)) # type: ignore
+        await self._writer.drain() # type: ignore
+        return await self._reply()
+
+    async def command(self, *args):
+        async with self._lock:
+            try:
+                async with asyncio.timeout(self.timeout):
+                    if self._writer is None:
+                        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+                        if self.password:
+                            await self._call("AUTH", self.password)
+                        if self.db:
+                            await self._call("SELECT", self.db)
+                    return await self._call(*args)
+            except (OSError, EOFError, asyncio.IncompleteReadError, CacheError) as exc:
+                # A timeout or half-read reply leaves the stream out of step: start over next time
+                if self._writer is not None:
+                    self._writer.close()
+                self._reader = self._writer = None
+                raise CacheError(f"{type(exc).__name__}: {exc}") from exc
+
+    async def get(self, key):
+        return await self.command("GET", key)
+
+    async def set(self, key, value, ttl):
+        await self.command("SET", key, value, "PX", int(ttl * 1000))
+
+    async def counters(self, keys):
+        return [int(value) if value is not None else 0 for value in await self.command("MGET", *keys)]
+
+    async def incr(self, key):
+        return await self.command("INCR", key)
+
+    async def acquire(self, key, ttl):
+        return await self.command("SET", key, "1", "NX", "PX", int(ttl * 1000)) == "OK"
+
+    async def release(self, key):
+        await self.command("DEL", key)
+
+    async def close(self):
+        async with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+            self._reader = self._writer = None
+
+def _encode_entry(response: Response) -> bytes:
+    headers = {key: value for key, value in response.headers.items() if key != "content-length"}
+    return json.dumps(headers).encode() + b"\n" + bytes(response.body)
+
+def _decode_entry(entry: bytes) -> Response:
+    headers, _, body = entry.partition(b"\n")
+    return Response(body, headers=json.loads(headers))
+
+def normalise_query(query: str) -> str:
+    return urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+
+class ResponseCache:
+    def __init__(self, name: str, backend: Optional[CacheBackend], ttl: float = RESPONSE_CACHE_TTL):
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._last_error = 0.0
+
+    def _failed(self, action: str, exc: Exception):
+        cache_lookups.inc(self.name, "error")
+        if time.monotonic() - self._last_error > 10:  # Don't flood the log while the cache is down
+            self._last_error = time.monotonic()
+            logger.warning("Response cache %s failed to %s: %s", self.name, action, exc)
+
+    async def serve(self, audience, query: str, if_none_match: Optional[str],
+                    render: Callable[[Optional[str]], Awaitable[Response]], cacheable: bool = True) -> Response:
+        """The cached response for this audience and query string, rendering it on a miss.
+
+        render(if_none_match) builds the response; it is called with None when the result will
+        be cached, since a 304 can't be reused. Only 200 responses are cached. With cacheable
+        False the cache is neither read nor written (e.g. a client pinned to the primary after a
+        write, while other clients' replica renders may still be behind it).
+        """
+        if self.backend is None:
+            return await render(if_none_match)
+        if not cacheable:
+            cache_lookups.inc(self.name, "bypass")
+            return await render(if_none_match)
+        try:
+            generation, audience_generation = await self.backend.counters([f"{self.name}:gen", f"{self.name}:gen:{audience}"])
+        except CacheError as exc:
+            self._failed("read generations", exc)
+            return await render(if_none_match)
+        key = f"{self.name}:{generation}:{audience_generation}:{audience}:{normalise_query(query)}"
+        response = await self._get_or_render(key, render)
+        etag = response.headers.get("etag")
+        if response.status_code == 200 and etag and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        return response
+
+    async def _get(self, key: str) -> Optional[Response]:
+        try:
+            entry = await self.backend.get(key) # type: ignore
+        except CacheError as exc:
+            self._failed("read", exc)
+            return None
+        return _decode_entry(entry) if entry is not None else None
+
+    async def _get_or_render(self, key: str, render) -> Response:
+        cached = await self._get(key)
+        if cached is not None:
+            cache_lookups.inc(self.name, "hit")
+            return cached
+        # Stampede guard, first within this worker: concurrent misses wait for one render
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            try:
+                entry = await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The rendering request went away (client disconnected): try again ourselves
+                return await self._get_or_render(key, render)
+            cache_lookups.inc(self.name, "coalesced")
+            return _decode_entry(entry)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await self._render_once(key, render)
+            future.set_result(_encode_entry(response))
+            return response
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            future.exception()  # Mark retrieved, in case nobody was waiting
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def _render_once(self, key: str, render) -> Response:
+        # ...then across workers, through a lock key in the shared backend
+        lock_key = f"{key}:lock"
+        locked = False
+        try:
+            locked = await self.backend.acquire(lock_key, STAMPEDE_LOCK_SECONDS) # type: ignore
+            deadline = time.monotonic() + STAMPEDE_LOCK_SECONDS
+            while not locked and time.monotonic() < deadline:
+                await asyncio.sleep(STAMPEDE_POLL_SECONDS)
+                cached = await self._get(key)
+                if cached is not None:
+                    cache_lookups.inc(self.name, "coalesced")
+                    return cached
+                locked = await self.backend.acquire(lock_key, STAMPEDE_LOCK_SECONDS) # type: ignore
+        except CacheError as exc:
+            self._failed("lock", exc)
+        cache_lookups.inc(self.name, "miss")
+        try:
+            response = await render(None)
+            if response.status_code == 200:
+                try:
+                    await self.backend.set(key, _encode_entry(response), self.ttl) # type: ignore
+                except CacheError as exc:
+                    self._failed("write", exc)
+            return response
+        finally:
+            if locked:
+                try:
+                    await self.backend.release(lock_key) # type: ignore
+                except CacheError as exc:
+                    self._failed("unlock", exc)
+
+    async def invalidate(self, *audiences):
+        """Drops every cached response, or with audiences only theirs. Call after the commit."""
+        if self.backend is None:
+            return
+        keys = [f"{self.name}:gen:{audience}" for audience in audiences] if audiences else [f"{self.name}:gen"]
+        for key in keys:
+            try:
+                await self.backend.incr(key)
+                cache_invalidations.inc(self.name, "audience" if audiences else "all")
+            except CacheError as exc:
+                # Entries written before the failure stay readable until their TTL runs out
+                self._failed("invalidate", exc)
+
+    def stats(self) -> dict:
+        lookups = {result: int(count) for (name, result), count in cache_lookups.values.items() if name == self.name} # type: ignore
+        total = sum(count for result, count in lookups.items() if result != "bypass")
+        served = lookups.get("hit", 0) + lookups.get("coalesced", 0)
+        stats = {"backend": RESPONSE_CACHE, "ttl": self.ttl, **lookups, "hit_rate": round(served / total, 4) if total else 0.0}
+        if isinstance(self.backend, MemoryBackend):
+            stats["size"] = len(self.backend.entries)
+            stats["evictions"] = self.backend.entries.evictions
+        return stats
+
+def create_backend() -> Optional[CacheBackend]:
+    if RESPONSE_CACHE == "off":
+        return None
+    if RESPONSE_CACHE == "redis":
+        return RedisBackend(RESPONSE_CACHE_URL)
+    if RESPONSE_CACHE != "memory":
+        raise ValueError(f"Unknown RESPONSE_CACHE '{RESPONSE_CACHE}'; use memory, redis or off")
+    return MemoryBackend(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
+
+# GET /projects without a search term: one entry set for all admins, one per member
+project_listings = ResponseCache("projects", create_backend())
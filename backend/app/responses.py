@@ -0,0 +1,38 @@
+from typing import List, Optional, Sequence
+from fastapi import HTTPException, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from .schemas import ProjectResponse, TaskResponse
+
+# Lean serialization for list endpoints. Rows from the column-only selects in queries.py go
+# straight to orjson: their columns are exactly the response schema's fields and already have
+# the right types, so per-row model validation would only re-check what the database returned.
+# ORM objects (e.g. search results) go through a TypeAdapter and are dumped to JSON in Rust.
+project_list_adapter = TypeAdapter(List[ProjectResponse])
+task_list_adapter = TypeAdapter(List[TaskResponse])
+
+def _headers(response: Response) -> dict:
+    # Headers set on the injected Response (cursor, ETag) are dropped when a handler returns its own
+    return {key: value for key, value in response.headers.items() if key != "content-length"}
+
+def rows_response(rows: Sequence, response: Response) -> ORJSONResponse:
+    # dict(zip()) over the shared field names is several times faster than Row._asdict()
+    fields = rows[0]._fields if rows else ()
+    return ORJSONResponse([dict(zip(fields, row)) for row in rows], headers=_headers(response))
+
+def select_fields(fields: Optional[str], columns: Sequence) -> tuple:
+    """The columns named in a comma-separated fields= parameter, in schema order. id is always
+    included: the cursor and the client's own bookkeeping need it."""
+    if not fields:
+        return tuple(columns)
+    wanted = {name.strip() for name in fields.split(",") if name.strip()}
+    available = [column.key for column in columns]
+    unknown = wanted.difference(available)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}. Available: {', '.join(available)}")
+    return tuple(column for column in columns if column.key in wanted or column.key == "id")
+
+def models_response(adapter: TypeAdapter, objects: Sequence, response: Response, columns: Optional[Sequence] = None) -> Response:
+    include = {"__all__": {column.key for column in columns}} if columns is not None else None
+    body = adapter.dump_json(adapter.validate_python(objects, from_attributes=True), include=include)
+    return Response(body, media_type="application/json", headers=_headers(response))
@@ -1,6 +1,8 @@
 from datetime import datetime
-from typing import Literal, Optional
-from pydantic import BaseModel, EmailStr, validator
+from typing import Dict, List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, validator
+
+MAX_BATCH_SIZE = 500
 
 class UserCreate(BaseModel):
     name: str
@@ -27,8 +29,7 @@ class UserResponse(BaseModel):
     role: Literal["admin", "member"]
     created_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class ProjectCreate(BaseModel):
     name: str
@@ -40,8 +41,7 @@ class ProjectResponse(BaseModel):
     description: Optional[str]
     created_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class TaskCreate(BaseModel):
     title: str
@@ -67,5 +67,41 @@ class TaskResponse(BaseModel):
     updated_at: Optional[datetime]
     version: int
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class TaskBatchCreate(BaseModel):
+    items: List[TaskCreate] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class TaskBatchUpdateItem(TaskUpdate):
+    id: int
+
+class TaskBatchUpdate(BaseModel):
+    items: List[TaskBatchUpdateItem] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class TaskBatchResult(BaseModel):
+    index: int
+    status_code: int
+    detail: Optional[str] = None
+    task: Optional[TaskResponse] = None
+
+class ProjectStatsResponse(BaseModel):
+    project_id: int
+    total: int
+    by_status: Dict[str, int]
+    by_assignee: Dict[int, int]
+    overdue: int
+    due_today: int
+
+class JobResponse(BaseModel):
+    id: int
+    kind: str
+    target_id: int
+    status: Literal["queued", "running", "done", "failed"]
+    progress: int
+    attempts: int
+    error: Optional[str]
+    created_at: datetime
+    updated_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,352 @@
+import asyncio
+import bisect
+import heapq
+import logging
+import math
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from .db import AsyncSessionLocal
+from .models import Project, Task
+from .settings import load_env
+
+logger = logging.getLogger(__name__)
+
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")  # "auto", "fulltext" (MySQL only) or "memory"
+SEARCH_MAX_EXPANSIONS = int(os.getenv("SEARCH_MAX_EXPANSIONS", 64))  # Vocabulary terms one prefix may expand to
+SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", 1000))  # Matches fetched per side before ranking (fulltext)
+SEARCH_BUILD_CHUNK = 10000
+
+# Relative weight of a hit in each field; a project's score per query term is its best hit
+NAME_WEIGHT = 3.0
+DESCRIPTION_WEIGHT = 1.0
+TASK_TITLE_WEIGHT = 1.0
+PREFIX_FACTOR = 0.6  # A prefix hit ("proj" -> "project") ranks below an exact word hit
+
+WORD = re.compile(r"\w+")
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return WORD.findall(text.lower()) if text else []
+
+def _owner_key(project_id: int, assignee_id: int) -> int:
+    # (project, assignee) packed into one int: far smaller than tuple keys at millions of postings
+    return (project_id << 32) | assignee_id
+
+class InvertedIndex:
+    """In-memory inverted index over project name/description and task titles.
+
+    Task title postings are kept per project (and per project+assignee for member searches)
+    rather than per task, so a common word costs one entry per project it appears in.
+    Scoring works on whole posting sets with set/dict operations, so the per-query Python
+    work is a handful of C-level calls per matching word.
+    """
+
+    def __init__(self):
+        self.name_postings: Dict[str, Set[int]] = {}  # term -> project ids
+        self.description_postings: Dict[str, Set[int]] = {}
+        self.title_postings: Dict[str, Dict[int, int]] = {}  # term -> {project_id: tasks with the term}
+        self.owner_postings: Dict[str, Dict[int, int]] = {}  # term -> {owner key: tasks with the term}
+        self.project_terms: Dict[int, Tuple[Set[str], Set[str]]] = {}  # project_id -> (name terms, description terms)
+        self.task_terms: Dict[int, Tuple[int, Tuple[str, ...]]] = {}  # task_id -> (owner key, terms)
+        self.member_projects: Dict[int, Dict[int, int]] = {}  # assignee -> {project_id: task count}
+        self.vocabulary: List[str] = []  # Sorted, for prefix expansion
+        self._known: Dict[str, str] = {}
+
+    def _add_term(self, term: str) -> str:
+        # Returns the one shared copy of the string, so per-task term tuples don't each hold their own
+        known = self._known.get(term)
+        if known is None:
+            known = self._known[term] = term
+            bisect.insort(self.vocabulary, term)
+        return known
+
+    def add_project(self, project_id: int, name: Optional[str], description: Optional[str]):
+        self.remove_project_text(project_id)
+        name_terms, description_terms = set(tokenize(name)), set(tokenize(description))
+        for terms, postings in ((name_terms, self.name_postings), (description_terms, self.description_postings)):
+            for term in terms:
+                self._add_term(term)
+                postings.setdefault(term, set()).add(project_id)
+        self.project_terms[project_id] = (name_terms, description_terms)
+
+    def remove_project_text(self, project_id: int):
+        entry = self.project_terms.pop(project_id, None)
+        if entry is None:
+            return
+        for terms, postings in zip(entry, (self.name_postings, self.description_postings)):
+            for term in terms:
+                postings[term].discard(project_id)
+                if not postings[term]:
+                    del postings[term]
+
+    def remove_project(self, project_id: int):
+        self.remove_project_text(project_id)
+        for task_id in [task_id for task_id, (owner, _) in self.task_terms.items() if owner >> 32 == project_id]:
+            self.remove_task(task_id)
+
+    @staticmethod
+    def _count(postings: Dict[str, Dict[int, int]], term: str, key: int, delta: int):
+        counts = postings.setdefault(term, {})
+        counts[key] = counts.get(key, 0) + delta
+        if not counts[key]:
+            del counts[key]
+            if not counts:
+                del postings[term]
+
+    def add_task(self, task_id: int, project_id: int, assignee_id: int, title: Optional[str]):
+        self.remove_task(task_id)
+        owner = _owner_key(project_id, assignee_id)
+        terms = tuple(self._add_term(term) for term in dict.fromkeys(tokenize(title)))
+        for term in terms:
+            self._count(self.title_postings, term, project_id, 1)
+            self._count(self.owner_postings, term, owner, 1)
+        self.task_terms[task_id] = (owner, terms)
+        projects = self.member_projects.setdefault(assignee_id, {})
+        projects[project_id] = projects.get(project_id, 0) + 1
+
+    def remove_task(self, task_id: int):
+        entry = self.task_terms.pop(task_id, None)
+        if entry is None:
+            return
+        owner, terms = entry
+        project_id, assignee_id = owner >> 32, owner & 0xFFFFFFFF
+        for term in terms:
+            self._count(self.title_postings, term, project_id, -1)
+            self._count(self.owner_postings, term, owner, -1)
+        self._count(self.member_projects, assignee_id, project_id, -1) # type: ignore
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        # Every query word also matches as a prefix, so results appear while the user is typing
+        expansions = []
+        start = bisect.bisect_left(self.vocabulary, token)
+        for term in self.vocabulary[start:start + SEARCH_MAX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+            if term in self.name_postings or term in self.description_postings or term in self.title_postings:
+                expansions.append((term, 1.0 if term == token else PREFIX_FACTOR))
+        return expansions
+
+    def search(self, query: str, member_id: Optional[int] = None, limit: int = 100) -> List[Tuple[int, float]]:
+        """[(project_id, score)] best first. Every query word must match the project's name,
+        description or one of its task titles (for members: one of their own tasks)."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        visible = None
+        if member_id is not None:
+            visible = self.member_projects.get(member_id, {}).keys()
+            if not visible:
+                return []
+        documents = len(self.project_terms) + len(self.task_terms) + 1
+        scores: Optional[Dict[int, float]] = None
+        hits = []  # Per word: [(score, project ids)], one entry per matching term and field
+        for token in tokens:
+            groups = []
+            for term, factor in self._expand(token):
+                names = self.name_postings.get(term, set())
+                descriptions = self.description_postings.get(term, set())
+                titles = self.title_postings.get(term, {})
+                idf = math.log(1 + documents / (len(names) + len(descriptions) + len(titles)))
+                if visible is not None:
+                    owners = self.owner_postings.get(term, {})
+                    titles = [project_id for project_id in visible if _owner_key(project_id, member_id) in owners] # type: ignore
+                    names, descriptions = visible & names, visible & descriptions
+                groups += [(NAME_WEIGHT * factor * idf, names), (DESCRIPTION_WEIGHT * factor * idf, descriptions), (TASK_TITLE_WEIGHT * factor * idf, titles)]
+            hits.append(groups)
+        # Rarest word first: later words only intersect with the projects still in the running
+        hits.sort(key=lambda groups: sum(len(project_ids) for _, project_ids in groups))
+        for groups in hits:
+            token_scores: Dict[int, float] = {}
+            if len(tokens) == 1:
+                # One word: a project's score is its best hit, so take hits best first and stop
+                # once `limit` projects are in and every remaining hit scores strictly lower
+                groups.sort(key=lambda group: group[0], reverse=True)
+                for position, (score, project_ids) in enumerate(groups):
+                    token_scores.update(dict.fromkeys(project_ids - token_scores.keys(), score))
+                    if len(token_scores) >= limit and position + 1 < len(groups) and groups[position + 1][0] < score:
+                        break
+            else:
+                # Scores add up across words, so every hit counts; write lowest first so each
+                # project ends up with its best hit for this word
+                groups.sort(key=lambda group: group[0])
+                for score, project_ids in groups:
+                    if scores is not None:
+                        project_ids = scores.keys() & project_ids
+                    token_scores.update(dict.fromkeys(project_ids, score))
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {project_id: scores[project_id] + score for project_id, score in token_scores.items()}
+            if not scores:
+                return []
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+
+class SearchBackend(ABC):
+    """Ranks projects for GET /projects?q=. The write handlers report changes after commit;
+    backends that search the database directly ignore them."""
+
+    @abstractmethod
+    async def search(self, db: AsyncSession, query: str, member_id: Optional[int], limit: int) -> List[Tuple[int, float]]:
+        """(project id, score) pairs, best first, at most limit of them."""
+
+    def project_changed(self, project: Project):
+        pass
+
+    def project_removed(self, project_id: int):
+        pass
+
+    def task_changed(self, task: Task):
+        pass
+
+    def invalidate(self):
+        """Forget anything derived from the database, after writes that weren't reported one by one."""
+
+    async def warm(self, db: AsyncSession):
+        """Loads anything the first search would otherwise wait for; called at startup."""
+
+class MemorySearch(SearchBackend):
+    """Per-worker inverted index, built from the database on the first search and kept
+    current by the write handlers. Writes made by other workers or outside the API (bulk
+    scripts, imports) are not seen until invalidate(); with several workers use MySQL.
+
+    invalidate() doesn't make a search wait for a rebuild: the current index keeps serving
+    while a background task builds its replacement. Every invalidate() bumps a generation, and
+    the task builds again if one arrived while it was building."""
+
+    def __init__(self):
+        self.index: Optional[InvertedIndex] = None
+        self._build_lock: Optional[asyncio.Lock] = None
+        self._pending: Optional[list] = None  # Changes reported while a build is running
+        self._generation = 0  # Bumped by invalidate()
+        self._built_generation = 0  # The generation self.index was built at
+        self._rebuild: Optional[asyncio.Task] = None
+
+    def invalidate(self):
+        self._generation += 1
+        if self.index is None or self._rebuild is not None:
+            return  # The first build hasn't finished, or a rebuild is running: they check the generation
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:  # No loop to rebuild in (a script): the next search builds afresh
+            self.index = None
+            return
+        self._rebuild = loop.create_task(self._rebuild_in_background())
+
+    async def _rebuild_in_background(self):
+        try:
+            while self._built_generation != self._generation:
+                generation = self._generation
+                async with AsyncSessionLocal() as db:
+                    index = await self._build(db)
+                self.index, self._built_generation = index, generation
+        except Exception:
+            logger.exception("Search index rebuild failed; the previous index keeps serving")
+        finally:
+            self._rebuild = None
+
+    async def _build(self, db: AsyncSession) -> InvertedIndex:
+        index = InvertedIndex()
+        self._pending = []
+        try:
+            projects = await db.stream(select(Project.id, Project.name, Project.description).where(Project.deleted_at.is_(None)).execution_options(yield_per=SEARCH_BUILD_CHUNK))
+            async for chunk in projects.partitions():
+                for row in chunk:
+                    index.add_project(*row)
+                await asyncio.sleep(0)  # Let requests run between chunks
+            tasks = await db.stream(select(Task.id, Task.project_id, Task.assignee_user_id, Task.title).execution_options(yield_per=SEARCH_BUILD_CHUNK))
+            async for chunk in tasks.partitions():
+                for row in chunk:
+                    index.add_task(*row)
+                await asyncio.sleep(0)
+            for apply, args in self._pending:
+                apply(index, *args)
+        finally:
+            self._pending = None
+        logger.info("Search index built: %s projects, %s tasks, %s terms", len(index.project_terms), len(index.task_terms), len(index.vocabulary))
+        return index
+
+    async def warm(self, db):
+        if self.index is None:
+            if self._build_lock is None:
+                self._build_lock = asyncio.Lock()
+            async with self._build_lock:
+                if self.index is None:
+                    generation = self._generation
+                    self.index, self._built_generation = await self._build(db), generation
+                    if generation != self._generation:
+                        self.invalidate()  # Writes reported as invalidations while building
+
+    async def search(self, db, query, member_id, limit):
+        await self.warm(db)
+        return self.index.search(query, member_id, limit) # type: ignore
+
+    def _apply(self, apply, *args):
+        if self.index is not None:
+            apply(self.index, *args)
+        if self._pending is not None:  # Replayed onto the index being built
+            self._pending.append((apply, args))
+
+    def project_changed(self, project):
+        self._apply(InvertedIndex.add_project, project.id, project.name, project.description)
+
+    def project_removed(self, project_id):
+        self._apply(InvertedIndex.remove_project, project_id)
+
+    def task_changed(self, task):
+        self._apply(InvertedIndex.add_task, task.id, task.project_id, task.assignee_user_id, task.title)
+
+class FulltextSearch(SearchBackend):
+    """MySQL FULLTEXT ... WITH PARSER ngram indexes (migrations d9e5b7a3c210 and a4e8c1d7f352).
+    Ngram tokens make substring and prefix matches index lookups, including for CJK text. Unlike the
+    in-memory index, every word must match within one side: the project's own text or a
+    single task title."""
+
+    async def search(self, db, query, member_id, limit):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        against = " ".join(f"+{token}*" for token in tokens)
+        project_match = match(Project.name, Project.description, against=against).in_boolean_mode()
+        title_match = match(Task.title, against=against).in_boolean_mode()
+        # Every word must be in the project's text, but a name hit outranks a description hit,
+        # as in MemorySearch: each side is scored on its own words and the better one counts
+        any_word = " ".join(f"{token}*" for token in tokens)
+        project_score = func.greatest(NAME_WEIGHT * match(Project.name, against=any_word).in_boolean_mode(),
+                                      DESCRIPTION_WEIGHT * match(Project.description, against=any_word).in_boolean_mode())
+
+        projects = select(Project.id, project_score).where(project_match > 0)
+        titles = select(Task.project_id, title_match).where(title_match > 0)
+        if member_id is not None:
+            projects = projects.where(Project.id.in_(select(Task.project_id).where(Task.assignee_user_id == member_id)))
+            titles = titles.where(Task.assignee_user_id == member_id)
+        projects = projects.order_by(project_score.desc()).limit(SEARCH_CANDIDATES)
+        titles = titles.order_by(title_match.desc()).limit(SEARCH_CANDIDATES)
+
+        scores: Dict[int, float] = {}
+        for project_id, score in (await db.execute(projects)).all():
+            scores[project_id] = score
+        for project_id, score in (await db.execute(titles)).all():
+            scores[project_id] = max(scores.get(project_id, 0), TASK_TITLE_WEIGHT * score)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+
+def create_search() -> SearchBackend:
+    backend = SEARCH_BACKEND
+    if backend == "auto":
+        load_env()
+        url = os.getenv("DATABASE_URL")  # Read without building an engine: imports open no pool
+        backend = "fulltext" if url and make_url(url).get_backend_name() == "mysql" else "memory"
+    return FulltextSearch() if backend == "fulltext" else MemorySearch()
+
+search = create_search()
+
+async def search_projects(db: AsyncSession, query: str, member_id: Optional[int], limit: int) -> List[Project]:
+    ranked = await search.search(db, query, member_id, limit)
+    if not ranked:
+        return []
+    projects = {project.id: project for project in (await db.execute(select(Project).where(Project.id.in_([project_id for project_id, _ in ranked]), Project.deleted_at.is_(None)))).scalars()}
+    return [projects[project_id] for project_id, _ in ranked if project_id in projects]
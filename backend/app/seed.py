@@ -4,6 +4,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  #
 
 from app.db import get_db
 from app.models import User, Project, Task
+from app.stats import rebuild_stats
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
@@ -84,6 +85,7 @@ def seed(db: Session):
             db.add(task)
     
     db.commit()
+    rebuild_stats(db, project_id)
     print("Seeding complete: Users and sample project/tasks added!")
 
 if __name__ == "__main__":
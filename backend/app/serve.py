@@ -0,0 +1,69 @@
+"""Runs the API under uvicorn with workers and database pools sized to the machine.
+
+One worker per available core (CPU affinity and any cgroup CPU quota count, so a container
+limited to 2 CPUs gets 2 workers whatever the host has), or WEB_CONCURRENCY / --workers.
+With DB_MAX_CONNECTIONS set, workers are capped to it and each worker's pool gets an equal
+share (see app.db.pool_options). Each worker builds the app with create_app() and opens its own
+pool in its lifespan, after it has started.
+
+Run from backend/:  python -m app.serve --port 8000
+"""
+import argparse
+import logging
+import math
+import os
+import uvicorn
+from .settings import get_settings, load_env, pool_options
+
+logger = logging.getLogger(__name__)
+
+def available_cores() -> int:
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:  # Not on Linux
+        cores = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cores = min(cores, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cores
+
+def plan_workers(requested: int = 0) -> int:
+    load_env()
+    workers = requested or int(os.getenv("WEB_CONCURRENCY", 0)) or available_cores()
+    budget = int(os.getenv("DB_MAX_CONNECTIONS", 0))
+    if budget:
+        workers = min(workers, budget)  # Every worker needs at least one connection
+    return max(1, workers)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=0, help="default: WEB_CONCURRENCY, else one per available core")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-access-log", action="store_true")
+    parser.add_argument("--dry-run", action="store_true", help="print the worker and pool plan and exit")
+    args = parser.parse_args()
+
+    workers = plan_workers(args.workers)
+    # Read by each worker's settings (pool shares) and by uvicorn itself
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    get_settings.cache_clear()
+    settings = get_settings()
+    pool = pool_options(settings.async_database_url, settings)
+    plan = (f"{workers} worker(s) on {available_cores()} available core(s), "
+            f"pool_size {pool.get('pool_size', '-')} + max_overflow {pool.get('max_overflow', '-')} per worker")
+    if args.dry_run:
+        print(plan)
+        return
+    logging.basicConfig(level=logging.INFO)
+    logger.info("Starting %s", plan)
+    uvicorn.run("app.main:create_app", factory=True, host=args.host, port=args.port, workers=workers,
+                log_level=args.log_level, access_log=not args.no_access_log)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple
+from dotenv import find_dotenv, load_dotenv
+from sqlalchemy.engine import make_url
+
+# Async driver used for each sync backend in DATABASE_URL (ASYNC_DATABASE_URL overrides the mapping)
+ASYNC_DRIVERS = {"mysql": "aiomysql", "sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+def to_async_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for '{backend}'. Set ASYNC_DATABASE_URL in your .env file.")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+def _flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+@dataclass(frozen=True)
+class Settings:
+    """Process configuration, read from the environment (and the .env file) by from_env()."""
+
+    database_url: str
+    async_database_url: str
+    replica_database_url: Optional[str] = None
+    async_replica_database_url: Optional[str] = None
+    secret_key: Optional[str] = None
+    jwt_expiration_minutes: int = 1440
+    cors_origins: Tuple[str, ...] = ("http://localhost:3000",)
+    # Pool sizing is per engine and per worker process. With db_max_connections set (the
+    # database's connection budget for this app), each of the web_concurrency workers gets an
+    # equal share of it.
+    web_concurrency: int = 1
+    db_max_connections: int = 0
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800  # Below MySQL's wait_timeout, so idle connections aren't dropped under us
+    db_pool_pre_ping: bool = True
+    db_pool_prewarm: Optional[int] = None  # Connections opened at startup; None for the whole pool_size
+    warm_caches: bool = True
+    jobs_enabled: bool = True
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        load_env()
+        database_url = os.getenv("DATABASE_URL")
+        if database_url is None:
+            raise ValueError("DATABASE_URL environment variable not set. Check your .env file.")
+        replica_url = os.getenv("REPLICA_DATABASE_URL") or None
+        prewarm = os.getenv("DB_POOL_PREWARM")
+        return cls(
+            database_url=database_url,
+            async_database_url=os.getenv("ASYNC_DATABASE_URL") or to_async_url(database_url),
+            replica_database_url=replica_url,
+            async_replica_database_url=os.getenv("ASYNC_REPLICA_DATABASE_URL") or (to_async_url(replica_url) if replica_url else None),
+            secret_key=os.getenv("SECRET_KEY") or None,
+            jwt_expiration_minutes=int(os.getenv("JWT_EXPIRATION_MINUTES", 1440)),
+            cors_origins=tuple(origin.strip() for origin in os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",") if origin.strip()),
+            web_concurrency=int(os.getenv("WEB_CONCURRENCY", 1)),
+            db_max_connections=int(os.getenv("DB_MAX_CONNECTIONS", 0)),
+            db_pool_size=int(os.getenv("DB_POOL_SIZE", 5)),
+            db_max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 10)),
+            db_pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", 30)),
+            db_pool_recycle=int(os.getenv("DB_POOL_RECYCLE", 1800)),
+            db_pool_pre_ping=_flag("DB_POOL_PRE_PING", "true"),
+            db_pool_prewarm=int(prewarm) if prewarm else None,
+            warm_caches=_flag("WARM_CACHES", "true"),
+            jobs_enabled=_flag("JOBS_ENABLED", "true"),
+        )
+
+def pool_options(url: str, settings: Optional[Settings] = None) -> dict:
+    settings = settings or get_settings()
+    options = {"pool_pre_ping": settings.db_pool_pre_ping, "pool_recycle": settings.db_pool_recycle}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return options  # In-memory SQLite shares one connection; its pool takes no size settings
+    pool_size, max_overflow = settings.db_pool_size, settings.db_max_overflow
+    if settings.db_max_connections:
+        per_worker = max(1, settings.db_max_connections // max(1, settings.web_concurrency))
+        pool_size = min(pool_size, per_worker)
+        max_overflow = min(max_overflow, per_worker - pool_size)
+    return {**options, "pool_size": pool_size, "max_overflow": max_overflow, "pool_timeout": settings.db_pool_timeout}
+
+_env_loaded = False
+
+def load_env():
+    """Loads the nearest .env (backend/.env, then the repository root's) once per process.
+    Variables already set in the environment win."""
+    global _env_loaded
+    if not _env_loaded:
+        load_dotenv(find_dotenv())
+        _env_loaded = True
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    return Settings.from_env()
@@ -0,0 +1,142 @@
+import argparse
+import sys
+import os
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Iterable, Optional, Tuple
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .models import ProjectDueCount, ProjectTaskCount
+from .queries import task_source
+
+# Task columns the counters depend on; updates touching none of them leave the counters alone
+STAT_FIELDS = {"status", "assignee_user_id", "due_date"}
+
+def task_key(task) -> Tuple:
+    """(project_id, status, assignee_user_id, due_date) of an ORM Task or a row with those columns."""
+    return (task.project_id, task.status, task.assignee_user_id, task.due_date)
+
+def due_day(value: datetime) -> date:
+    # DATETIME columns store the wall-clock value without its offset, so bucket by that same
+    # date; this is what DATE(due_date) gives the rebuild
+    return value.date()
+
+def stats_deltas(changes: Iterable[Tuple[Optional[Tuple], Optional[Tuple]]]) -> Tuple[Counter, Counter]:
+    # changes are (before, after) task keys; None on one side means created / deleted
+    counts: Counter = Counter()
+    dues: Counter = Counter()
+    for before, after in changes:
+        for key, sign in ((before, -1), (after, 1)):
+            if key is None:
+                continue
+            project_id, status, assignee_id, due_date = key
+            counts[(project_id, status, assignee_id)] += sign
+            if due_date is not None and status != "done":
+                dues[(project_id, assignee_id, due_day(due_date))] += sign
+    return (
+        Counter({key: delta for key, delta in counts.items() if delta}),
+        Counter({key: delta for key, delta in dues.items() if delta}),
+    )
+
+def _upsert(model, dialect_name: str):
+    table = model.__table__
+    if dialect_name == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(table)
+        return stmt.on_duplicate_key_update(count=table.c.count + stmt.inserted["count"])
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[column.name for column in table.primary_key],
+        set_={"count": table.c.count + stmt.excluded["count"]},
+    )
+
+async def apply_task_changes(db: AsyncSession, changes):
+    """Adds the counter deltas for (before, after) task keys to the current transaction."""
+    counts, dues = stats_deltas(changes)
+    dialect_name = db.get_bind().dialect.name
+    if counts:
+        rows = [{"project_id": p, "status": s, "assignee_user_id": a, "count": d} for (p, s, a), d in counts.items()]
+        await db.execute(_upsert(ProjectTaskCount, dialect_name), rows)
+    if dues:
+        rows = [{"project_id": p, "assignee_user_id": a, "due_day": day, "count": d} for (p, a, day), d in dues.items()]
+        await db.execute(_upsert(ProjectDueCount, dialect_name), rows)
+
+async def clear_project_stats(db: AsyncSession, project_id: int):
+    await db.execute(delete(ProjectTaskCount).where(ProjectTaskCount.project_id == project_id))
+    await db.execute(delete(ProjectDueCount).where(ProjectDueCount.project_id == project_id))
+
+async def project_stats(db: AsyncSession, project_id: int, member_id: Optional[int] = None) -> dict:
+    counts = select(ProjectTaskCount.status, ProjectTaskCount.assignee_user_id, ProjectTaskCount.count).where(
+        ProjectTaskCount.project_id == project_id, ProjectTaskCount.count > 0
+    )
+    today = datetime.now(timezone.utc).date()
+    dues = select(
+        func.coalesce(func.sum(case((ProjectDueCount.due_day < today, ProjectDueCount.count), else_=0)), 0),
+        func.coalesce(func.sum(case((ProjectDueCount.due_day == today, ProjectDueCount.count), else_=0)), 0),
+    ).where(ProjectDueCount.project_id == project_id)
+    if member_id is not None:
+        counts = counts.where(ProjectTaskCount.assignee_user_id == member_id)
+        dues = dues.where(ProjectDueCount.assignee_user_id == member_id)
+
+    by_status = {"todo": 0, "in_progress": 0, "done": 0}
+    by_assignee: Counter = Counter()
+    for status, assignee_id, count in (await db.execute(counts)).all():
+        by_status[status] += count
+        by_assignee[assignee_id] += count
+    overdue, due_today = (await db.execute(dues)).one()
+    return {
+        "project_id": project_id,
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_assignee": dict(by_assignee),
+        "overdue": overdue,
+        "due_today": due_today,
+    }
+
+def rebuild_stats(db: Session, project_id: Optional[int] = None):
+    """Recomputes the counters from `tasks` and `archived_tasks` (all projects, or one) in a single transaction."""
+    tasks = task_source(include_archived=True)
+    clear_counts = delete(ProjectTaskCount)
+    clear_dues = delete(ProjectDueCount)
+    task_filter = []
+    if project_id is not None:
+        clear_counts = clear_counts.where(ProjectTaskCount.project_id == project_id)
+        clear_dues = clear_dues.where(ProjectDueCount.project_id == project_id)
+        task_filter.append(tasks.project_id == project_id)
+    db.execute(clear_counts)
+    db.execute(clear_dues)
+    db.execute(insert(ProjectTaskCount).from_select(
+        ["project_id", "status", "assignee_user_id", "count"],
+        select(tasks.project_id, tasks.status, tasks.assignee_user_id, func.count())
+        .where(*task_filter)
+        .group_by(tasks.project_id, tasks.status, tasks.assignee_user_id),
+    ))
+    day = func.date(tasks.due_date)
+    db.execute(insert(ProjectDueCount).from_select(
+        ["project_id", "assignee_user_id", "due_day", "count"],
+        select(tasks.project_id, tasks.assignee_user_id, day, func.count())
+        .where(tasks.due_date.isnot(None), tasks.status != "done", *task_filter)
+        .group_by(tasks.project_id, tasks.assignee_user_id, day),
+    ))
+    db.commit()
+
+if __name__ == "__main__":
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Add backend to path
+    from app.db import SessionLocal, init_engines
+
+    parser = argparse.ArgumentParser(description="Maintain the per-project task counters.")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--project-id", type=int, help="Only rebuild this project's counters")
+    args = parser.parse_args()
+    init_engines()
+    db = SessionLocal()
+    try:
+        rebuild_stats(db, args.project_id)
+        print(f"Rebuilt task counters for {'project ' + str(args.project_id) if args.project_id else 'all projects'}")
+    finally:
+        db.close()
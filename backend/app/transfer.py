@@ -0,0 +1,222 @@
+import csv
+import io
+import logging
+import os
+import time
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .cache import TTLCache
+from .models import Task, User
+from .pagination import keyset_page
+from .schemas import TaskCreate
+from .stats import apply_task_changes
+
+logger = logging.getLogger(__name__)
+
+# Streaming export and import of a project's tasks, one task per NDJSON line or CSV row.
+# Export reads keyset chunks of EXPORT_CHUNK_SIZE rows, each in its own short session, so a slow
+# download never pins a pooled connection. Import parses the upload as it arrives and inserts
+# IMPORT_CHUNK_SIZE rows per statement, committing each chunk: invalid lines are reported and
+# skipped, and chunks already committed stay if the upload is cut off.
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 1000))
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 1000))
+IMPORT_MAX_LINE_BYTES = int(os.getenv("IMPORT_MAX_LINE_BYTES", 65536))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 1000))  # Reported in full; later failures are only counted
+IMPORT_KNOWN_USERS = int(os.getenv("IMPORT_KNOWN_USERS", 10000))  # Assignee ids remembered per import as existing
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _csv_chunk(rows) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+async def export_rows(session_factory, query, fields: Sequence[str], format: str, id_column=Task.id) -> AsyncIterator[bytes]:
+    """The rows of a task_list_query as NDJSON or CSV (with a header row), in id order.
+
+    The query must select id_column, the id of its task source. Tasks created while the export runs appear in it if their id
+    is beyond the chunk being read.
+    """
+    if format == "csv":
+        yield _csv_chunk([fields])
+    after_id = None
+    while True:
+        async with session_factory() as db:
+            rows = (await db.execute(keyset_page(query, id_column, EXPORT_CHUNK_SIZE, after_id))).all()
+        more = len(rows) > EXPORT_CHUNK_SIZE
+        rows = rows[:EXPORT_CHUNK_SIZE]
+        if rows:
+            if format == "csv":
+                yield _csv_chunk([[_csv_value(value) for value in row] for row in rows])
+            else:
+                yield b"".join(orjson.dumps(dict(zip(fields, row)), option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+            after_id = rows[-1].id
+        if not more:
+            return
+
+class LineTooLong(Exception):
+    pass
+
+async def _records(chunks: AsyncIterator[bytes], quoted: bool) -> AsyncIterator[bytes]:
+    # Complete records of the upload, without their newline. With quoted (CSV), a newline inside
+    # a quoted field doesn't end the record; quotes inside fields are doubled, so an odd count of
+    # quote characters so far means we're inside one.
+    pending = b""
+    async for chunk in chunks:
+        data = pending + chunk if pending else chunk
+        start = position = quotes = 0
+        while True:
+            newline = data.find(b"\n", position)
+            if newline == -1:
+                break
+            if quoted:
+                quotes += data.count(b'"', position, newline)
+                if quotes % 2:
+                    position = newline + 1
+                    continue
+            yield data[start:newline]
+            start = position = newline + 1
+            quotes = 0
+        pending = data[start:]
+        if len(pending) > IMPORT_MAX_LINE_BYTES:
+            raise LineTooLong()
+    if pending:
+        yield pending
+
+def _validation_detail(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc']) or 'line'}: {error['msg']}" for error in exc.errors())
+
+class TaskImport:
+    def __init__(self, db: AsyncSession, project_id: int, user: User):
+        self.db = db
+        self.project_id = project_id
+        self.user = user
+        # Assignees already found to exist, so a chunk only looks up ids it hasn't seen
+        self.known_users = TTLCache(maxsize=IMPORT_KNOWN_USERS, ttl=float("inf"))
+        self.known_users.set(user.id, True)
+        self.rows: List[dict] = []
+        self.row_lines: List[int] = []
+        self.lines = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+        self.assignees: set = set()
+        self.completed = False
+        self.started = time.perf_counter()
+
+    def fail(self, line: int, detail: str):
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "detail": detail})
+
+    async def add(self, line: int, record):
+        if not isinstance(record, dict):
+            self.fail(line, "Expected an object with the task's fields")
+            return
+        try:
+            task = TaskCreate.model_validate(record)
+        except ValidationError as exc:
+            self.fail(line, _validation_detail(exc))
+            return
+        if task.assignee_user_id and task.assignee_user_id != self.user.id and self.user.role != "admin": # type: ignore
+            self.fail(line, "Only admins can assign to others")
+            return
+        self.rows.append({"project_id": self.project_id, "title": task.title, "status": task.status, "due_date": task.due_date,
+                          "assignee_user_id": task.assignee_user_id or self.user.id, "version": 1})
+        self.row_lines.append(line)
+        if len(self.rows) >= IMPORT_CHUNK_SIZE:
+            await self.flush()
+
+    async def _check_assignees(self):
+        # Admins may assign to anyone: one query per chunk for the assignees it hasn't seen yet
+        unseen = {row["assignee_user_id"] for row in self.rows if not self.known_users.get(row["assignee_user_id"])}
+        if unseen:
+            for user_id in (await self.db.execute(select(User.id).where(User.id.in_(unseen)))).scalars():
+                self.known_users.set(user_id, True)
+        rows = []
+        for line, row in zip(self.row_lines, self.rows):
+            if self.known_users.get(row["assignee_user_id"]):
+                rows.append(row)
+            else:
+                self.fail(line, "Assignee not found")
+        self.rows, self.row_lines = rows, []
+
+    async def flush(self):
+        await self._check_assignees()
+        if not self.rows:
+            return
+        # Core insert on the table: the ORM form splits the executemany wherever rows' null columns differ
+        await self.db.execute(insert(Task.__table__), self.rows)
+        await apply_task_changes(self.db, [(None, (row["project_id"], row["status"], row["assignee_user_id"], row["due_date"])) for row in self.rows])
+        await self.db.commit()
+        self.imported += len(self.rows)
+        self.assignees.update(row["assignee_user_id"] for row in self.rows)
+        self.rows = []
+
+    async def run(self, chunks: AsyncIterator[bytes], format: str):
+        header: Optional[List[str]] = None
+        line = 1  # Physical line the current record starts on
+        try:
+            async for raw in _records(chunks, quoted=format == "csv"):
+                record_line, line = line, line + raw.count(b"\n") + 1
+                raw = raw.rstrip(b"\r")
+                if not raw.strip():
+                    continue
+                try:
+                    text = raw.decode()
+                except UnicodeDecodeError:
+                    self.lines += 1
+                    self.fail(record_line, "Not valid UTF-8")
+                    continue
+                if format == "csv" and header is None:
+                    header = [name.strip() for name in next(csv.reader([text.lstrip("\ufeff")]))]
+                    continue
+                self.lines += 1
+                record, error = self._parse(text, header)
+                if error is not None:
+                    self.fail(record_line, error)
+                else:
+                    await self.add(record_line, record)
+        except LineTooLong:
+            self.fail(line, f"Line is longer than {IMPORT_MAX_LINE_BYTES} bytes; import stopped")
+            await self.flush()
+            return
+        await self.flush()
+        self.completed = True
+
+    def _parse(self, text: str, header: Optional[List[str]]) -> Tuple:
+        """(record, None) for one NDJSON line or CSV row, or (None, error)."""
+        if header is None:
+            try:
+                return orjson.loads(text), None
+            except orjson.JSONDecodeError as exc:
+                return None, f"Invalid JSON: {exc}"
+        try:
+            values = next(csv.reader([text]))
+        except csv.Error as exc:
+            return None, f"Invalid CSV: {exc}"
+        if len(values) != len(header):
+            return None, f"Expected {len(header)} columns, got {len(values)}"
+        # Empty cells are missing values, so defaults (status) apply and due_date stays unset
+        return {name: value for name, value in zip(header, values) if value != ""}, None
+
+    def summary(self) -> dict:
+        seconds = time.perf_counter() - self.started
+        return {
+            "completed": self.completed,
+            "lines": self.lines,
+            "imported": self.imported,
+            "failed": self.failed,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(self.imported / seconds, 1) if seconds else 0.0,
+            "errors": sorted(self.errors, key=lambda error: error["line"]),  # Assignees are checked per chunk
+            "errors_truncated": self.failed > len(self.errors),
+        }
@@ -0,0 +1,248 @@
+"""Archiving done tasks: live working set, query times as history grows, include_archived, restore.
+
+Simulates --months of history. Each month adds --per-month tasks over --projects projects (95%
+done), then time moves on 31 days and the archive_tasks job runs (TASK_ARCHIVE_AFTER_DAYS=30).
+After each month the hot queries are timed against the live table and against live + archive
+(include_archived), which is what every query would cost without the split:
+
+  admin todo list     GET /projects/{id}/tasks?status=todo, first page
+  member task list    GET /projects/{id}/tasks as a member, first page
+  member projects     GET /projects as a member (semi-join over their tasks)
+
+Then checks, over HTTP: stats unchanged by archiving, include_archived pages through every task
+exactly once, archived tasks answer PATCH with 409, restore bumps the version and brings the
+task back, access and listings for a member whose tasks are all archived, the periodic job is
+queued once, archiving a whole project (POST /projects/{id}/archive) including the newest task,
+new task ids never reusing archived ones (a restore onto a reused id is a 409), and deleting a
+project purges its archive too.
+
+Run from backend/:  python -m bench.archive_check --months 12 --per-month 20000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "novavantix_archive.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["ADMISSION_CONTROL"] = "false"
+os.environ["TASK_ARCHIVE_AFTER_DAYS"] = "30"
+os.environ["MAX_PAGE_SIZE"] = "1000000"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+import httpx
+from sqlalchemy import delete, func, insert, select, text, update
+
+from app.db import AsyncSessionLocal, Base, SessionLocal, async_engine, engine
+from app.jobs import PERIODIC_JOBS, JobWorker, enqueue
+from app.main import app, create_access_token
+from app.models import ArchivedTask, Job, Project, Task, User
+from app.pagination import keyset_page
+from app.queries import project_list_query, task_columns, task_list_query, task_source
+from app.stats import rebuild_stats
+
+failures = []
+
+def check(label: str, ok: bool, detail: str = ""):
+    print(f"{'PASS' if ok else 'FAIL'}  {label}{f'  ({detail})' if detail else ''}")
+    if not ok:
+        failures.append(label)
+
+def setup_database(projects: int):
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": 1, "name": "Admin", "email": "admin@bench.test", "password_hash": "x", "role": "admin"},
+            {"id": 2, "name": "Member", "email": "member@bench.test", "password_hash": "x", "role": "member"},
+            {"id": 3, "name": "Former member", "email": "former@bench.test", "password_hash": "x", "role": "member"},
+        ])
+        conn.execute(insert(Project), [{"id": i, "name": f"Project {i}", "version": 1} for i in range(1, projects + 1)])
+
+def add_month(month: int, per_month: int, projects: int, rng: random.Random):
+    stamp = datetime.now(timezone.utc) - timedelta(days=1)
+    rows = [
+        {"project_id": rng.randint(1, projects), "title": f"Month {month} task {i}", "status": "done" if rng.random() < 0.95 else rng.choice(("todo", "in_progress")),
+         "assignee_user_id": rng.choice((1, 2, 2)), "version": 1, "created_at": stamp, "updated_at": stamp}
+        for i in range(per_month)
+    ]
+    if month == 1:
+        # The former member's only tasks, all done: archived after the first month
+        rows += [{"project_id": projects, "title": f"Former {i}", "status": "done", "assignee_user_id": 3, "version": 1, "created_at": stamp, "updated_at": stamp}
+                 for i in range(20)]
+    with engine.begin() as conn:
+        conn.execute(insert(Task), rows)
+        conn.execute(text("UPDATE tasks SET created_at = datetime(created_at, '-31 days'), updated_at = datetime(updated_at, '-31 days')"))
+
+async def timed(query, repeat: int = 15) -> float:
+    samples = []
+    async with AsyncSessionLocal() as db:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            (await db.execute(query)).all()
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+async def hot_queries(include_archived: bool) -> list:
+    source = task_source(include_archived)
+    return [
+        await timed(keyset_page(task_list_query(1, status="todo", columns=task_columns(source), source=source), source.id, 100)),
+        await timed(keyset_page(task_list_query(1, member_id=2, columns=task_columns(source), source=source), source.id, 100)),
+        await timed(keyset_page(project_list_query("member", 2, include_archived=include_archived), Project.id, 100)),
+    ]
+
+async def counts() -> tuple:
+    async with AsyncSessionLocal() as db:
+        live = (await db.execute(select(func.count()).select_from(Task))).scalar_one()
+        archived = (await db.execute(select(func.count()).select_from(ArchivedTask))).scalar_one()
+    return live, archived
+
+async def archive(worker: JobWorker):
+    async with AsyncSessionLocal() as db:
+        await enqueue(db, "archive_tasks", 0)
+        await db.commit()
+    await worker.run_next()
+
+def client(email: str) -> httpx.AsyncClient:
+    token = create_access_token({"sub": email}, timedelta(hours=1))
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", headers={"Authorization": f"Bearer {token}"})
+
+async def walk(http: httpx.AsyncClient, path: str, **params) -> list:
+    ids, cursor = [], None
+    while True:
+        response = await http.get(path, params={**params, "limit": 500, **({"cursor": cursor} if cursor else {})})
+        ids += [row["id"] for row in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return ids
+
+async def run(args):
+    worker = JobWorker(batch_pause=0)
+    rng = random.Random(1)
+    print(f"{'month':>5}{'history':>9}{'live':>8}{'archived':>10}   {'admin todo':>16}{'member tasks':>16}{'member projects':>18}")
+    print(f"{'':>35}{'ms live/+archive':>22}")
+    try:
+        for month in range(1, args.months + 1):
+            add_month(month, args.per_month, args.projects, rng)
+            await archive(worker)
+            live, archived = await counts()
+            hot, cold = await hot_queries(False), await hot_queries(True)
+            cells = "".join(f"{f'{a:.2f}/{b:.2f}':>16}" for a, b in zip(hot, cold))
+            print(f"{month:>5}{live + archived:>9}{live:>8}{archived:>10}   {cells}")
+        live, archived = await counts()
+        check("live table stays near one month of tasks", live < 2 * args.per_month, f"{live} live, {archived} archived")
+        async with client("admin@bench.test") as admin, client("former@bench.test") as former:
+            await checks(admin, former, worker, args)
+    finally:
+        await async_engine.dispose()
+
+async def checks(admin, former, worker: JobWorker, args):
+    print()
+    with SessionLocal() as db:
+        rebuild_stats(db)
+    before = (await admin.get("/projects/1/stats")).json()
+    async with AsyncSessionLocal() as db:
+        # Fresh done tasks, aged past the cutoff, to archive with stats in place
+        await db.execute(text("UPDATE tasks SET updated_at = datetime(updated_at, '-62 days') WHERE status = 'done'"))
+        await db.commit()
+    await archive(worker)
+    check("stats unchanged by archiving", (await admin.get("/projects/1/stats")).json() == before, str(before["by_status"]))
+    async with AsyncSessionLocal() as db:
+        live_ids = set((await db.execute(select(Task.id).where(Task.project_id == 1))).scalars())
+        archived_ids = set((await db.execute(select(ArchivedTask.id).where(ArchivedTask.project_id == 1))).scalars())
+        archived_task = (await db.execute(select(ArchivedTask).where(ArchivedTask.project_id == 1).limit(1))).scalars().first()
+
+    default_ids = await walk(admin, "/projects/1/tasks")
+    all_ids = await walk(admin, "/projects/1/tasks", include_archived="true")
+    check("listing leaves archived tasks out by default", set(default_ids) == live_ids)
+    check("include_archived pages through every task once, in id order", all_ids == sorted(live_ids | archived_ids), f"{len(all_ids)} tasks")
+    plain = await admin.get("/projects/1/tasks", params={"limit": 10})
+    with_archive = await admin.get("/projects/1/tasks", params={"limit": 10, "include_archived": "true"})
+    check("ETags differ with include_archived", plain.headers["etag"] != with_archive.headers["etag"])
+    exported = (await admin.get("/projects/1/tasks/export", params={"include_archived": "true"})).content.count(b"\n")
+    check("export takes include_archived", exported == len(all_ids), str(exported))
+
+    version = archived_task.version
+    response = await admin.patch(f"/tasks/{archived_task.id}", json={"title": "Edited", "version": version})
+    check("PATCH on an archived task is a 409", response.status_code == 409 and "archived" in response.json()["detail"], response.text)
+    restored = await admin.post(f"/tasks/{archived_task.id}/restore")
+    check("restore brings the task back with its version bumped", restored.status_code == 200 and restored.json()["version"] == version + 1, restored.text[:120])
+    check("restored task is listed again", archived_task.id in await walk(admin, "/projects/1/tasks"))
+    stale = await admin.patch(f"/tasks/{archived_task.id}", json={"title": "Edited", "version": version})
+    fresh = await admin.patch(f"/tasks/{archived_task.id}", json={"title": "Edited", "version": version + 1})
+    check("stale versions conflict after a restore, current ones apply", stale.status_code == 409 and fresh.status_code == 200)
+    await archive(worker)
+    async with AsyncSessionLocal() as db:
+        check("a restored task isn't archived again straight away", await db.get(Task, archived_task.id) is not None)
+
+    projects = lambda response: {project["id"] for project in response.json()} if response.status_code == 200 else set()
+    default_listing = projects(await former.get("/projects"))
+    archived_listing = projects(await former.get("/projects", params={"include_archived": "true"}))
+    check("member whose tasks are all archived: listed only with include_archived", args.projects not in default_listing and args.projects in archived_listing)
+    check("... and keeps access to the project", (await former.get(f"/projects/{args.projects}")).status_code == 200)
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("DELETE FROM jobs WHERE kind = 'archive_tasks'"))
+        await db.commit()
+    await worker.schedule_periodic()
+    await worker.schedule_periodic()
+    async with AsyncSessionLocal() as db:
+        queued = (await db.execute(select(func.count()).select_from(Job).where(Job.kind == "archive_tasks"))).scalar_one()
+    check("archive_tasks is periodic and queued once", "archive_tasks" in PERIODIC_JOBS and queued == 1, f"{queued} queued")
+    await worker.run_next()
+
+    async with AsyncSessionLocal() as db:
+        # Make project 2 hold the newest task, which must be archived like any other
+        await db.execute(update(Task).where(Task.id == select(func.max(Task.id)).scalar_subquery()).values(project_id=2))
+        await db.commit()
+        before = (await db.execute(select(func.count()).select_from(Task).where(Task.project_id == 2))).scalar_one()
+    response = await admin.post("/projects/2/archive")
+    await worker.run_next()
+    job = (await admin.get(f"/jobs/{response.json()['id']}")).json()
+    async with AsyncSessionLocal() as db:
+        left = (await db.execute(select(func.count()).select_from(Task).where(Task.project_id == 2))).scalar_one()
+    listed = await walk(admin, "/projects/2/tasks", include_archived="true")
+    check("archiving a project moves all its tasks in batches", response.status_code == 202 and job["status"] == "done" and job["progress"] == before and left == 0,
+          f"{job['progress']} moved, {left} left")
+    check("... which stay listed with include_archived", len(listed) >= before)
+
+    # With the highest ids archived and the live ones deleted, new ids still go past them
+    async with AsyncSessionLocal() as db:
+        highest_archived = (await db.execute(select(func.max(ArchivedTask.id)))).scalar_one()
+        await db.execute(delete(Task).where(Task.id > highest_archived - 1000))
+        await db.commit()
+    created = (await admin.post("/projects/3/tasks", json={"title": "After the archive", "assignee_user_id": 1})).json()
+    check("new tasks never reuse an archived task's id", created["id"] > highest_archived, f"{created['id']} after {highest_archived}")
+    async with AsyncSessionLocal() as db:
+        # Only a database that reuses ids could get here; the restore must say so, not fail
+        await db.execute(text("INSERT INTO tasks (id, project_id, title, status, assignee_user_id, version, created_at) "
+                              "VALUES (:id, 3, 'Reused id', 'todo', 1, 1, CURRENT_TIMESTAMP)"), {"id": highest_archived})
+        await db.commit()
+    response = await admin.post(f"/tasks/{highest_archived}/restore")
+    check("restoring onto a reused id is a 409", response.status_code == 409, f"{response.status_code} {response.text[:80]}")
+
+    await admin.delete(f"/projects/{args.projects}")
+    await worker.run_next()
+    async with AsyncSessionLocal() as db:
+        left = (await db.execute(select(func.count()).select_from(ArchivedTask).where(ArchivedTask.project_id == args.projects))).scalar_one()
+    check("deleting a project purges its archived tasks", left == 0, f"{left} left")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--per-month", type=int, default=20000)
+    parser.add_argument("--projects", type=int, default=20)
+    args = parser.parse_args()
+    setup_database(args.projects)
+    asyncio.run(run(args))
+    if failures:
+        sys.exit(f"{len(failures)} check(s) failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Concurrent throughput of the blocking Session path vs the AsyncSession path.
+
+Both routes run the same task-list query behind an artificial per-query delay
+(``sleep_ms``) that stands in for a slow MySQL round-trip. The "before" route
+uses ``get_db`` inside an ``async def`` handler the way main.py used to, so every
+query blocks the event loop; the "after" route uses ``get_async_db``.
+
+Keep --concurrency below the sync pool size (5 + 10 overflow): past that the
+"before" route deadlocks, because the loop is stuck in a pool checkout and can't
+run the threadpool teardown that would return a connection.
+
+Run from backend/:  python -m bench.async_db_bench --requests 200 --concurrency 10 --query-ms 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "novavantix_async_bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db import Base, SessionLocal, async_engine, engine, get_async_db, get_db
+from app.models import Project, Task, User
+
+QUERY_MS = 20
+
+def _sleep_ms(ms):
+    time.sleep(ms / 1000)
+    return ms
+
+@event.listens_for(engine, "connect")
+def _register_sleep_sync(dbapi_connection, connection_record):
+    dbapi_connection.create_function("sleep_ms", 1, _sleep_ms)
+
+@event.listens_for(async_engine.sync_engine, "connect")
+def _register_sleep_async(dbapi_connection, connection_record):
+    dbapi_connection.create_function("sleep_ms", 1, _sleep_ms)
+
+bench_app = FastAPI()
+
+@bench_app.get("/before/{project_id}")
+async def blocking_tasks(project_id: int, db: Session = Depends(get_db)):
+    db.execute(select(func.sleep_ms(QUERY_MS)))
+    return db.execute(select(Task.id).where(Task.project_id == project_id)).scalars().all()
+
+@bench_app.get("/after/{project_id}")
+async def async_tasks(project_id: int, db: AsyncSession = Depends(get_async_db)):
+    await db.execute(select(func.sleep_ms(QUERY_MS)))
+    return (await db.execute(select(Task.id).where(Task.project_id == project_id))).scalars().all()
+
+def setup_database(tasks: int):
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    try:
+        user = User(name="Bench", email="bench@demo.test", password_hash="x", role="member")
+        project = Project(name="Bench Project")
+        db.add_all([user, project])
+        db.flush()
+        db.add_all([Task(project_id=project.id, title=f"Task {i}", assignee_user_id=user.id, version=1) for i in range(tasks)])
+        db.commit()
+        return project.id
+    finally:
+        db.close()
+
+async def run(path: str, requests: int, concurrency: int):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=bench_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+async def compare(project_id: int, requests: int, concurrency: int):
+    try:
+        for label in ("before", "after"):
+            result = await run(f"/{label}/{project_id}", requests, concurrency)
+            print(f"{label:>6}: {result['rps']:8.1f} req/s   p50 {result['p50']:8.1f} ms   p99 {result['p99']:8.1f} ms")
+    finally:
+        await async_engine.dispose()
+
+def main():
+    global QUERY_MS
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--query-ms", type=int, default=20)
+    parser.add_argument("--tasks", type=int, default=100)
+    args = parser.parse_args()
+    QUERY_MS = args.query_ms
+
+    project_id = setup_database(args.tasks)
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {args.query_ms} ms per query")
+    asyncio.run(compare(project_id, args.requests, args.concurrency))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Synthetic dataset for the load tests, sized by a single --scale factor.
+
+At scale 1: 2 admins, 50 members, 200 projects and 10,000 tasks. Every count grows
+linearly with the scale, so `--scale 100` gives 1M tasks. The target's tables are
+dropped and recreated, then filled by app.bulk_seed under run id "load-<seed>", so the
+data is identical for a given --seed and load-test runs stay comparable.
+
+Every user's password is PASSWORD; see email() for the logins.
+
+Run from backend/:  python -m bench.datagen --database-url sqlite:////tmp/load.db --scale 5
+"""
+import argparse
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")  # app.db needs one; generate() uses its own engine
+
+from sqlalchemy import create_engine
+
+from app.bulk_seed import DEFAULT_PASSWORD as PASSWORD, seed_run, user_email
+from app.db import Base
+
+RUN_ID = "load-{seed}"
+
+def dataset_size(scale: float) -> dict:
+    return {
+        "admins": 2,
+        "members": max(1, int(50 * scale)),
+        "projects": max(1, int(200 * scale)),
+        "tasks": max(1, int(10000 * scale)),
+    }
+
+def email(role: str, n: int, seed: int = 1) -> str:
+    return user_email(RUN_ID.format(seed=seed), role, n)
+
+def generate(database_url: str, scale: float, seed: int = 1) -> dict:
+    size = dataset_size(scale)
+    users = size["admins"] + size["members"]
+    engine = create_engine(database_url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    seed_run(
+        engine, RUN_ID.format(seed=seed), users=users, projects=size["projects"], tasks=size["tasks"],
+        admin_ratio=size["admins"] / users, task_distribution="uniform", assignee_distribution="uniform", password=PASSWORD,
+    )
+    engine.dispose()
+    return size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="Target database; its tables are dropped and recreated")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    size = generate(args.database_url, args.scale, args.seed)
+    print(f"Generated {size} in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
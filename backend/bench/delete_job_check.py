@@ -0,0 +1,166 @@
+"""Background project deletion: 202 at once, batched purge, resume after a crash.
+
+  - DELETE /projects/{id} answers 202 with a job, without touching the tasks; the project is
+    gone from GET, the listing and search straight away, its tasks answer PATCH with 404, and
+    deleting again returns the same job
+  - a worker in a child process starts the purge and is killed (SIGKILL) part way through;
+    a second worker claims the job once its lease lapses and finishes it
+  - afterwards no task, counter or project row is left, and progress equals the task count
+  - reads of another project keep their latency while the purge runs; the mean purge
+    transaction is compared with deleting the same number of tasks in one transaction
+
+Run from backend/:  python -m bench.delete_job_check --tasks 50000
+"""
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "novavantix_delete_job.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["ADMISSION_CONTROL"] = "false"
+os.environ["JOB_LEASE_SECONDS"] = "2"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+import httpx
+from sqlalchemy import delete, func, insert, select
+
+from app.db import AsyncSessionLocal, Base, SessionLocal, async_engine, engine
+from app.jobs import JobWorker, job_batch_seconds
+from app.models import Job, Project, ProjectTaskCount, Task, User
+from app.stats import rebuild_stats
+
+failures = []
+
+def check(label: str, ok: bool, detail: str = ""):
+    print(f"{'PASS' if ok else 'FAIL'}  {label}{f'  ({detail})' if detail else ''}")
+    if not ok:
+        failures.append(label)
+
+def setup_database(tasks: int):
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": 1, "name": "Admin", "email": "admin@bench.test", "password_hash": "x", "role": "admin"}])
+        conn.execute(insert(Project), [
+            {"id": 1, "name": "Doomed project", "version": 1},
+            {"id": 2, "name": "Busy project", "version": 1},
+            {"id": 3, "name": "Single transaction project", "version": 1},
+        ])
+        for project_id, count in ((1, tasks), (2, 500), (3, tasks)):
+            conn.execute(insert(Task), [
+                {"project_id": project_id, "title": f"Task {i}", "status": ("todo", "in_progress", "done")[i % 3], "assignee_user_id": 1, "version": 1}
+                for i in range(count)
+            ])
+    with SessionLocal() as db:
+        rebuild_stats(db)
+    engine.dispose()
+
+async def job_row(job_id: int) -> Job:
+    async with AsyncSessionLocal() as db:
+        return await db.get(Job, job_id) # type: ignore
+
+async def run_crash_worker(batch_size: int):
+    worker = JobWorker(batch_size=batch_size, batch_pause=0.01, poll_interval=0.1)
+    while True:
+        if not await worker.run_next():
+            await asyncio.sleep(0.1)
+
+async def run(tasks: int, batch_size: int):
+    from app.main import app, create_access_token
+    token = create_access_token({"sub": "admin@bench.test"}, timedelta(hours=1))
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                                     headers={"Authorization": f"Bearer {token}"}) as admin:
+            await checks(admin, tasks, batch_size)
+    finally:
+        await async_engine.dispose()
+
+async def checks(admin, tasks: int, batch_size: int):
+    await admin.get("/projects/1")
+    start = time.perf_counter()
+    response = await admin.delete("/projects/1")
+    elapsed = (time.perf_counter() - start) * 1000
+    job = response.json()
+    check("DELETE answers 202 with a queued job", response.status_code == 202 and job["status"] == "queued" and response.headers["location"] == f"/jobs/{job['id']}",
+          f"{response.status_code} in {elapsed:.1f} ms")
+    listed = {project["id"] for project in (await admin.get("/projects")).json()}
+    hidden = (await admin.get("/projects/1")).status_code == 404 and (await admin.get("/projects/1/tasks")).status_code == 404
+    check("the project is gone from the API at once", hidden and 1 not in listed and (await admin.get("/projects", params={"q": "doomed"})).status_code == 404)
+    again = (await admin.delete("/projects/1")).json()
+    check("deleting again returns the same job", again["id"] == job["id"])
+    async with AsyncSessionLocal() as db:
+        doomed_task = (await db.execute(select(Task).where(Task.project_id == 1).limit(1))).scalars().first()
+    patched = await admin.patch(f"/tasks/{doomed_task.id}", json={"title": "Edited", "version": doomed_task.version})
+    batch = await admin.patch("/tasks/batch", json={"items": [{"id": doomed_task.id, "title": "Edited", "version": doomed_task.version}]})
+    check("its tasks can't be edited while the purge runs", patched.status_code == 404 and batch.json()[0]["status_code"] == 404,
+          f"{patched.status_code}, batch {batch.json()[0]['status_code']}")
+
+    child = subprocess.Popen([sys.executable, "-m", "bench.delete_job_check", "--crash-worker", "--batch-size", str(batch_size)],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    while (await job_row(job["id"])).progress < tasks // 3:
+        await asyncio.sleep(0.05)
+    child.send_signal(signal.SIGKILL)
+    child.wait()
+    crashed = await job_row(job["id"])
+    print(f"\nworker killed at {crashed.progress}/{tasks} tasks, job left {crashed.status}")
+
+    worker = JobWorker(batch_size=batch_size, batch_pause=0.01, poll_interval=0.2)
+    latencies = []
+    start = time.perf_counter()
+    worker.start()
+    while (await job_row(job["id"])).status != "done" and time.perf_counter() - start < 300:
+        request_start = time.perf_counter()
+        await admin.get("/projects/2/tasks", params={"limit": 50})
+        latencies.append(time.perf_counter() - request_start)
+        await asyncio.sleep(0.02)
+    await worker.stop()
+    finished = (await admin.get(f"/jobs/{job['id']}")).json()
+    print(f"resumed and finished in {time.perf_counter() - start:.1f}s (lease 2s), {len(latencies)} reads of another project meanwhile")
+    check("a second worker resumes the job after the lease lapses", finished["status"] == "done" and finished["attempts"] == 2, str(finished))
+    check("progress counts every task exactly once", finished["progress"] == tasks, f"{finished['progress']}")
+
+    async with AsyncSessionLocal() as db:
+        left_tasks = (await db.execute(select(func.count()).select_from(Task).where(Task.project_id == 1))).scalar_one()
+        left_counts = (await db.execute(select(func.count()).select_from(ProjectTaskCount).where(ProjectTaskCount.project_id == 1))).scalar_one()
+        project = await db.get(Project, 1)
+        other = (await db.execute(select(func.count()).select_from(Task).where(Task.project_id == 2))).scalar_one()
+    check("no tasks, counters or project row left", left_tasks == 0 and left_counts == 0 and project is None, f"{left_tasks} tasks, {left_counts} counters")
+    check("other projects untouched", other == 500)
+
+    batches = job_batch_seconds.values.get(("delete_project",))
+    longest = max(latencies) * 1000
+    p50 = statistics.median(latencies) * 1000
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        await db.execute(delete(Task).where(Task.project_id == 3))
+        await db.commit()
+        single = (time.perf_counter() - start) * 1000
+    mean_batch = batches[1] / sum(batches[0]) * 1000 if batches else 0 # type: ignore
+    print(f"\nreads during purge: p50 {p50:.1f} ms, max {longest:.1f} ms")
+    print(f"purge batches of {batch_size}: mean {mean_batch:.1f} ms each; one transaction for {tasks} tasks: {single:.0f} ms")
+    check("purge transactions are short", mean_batch < single / 10)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=50000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--crash-worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.crash_worker:
+        asyncio.run(run_crash_worker(args.batch_size))
+        return
+    setup_database(args.tasks)
+    asyncio.run(run(args.tasks, args.batch_size))
+    if failures:
+        sys.exit(f"{len(failures)} check(s) failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""Load test of the API: mixed workload, per-endpoint latency percentiles and throughput.
+
+By default a dataset is generated (bench.datagen) into a temporary SQLite file and
+uvicorn is started on it; --database-url points both at another database (a local
+MySQL, say), and --url drives a server that is already running on a generated dataset.
+
+Each virtual user logs in, then picks operations by weight until the run ends:
+
+  POST /auth/login               re-login (full bcrypt verify)
+  GET /projects                  first page of the caller's projects
+  GET /projects?q=               project search
+  GET /projects/{id}/tasks       with random status / assignee filters, following one cursor page
+  PATCH /tasks/{id}              status change on a small hot set of tasks shared by every
+                                 virtual user, so versions collide; 409s are expected and are
+                                 counted as conflicts, not errors
+
+Latencies from the first --warmup seconds are discarded. The run is reproducible for a
+given --seed, apart from scheduling. --save-baseline writes the results as JSON;
+--baseline compares p50/p95/p99 and throughput per endpoint against such a file and
+exits 1 if any endpoint is worse by more than --tolerance. Tail percentiles with fewer
+than MIN_TAIL_SAMPLES samples above them are shown (marked ~) but don't fail the run;
+run longer to gate on p99.
+
+Run from backend/:
+  python -m bench.loadtest --scale 1 --users 40 --duration 30 --save-baseline /tmp/baseline.json
+  python -m bench.loadtest --scale 1 --users 40 --duration 30 --baseline /tmp/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from bench import datagen  # Sets DATABASE_URL before app is imported
+from app.bulk_seed import STATUSES, WORDS
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DB = os.path.join(tempfile.gettempdir(), "novavantix_loadtest.db")
+SERVER_LOG = os.path.join(tempfile.gettempdir(), "novavantix_loadtest_server.log")
+WEIGHTS = {"login": 2, "projects": 20, "search": 8, "tasks": 45, "patch": 25}
+HOT_TASKS = 20
+# Non-2xx statuses that are a normal outcome, not an error: version conflicts, and searches with no match
+EXPECTED = {"PATCH /tasks/{id}": {409}, "GET /projects?q=": {404}}
+METRICS = ("p50_ms", "p95_ms", "p99_ms")
+MIN_TAIL_SAMPLES = 10  # A percentile only gates the comparison if at least this many samples lie above it
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.codes: Dict[str, Counter] = defaultdict(Counter)
+        self.enabled = False
+
+    def record(self, endpoint: str, status_code: int, seconds: float):
+        if self.enabled:
+            self.samples[endpoint].append(seconds)
+            self.codes[endpoint][status_code] += 1
+
+    def summary(self, elapsed: float) -> dict:
+        endpoints = {}
+        for endpoint, samples in sorted(self.samples.items()):
+            samples.sort()
+            codes = self.codes[endpoint]
+            expected = EXPECTED.get(endpoint, set())
+            errors = sum(count for code, count in codes.items() if not (200 <= code < 400 or code in expected))
+            endpoints[endpoint] = {
+                "requests": len(samples),
+                "errors": errors,
+                "conflicts": codes.get(409, 0),
+                "rps": round(len(samples) / elapsed, 1),
+                **{metric: round(percentile(samples, int(metric[1:3])) * 1000, 2) for metric in METRICS},
+                "status_codes": {str(code): count for code, count in sorted(codes.items())},
+            }
+        return endpoints
+
+def percentile(ordered: List[float], pct: int) -> float:
+    # Nearest-rank percentile
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, size: dict, seed: int):
+        self.client = client
+        self.size = size
+        self.seed = seed
+        self.recorder = Recorder()
+        self.versions: Dict[int, int] = {}  # Hot task id -> newest version seen
+        self.admin_token: Optional[str] = None
+
+    async def call(self, endpoint: str, method: str, url: str, token: Optional[str] = None, **kwargs) -> Optional[httpx.Response]:
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=headers, **kwargs)
+        except httpx.HTTPError:
+            self.recorder.record(endpoint, 0, time.perf_counter() - start)
+            return None
+        self.recorder.record(endpoint, response.status_code, time.perf_counter() - start)
+        return response
+
+    async def login(self, email: str) -> Optional[str]:
+        response = await self.call("POST /auth/login", "POST", "/auth/login", data={"email": email, "password": datagen.PASSWORD})
+        return response.json()["access_token"] if response is not None and response.status_code == 200 else None
+
+    async def setup(self):
+        admin = datagen.email("admin", 1, self.seed)
+        self.admin_token = await self.login(admin)
+        if self.admin_token is None:
+            raise SystemExit(f"Could not log in as {admin}; was the dataset made by bench.datagen with this --seed?")
+        response = await self.client.get("/projects/1/tasks", params={"limit": HOT_TASKS}, headers={"Authorization": f"Bearer {self.admin_token}"})
+        self.versions = {task["id"]: task["version"] for task in response.json()}
+
+    async def virtual_user(self, index: int, deadline: float):
+        rng = random.Random(self.seed * 1000 + index)
+        # One in ten virtual users is an admin, the rest are members
+        is_admin = index % 10 == 0
+        email = datagen.email("admin", index % self.size["admins"] + 1, self.seed) if is_admin else datagen.email("member", index % self.size["members"] + 1, self.seed)
+        token = await self.login(email)
+        if token is None:
+            return
+        response = await self.call("GET /projects", "GET", "/projects", token)
+        visible = [project["id"] for project in response.json()] if response is not None and response.status_code == 200 else []
+        operations, weights = zip(*WEIGHTS.items())
+
+        while time.perf_counter() < deadline:
+            operation = rng.choices(operations, weights)[0]
+            if operation == "login":
+                token = await self.login(email) or token
+            elif operation == "projects":
+                await self.call("GET /projects", "GET", "/projects", token)
+            elif operation == "search":
+                await self.call("GET /projects?q=", "GET", "/projects", token, params={"q": rng.choice(WORDS)[:rng.randint(3, 6)]})
+            elif operation == "tasks":
+                project_id = rng.randint(1, self.size["projects"]) if is_admin or not visible else rng.choice(visible)
+                params = {"limit": 50}
+                if rng.random() < 0.5:
+                    params["status"] = rng.choice(STATUSES)
+                if is_admin and rng.random() < 0.3:
+                    params["assignee"] = rng.randint(self.size["admins"] + 1, self.size["admins"] + self.size["members"])
+                response = await self.call("GET /projects/{id}/tasks", "GET", f"/projects/{project_id}/tasks", token, params=params)
+                cursor = response.headers.get("x-next-cursor") if response is not None else None
+                if cursor:
+                    await self.call("GET /projects/{id}/tasks", "GET", f"/projects/{project_id}/tasks", token, params={**params, "cursor": cursor})
+            elif operation == "patch" and self.versions:
+                task_id = rng.choice(list(self.versions))
+                body = {"status": rng.choice(STATUSES), "version": self.versions[task_id]}
+                response = await self.call("PATCH /tasks/{id}", "PATCH", f"/tasks/{task_id}", self.admin_token, json=body)
+                if response is not None and response.status_code == 200:
+                    self.versions[task_id] = max(self.versions[task_id], response.json()["version"])
+
+    async def run(self, users: int, duration: float, warmup: float) -> dict:
+        await self.setup()
+        start = time.perf_counter()
+        deadline = start + warmup + duration
+        workers = [asyncio.create_task(self.virtual_user(index, deadline)) for index in range(users)]
+        await asyncio.sleep(warmup)
+        self.recorder.enabled = True
+        measured_from = time.perf_counter()
+        await asyncio.gather(*workers)
+        return self.recorder.summary(time.perf_counter() - measured_from)
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(database_url: str, port: int, workers: int) -> subprocess.Popen:
+    env = {**os.environ, "DATABASE_URL": database_url, "SECRET_KEY": os.getenv("SECRET_KEY", "loadtest")}
+    with open(SERVER_LOG, "w") as log:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+            cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+    for _ in range(300):
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        if server.poll() is not None:
+            raise SystemExit(f"uvicorn exited with {server.returncode}, see {SERVER_LOG}")
+        time.sleep(0.1)
+    server.terminate()
+    raise SystemExit("uvicorn did not become healthy within 30s")
+
+def compare(endpoints: dict, baseline: dict, tolerance: float) -> List[str]:
+    regressions = []
+    print(f"\nvs baseline ({baseline['meta']['created']}), tolerance {tolerance:.0%}:")
+    for endpoint, base in baseline["endpoints"].items():
+        current = endpoints.get(endpoint)
+        if current is None:
+            regressions.append(f"{endpoint}: no requests this run")
+            continue
+        changes = []
+        samples = min(base["requests"], current["requests"])
+        for metric in METRICS + ("rps",):
+            before, after = base[metric], current[metric]
+            change = (after - before) / before if before else 0.0
+            # Latency going up or throughput going down is a regression; a tail percentile
+            # backed by only a few samples is reported but too noisy to fail the run
+            gated = metric == "rps" or samples * (1 - int(metric[1:3]) / 100) >= MIN_TAIL_SAMPLES
+            worse = gated and (change > tolerance if metric != "rps" else change < -tolerance)
+            changes.append(f"{metric} {before:g} -> {after:g} ({change:+.0%}){' !' if worse else '' if gated else ' ~'}")
+            if worse:
+                regressions.append(f"{endpoint} {metric} {change:+.0%}")
+        print(f"  {endpoint:<26} " + ", ".join(changes))
+    return regressions
+
+def print_table(endpoints: dict):
+    print(f"\n{'endpoint':<26}{'requests':>9}{'errors':>8}{'409s':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for endpoint, stats in endpoints.items():
+        print(f"{endpoint:<26}{stats['requests']:>9}{stats['errors']:>8}{stats['conflicts']:>7}{stats['rps']:>9}"
+              f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}")
+
+async def drive(base_url: str, args, size: dict) -> dict:
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        return await LoadTest(client, size, args.seed).run(args.users, args.duration, args.warmup)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Drive this running server instead of starting one")
+    parser.add_argument("--database-url", default=f"sqlite:///{DEFAULT_DB}")
+    parser.add_argument("--scale", type=float, default=1.0, help="Dataset scale, see bench.datagen")
+    parser.add_argument("--skip-datagen", action="store_true", help="Reuse the dataset already in --database-url")
+    parser.add_argument("--server-workers", type=int, default=1)
+    parser.add_argument("--users", type=int, default=40, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write this run's results as JSON")
+    parser.add_argument("--save-baseline", help="Write this run's results as the baseline file")
+    parser.add_argument("--baseline", help="Compare against this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    size = datagen.dataset_size(args.scale)
+    server = None
+    if args.url:
+        base_url = args.url
+    else:
+        if not args.skip_datagen:
+            datagen.generate(args.database_url, args.scale, args.seed)
+        port = free_port()
+        server = start_server(args.database_url, port, args.server_workers)
+        base_url = f"http://127.0.0.1:{port}"
+    try:
+        endpoints = asyncio.run(drive(base_url, args, size))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    results = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "scale": args.scale, "users": args.users, "duration": args.duration,
+            "server_workers": args.server_workers, "database": args.url or args.database_url.split("://")[0],
+        },
+        "endpoints": endpoints,
+    }
+    print_table(endpoints)
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as out:
+            json.dump(results, out, indent=2)
+        print(f"\nWrote {path}")
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(endpoints, json.load(baseline_file), args.tolerance)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\nNo regressions beyond tolerance.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Latency of an unrelated endpoint while a burst of logins is verifying passwords.
+
+The "before" run verifies bcrypt inline on the event loop, as login used to; the
+"after" run goes through app.passwords, which runs bcrypt in the bounded worker pool.
+While the storm is in flight, /ping is probed on a fixed 10 ms schedule; its latency is
+measured from the scheduled send time, so time the event loop spent stalled counts.
+
+Run from backend/:  python -m bench.login_storm_bench --logins 40 --probes 40
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("BCRYPT_ROUNDS", "10")
+
+import httpx
+from fastapi import FastAPI, Form, HTTPException
+
+from app.passwords import pwd_context, shutdown_executor, verify_and_update_password
+
+PASSWORD = "Passw0rd!"
+STORED_HASH = pwd_context.hash(PASSWORD)
+
+bench_app = FastAPI()
+
+@bench_app.post("/before/login")
+async def inline_login(password: str = Form(...)):
+    if not pwd_context.verify(password, STORED_HASH):
+        raise HTTPException(status_code=401)
+    return {"ok": True}
+
+@bench_app.post("/after/login")
+async def pooled_login(password: str = Form(...)):
+    verified, _ = await verify_and_update_password(password, STORED_HASH)
+    if not verified:
+        raise HTTPException(status_code=401)
+    return {"ok": True}
+
+@bench_app.get("/ping")
+async def ping():
+    return {"ok": True}
+
+async def storm(label: str, logins: int, probes: int):
+    transport = httpx.ASGITransport(app=bench_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        async def login():
+            start = time.perf_counter()
+            response = await client.post(f"/{label}/login", data={"password": PASSWORD})
+            return response.status_code, time.perf_counter() - start
+
+        async def probe(first: float):
+            latencies = []
+            for i in range(probes):
+                scheduled = first + i * 0.01
+                await asyncio.sleep(max(0, scheduled - time.perf_counter()))
+                await client.get("/ping")
+                latencies.append(time.perf_counter() - scheduled)
+            return latencies
+
+        start = time.perf_counter()
+        login_results, ping_latencies = await asyncio.gather(
+            asyncio.gather(*(login() for _ in range(logins))), probe(start)
+        )
+        elapsed = time.perf_counter() - start
+    ok = sum(1 for code, _ in login_results if code == 200)
+    login_p50 = statistics.median(t for _, t in login_results) * 1000
+    ping_latencies.sort()
+    print(
+        f"{label:>6}: {ok}/{logins} logins in {elapsed:5.2f}s (p50 {login_p50:7.1f} ms)   "
+        f"/ping p50 {statistics.median(ping_latencies) * 1000:7.1f} ms  max {ping_latencies[-1] * 1000:7.1f} ms"
+    )
+
+async def compare(logins: int, probes: int):
+    try:
+        for label in ("before", "after"):
+            await storm(label, logins, probes)
+    finally:
+        shutdown_executor()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--probes", type=int, default=40)
+    args = parser.parse_args()
+    asyncio.run(compare(args.logins, args.probes))
+
+if __name__ == "__main__":
+    main()
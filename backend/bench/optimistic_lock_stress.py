@@ -0,0 +1,137 @@
+"""Hammer one task with concurrent PATCHes and check that no update is lost.
+
+Every client loops: PATCH with the version it last saw; on 409 it re-reads the
+task and retries. Each 200 must bump the version by exactly one, so at the end
+final_version - 1 must equal the number of successful PATCHes, and no two
+successes may report the same version. Anything else is a lost update.
+
+The "legacy" route replays the old update_task (SELECT, compare in Python,
+UPDATE, refresh); "current" is the real PATCH /tasks/{id}. Statements per
+successful PATCH are counted with an engine event, after auth caches are warm.
+
+Run from backend/:  python -m bench.optimistic_lock_stress --clients 10 --attempts 30
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+from collections import Counter
+from datetime import timedelta
+from typing import Optional
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "novavantix_lock_stress.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+import httpx
+from fastapi import Depends, Header, HTTPException
+from sqlalchemy import event, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import Base, SessionLocal, async_engine, engine, get_async_db
+from app.main import app, create_access_token, get_current_user
+from app.models import Project, Task, User
+from app.schemas import TaskResponse, TaskUpdate
+
+statements = Counter()
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    statements["total"] += 1
+
+async def legacy_update_task(task_id: int, task_update: TaskUpdate, if_match: Optional[str] = Header(None), current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    db_task = await db.get(Task, task_id)
+    if not db_task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    client_version = task_update.version or (int(if_match) if if_match else None)
+    if client_version is None or client_version != db_task.version:
+        raise HTTPException(status_code=409, detail="Stale version - conflict detected")
+    for key, value in task_update.dict(exclude_unset=True).items():
+        if key != "version":
+            setattr(db_task, key, value)
+    db_task.version += 1 # type: ignore
+    db_task.updated_at = func.now() # type: ignore
+    await db.commit()
+    await db.refresh(db_task)
+    return db_task
+
+app.add_api_route("/legacy/tasks/{task_id}", legacy_update_task, methods=["PATCH"], response_model=TaskResponse)
+
+def setup_database():
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    try:
+        admin = User(name="Bench Admin", email="admin@bench.test", password_hash="x", role="admin")
+        project = Project(name="Bench Project")
+        db.add_all([admin, project])
+        db.flush()
+        task = Task(project_id=project.id, title="Contended task", assignee_user_id=admin.id, version=1)
+        db.add(task)
+        db.commit()
+        return project.id, task.id
+    finally:
+        db.close()
+
+async def current_version(client, project_id: int) -> int:
+    response = await client.get(f"/projects/{project_id}/tasks", params={"limit": 1})
+    return response.json()[0]["version"]
+
+async def hammer(client, path: str, project_id: int, clients: int, attempts: int):
+    successes, conflicts, errors = [], 0, 0
+
+    async def worker(client_id: int):
+        nonlocal conflicts, errors
+        version = await current_version(client, project_id)
+        for attempt in range(attempts):
+            response = await client.patch(path, json={"title": f"client {client_id} attempt {attempt}", "version": version})
+            if response.status_code == 200:
+                version = response.json()["version"]
+                successes.append(version)
+            elif response.status_code == 409:
+                conflicts += 1
+                version = await current_version(client, project_id)
+            else:
+                errors += 1
+
+    start_version = await current_version(client, project_id)
+    await asyncio.gather(*(worker(i) for i in range(clients)))
+    final_version = await current_version(client, project_id)
+    duplicates = sum(count - 1 for count in Counter(successes).values() if count > 1)
+    lost = len(successes) - (final_version - start_version)
+    return len(successes), conflicts, errors, lost, duplicates
+
+async def statements_per_patch(client, path: str, project_id: int, samples: int = 20) -> float:
+    version = await current_version(client, project_id)
+    statements.clear()
+    for i in range(samples):
+        response = await client.patch(path, json={"title": f"sequential {i}", "version": version})
+        version = response.json()["version"]
+    return statements["total"] / samples
+
+async def compare(project_id: int, task_id: int, clients: int, attempts: int):
+    token = create_access_token({"sub": "admin@bench.test", "role": "admin"}, timedelta(hours=1))
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers={"Authorization": f"Bearer {token}"}) as client:
+            for label, path in (("legacy", f"/legacy/tasks/{task_id}"), ("current", f"/tasks/{task_id}")):
+                ok, conflicts, errors, lost, duplicates = await hammer(client, path, project_id, clients, attempts)
+                per_patch = await statements_per_patch(client, path, project_id)
+                print(
+                    f"{label:>7}: {ok:4d} ok  {conflicts:4d} conflicts  {errors:3d} errors  "
+                    f"lost updates {lost:3d}  duplicate versions {duplicates:3d}  statements/PATCH {per_patch:.1f}"
+                )
+    finally:
+        await async_engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--attempts", type=int, default=30)
+    args = parser.parse_args()
+    project_id, task_id = setup_database()
+    asyncio.run(compare(project_id, task_id, args.clients, args.attempts))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Goodput past saturation, with admission control off and on.
+
+Requests arrive open-loop at each --rates step (a fixed schedule, like independent clients,
+so a slow server doesn't slow the arrivals down) for --duration seconds:
+
+  88%  GET /projects/{id}/tasks     read, as an admin
+  10%  PATCH /tasks/{id}            write, as an admin
+   2%  POST /auth/login             auth (bcrypt); --logins sets this share, taken from reads
+
+Clients give up after --slo seconds. Goodput is the rate of responses that were successful
+(2xx, or a 409 version conflict) and arrived within the SLO; shed counts 503/429 answers,
+late counts requests the client gave up on. Without admission control every request is
+accepted, the queue grows and past saturation almost nothing finishes in time; with it the
+excess is answered 503 at once and goodput should stay close to the server's capacity.
+
+The login token bucket is opened wide for the run, since every simulated client shares
+127.0.0.1. One uvicorn worker on a generated SQLite dataset (bench.datagen). Requests go
+over plain keep-alive HTTP/1.1 connections rather than httpx, whose per-request CPU would
+otherwise starve a server on the same cores and show up as server latency.
+
+Logins are CPU-bound in threads next to the event loop, so on a box with fewer cores than
+PASSWORD_WORKERS + 1 every admitted login also slows the reads; --logins 0 shows the read
+and write budgets alone.
+
+Run from backend/:  python -m bench.overload_test --rates 50,100,200,400,800 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter
+from urllib.parse import urlencode
+
+import httpx
+
+from bench import datagen  # Sets DATABASE_URL before app is imported
+from bench.loadtest import free_port, start_server
+from app.bulk_seed import STATUSES
+
+DEFAULT_DB = os.path.join(tempfile.gettempdir(), "novavantix_overload.db")
+
+class RawClient:
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.idle = []
+
+    async def request(self, method: str, path: str, headers: dict, body: bytes = b"") -> int:
+        while self.idle:
+            try:
+                return await self._send(self.idle.pop(), method, path, headers, body)
+            except (ConnectionError, EOFError):
+                pass  # Closed by the server while idle (keep-alive timeout): try the next one
+        return await self._send(await asyncio.open_connection(self.host, self.port), method, path, headers, body)
+
+    async def _send(self, connection, method: str, path: str, headers: dict, body: bytes) -> int:
+        reader, writer = connection
+        try:
+            head = [f"{method} {path} HTTP/1.1", f"Host: {self.host}", f"Content-Length: {len(body)}"]
+            head += [f"{name}: {value}" for name, value in headers.items()]
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+            status_line = await reader.readline()
+            if not status_line:
+                raise EOFError("connection closed")
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.partition(b":")
+                if name.lower() == b"content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+        except BaseException:
+            writer.close()  # Timed out or broken: never reuse a connection mid-response
+            raise
+        self.idle.append((reader, writer))
+        return int(status_line.split()[1])
+
+class Step:
+    def __init__(self):
+        self.outcomes = Counter()
+        self.latencies = []
+
+    def row(self, rate: int, duration: float) -> str:
+        good = self.outcomes["good"]
+        p50 = statistics.median(self.latencies) * 1000 if self.latencies else 0
+        p99 = sorted(self.latencies)[int(len(self.latencies) * 0.99) - 1] * 1000 if len(self.latencies) > 1 else p50
+        return (f"{rate:>8}{good / duration:>10.1f}{self.outcomes['shed']:>7}{self.outcomes['late']:>7}"
+                f"{self.outcomes['error']:>7}{p50:>9.1f}{p99:>9.1f}")
+
+async def request(client: RawClient, kind: str, rng: random.Random, tokens: dict, size: dict, step: Step, slo: float):
+    admin = {"Authorization": f"Bearer {tokens['admin']}"}
+    if kind == "read":
+        call = client.request("GET", f"/projects/{rng.randint(1, size['projects'])}/tasks?limit=50", admin)
+    elif kind == "write":
+        body = json.dumps({"status": rng.choice(STATUSES), "version": 1}).encode()
+        call = client.request("PATCH", f"/tasks/{rng.randint(1, size['tasks'])}", {**admin, "Content-Type": "application/json"}, body)
+    else:
+        body = urlencode({"email": tokens["member_email"], "password": datagen.PASSWORD}).encode()
+        call = client.request("POST", "/auth/login", {"Content-Type": "application/x-www-form-urlencoded"}, body)
+    start = time.perf_counter()
+    try:
+        status_code = await asyncio.wait_for(call, timeout=slo)
+    except asyncio.TimeoutError:
+        step.outcomes["late"] += 1
+        return
+    except (OSError, EOFError, ValueError):
+        step.outcomes["error"] += 1
+        return
+    elapsed = time.perf_counter() - start
+    if status_code in (429, 503):
+        step.outcomes["shed"] += 1
+    elif status_code < 300 or status_code == 409:
+        if elapsed <= slo:
+            step.outcomes["good"] += 1
+            step.latencies.append(elapsed)
+        else:
+            step.outcomes["late"] += 1
+    else:
+        step.outcomes["error"] += 1
+
+async def run_step(client: RawClient, rate: int, duration: float, slo: float, tokens: dict, size: dict, args) -> Step:
+    rng = random.Random(args.seed)
+    kinds, weights = ("read", "write", "auth"), (90 - args.logins, 10, args.logins)
+    step = Step()
+    pending = []
+    start = time.perf_counter()
+    for n in range(int(rate * duration)):
+        delay = start + n / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        pending.append(asyncio.create_task(request(client, rng.choices(kinds, weights)[0], rng, tokens, size, step, slo)))
+    await asyncio.gather(*pending)
+    return step
+
+async def drain(client: httpx.AsyncClient):
+    # Let a backlog from the previous step clear before measuring the next one
+    for _ in range(300):
+        start = time.perf_counter()
+        try:
+            await client.get("/health", timeout=5)
+        except httpx.HTTPError:
+            pass
+        if time.perf_counter() - start < 0.05:
+            return
+        await asyncio.sleep(0.5)
+
+async def drive(port: int, args, size: dict):
+    raw = RawClient("127.0.0.1", port)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+        tokens = {"member_email": datagen.email("member", 1, args.seed)}
+        response = await client.post("/auth/login", data={"email": datagen.email("admin", 1, args.seed), "password": datagen.PASSWORD}, timeout=30)
+        tokens["admin"] = response.json()["access_token"]
+        print(f"{'offered':>8}{'goodput':>10}{'shed':>7}{'late':>7}{'errors':>7}{'p50 ms':>9}{'p99 ms':>9}")
+        for rate in args.rates:
+            await drain(client)
+            step = await run_step(raw, rate, args.duration, args.slo, tokens, size, args)
+            print(step.row(rate, args.duration))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=f"sqlite:///{DEFAULT_DB}")
+    parser.add_argument("--scale", type=float, default=1.0, help="Dataset scale, see bench.datagen")
+    parser.add_argument("--rates", type=lambda value: [int(rate) for rate in value.split(",")], default=[50, 100, 200, 400, 800],
+                        help="Offered requests per second, comma separated")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per rate")
+    parser.add_argument("--slo", type=float, default=2.0, help="Client timeout in seconds; keep it above ADMIT_QUEUE_TIMEOUT")
+    parser.add_argument("--logins", type=float, default=2, help="Percentage of requests that are logins")
+    parser.add_argument("--modes", default="off,on", help="ADMISSION_CONTROL settings to compare")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    datagen.generate(args.database_url, args.scale, args.seed)
+    size = datagen.dataset_size(args.scale)
+    os.environ.update({"LOGIN_RATE": "100000", "LOGIN_BURST": "100000"})
+    for mode in args.modes.split(","):
+        os.environ["ADMISSION_CONTROL"] = "true" if mode == "on" else "false"
+        port = free_port()
+        server = start_server(args.database_url, port, 1)
+        try:
+            print(f"\nadmission control {mode}, SLO {args.slo:g}s, {args.duration:g}s per rate")
+            asyncio.run(drive(port, args, size))
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
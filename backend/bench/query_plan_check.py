@@ -0,0 +1,97 @@
+"""Fail if a hot read path full-scans the `tasks` table or sorts a page.
+
+Builds a synthetic SQLite dataset at each size in --tasks, ANALYZEs it, then runs EXPLAIN
+QUERY PLAN on the exact statements the handlers execute (built by app.queries +
+app.pagination). Small sizes matter as much as large ones: with few rows the planner's
+statistics make it fall back to a sort wherever no index fits.
+Any plan step that SCANs `tasks` (rather than SEARCHing an index), or that sorts in
+a temp b-tree (which defeats keyset paging), is a failure and the script exits 1,
+so it can gate CI.
+
+Run from backend/:  python -m bench.query_plan_check --tasks 2000,20000,200000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "novavantix_query_plan.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import insert, text
+
+from app.db import Base, engine
+from app.models import Project, Task, User
+from app.pagination import keyset_page
+from app.queries import member_access_query, project_list_query, task_list_query
+
+BAD_STEP = re.compile(r"^SCAN tasks\b|^USE TEMP B-TREE FOR ORDER BY")
+
+def build_dataset(users: int, projects: int, tasks: int, seed: int = 42):
+    engine.dispose()  # Pooled connections would keep the previous size's file open
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    Base.metadata.create_all(engine)
+    rng = random.Random(seed)
+    statuses = ["todo", "in_progress", "done"]
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "name": f"User {i}", "email": f"user{i}@bench.test", "password_hash": "x", "role": "admin" if i == 1 else "member"}
+            for i in range(1, users + 1)
+        ])
+        conn.execute(insert(Project), [{"id": i, "name": f"Project {i}"} for i in range(1, projects + 1)])
+        for start in range(0, tasks, 10000):
+            conn.execute(insert(Task), [
+                {"project_id": rng.randint(1, projects), "title": f"Task {i}", "status": rng.choice(statuses),
+                 "assignee_user_id": rng.randint(2, users), "version": 1}
+                for i in range(start, min(start + 10000, tasks))
+            ])
+        conn.execute(text("ANALYZE"))
+
+def hot_paths(limit: int = 100):
+    member, project = 2, 1
+    return {
+        "member project list": keyset_page(project_list_query("member", member), Project.id, limit),
+        "member project list (cursor)": keyset_page(project_list_query("member", member), Project.id, limit, after_id=10),
+        "member access check": member_access_query(project, member),
+        "admin task list": keyset_page(task_list_query(project), Task.id, limit),
+        "admin task list (cursor)": keyset_page(task_list_query(project), Task.id, limit, after_id=1000),
+        "admin task list by status": keyset_page(task_list_query(project, status="done"), Task.id, limit),
+        "admin task list by assignee": keyset_page(task_list_query(project, assignee=member), Task.id, limit),
+        "member task list": keyset_page(task_list_query(project, member_id=member), Task.id, limit),
+        "member task list by status": keyset_page(task_list_query(project, member_id=member, status="todo"), Task.id, limit),
+    }
+
+def explain(statement) -> list:
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        return [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--projects", type=int, default=2000)
+    parser.add_argument("--tasks", default="2000,20000,200000", help="comma-separated dataset sizes, each checked in turn")
+    args = parser.parse_args()
+
+    failures = []
+    for tasks in [int(size) for size in args.tasks.split(",")]:
+        print(f"\n{tasks} tasks")
+        build_dataset(args.users, args.projects, tasks)
+        for name, statement in hot_paths().items():
+            plan = explain(statement)
+            scans = [step for step in plan if BAD_STEP.match(step)]
+            print(f"{'FAIL' if scans else 'ok':>4}  {name}")
+            for step in plan:
+                print(f"        {step}")
+            if scans:
+                failures.append(f"{name} ({tasks} tasks)")
+    if failures:
+        print(f"\nFull scan or sort in: {', '.join(failures)}")
+        sys.exit(1)
+    print("\nNo full scans of tasks or sorts on the hot paths.")
+
+if __name__ == "__main__":
+    main()
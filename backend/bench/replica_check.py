@@ -0,0 +1,127 @@
+"""Read-replica routing with read-your-writes, using two SQLite files as primary and replica.
+
+The replica starts as a copy of the primary and is never updated afterwards, i.e. it
+behaves like a replica with unbounded lag. Every check prints PASS or FAIL:
+
+  - reads from a client that hasn't written are served by the replica
+  - after a write, that client reads from the primary (by token within this worker,
+    by cookie across workers) until READ_YOUR_WRITES_SECONDS have passed
+  - the writer's project listing isn't served from a cached replica render
+  - a user that exists only on the primary can still authenticate
+  - GET /ready reports latency and pool occupancy for both databases
+
+Run from backend/:  python -m bench.replica_check
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+from datetime import timedelta
+
+PRIMARY_PATH = os.path.join(tempfile.gettempdir(), "novavantix_primary.db")
+REPLICA_PATH = os.path.join(tempfile.gettempdir(), "novavantix_replica.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{PRIMARY_PATH}"
+os.environ["REPLICA_DATABASE_URL"] = f"sqlite:///{REPLICA_PATH}"
+os.environ.setdefault("READ_YOUR_WRITES_SECONDS", "1")
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+import httpx
+
+from app.db import READ_PRIMARY_COOKIE, READ_YOUR_WRITES_SECONDS, Base, SessionLocal, async_engine, engine, recent_writers, replica_async_engine
+from app.main import app, create_access_token
+from app.models import Project, Task, User
+
+failures = []
+
+def check(label: str, ok: bool, detail: str = ""):
+    print(f"{'PASS' if ok else 'FAIL'}  {label}{f'  ({detail})' if detail else ''}")
+    if not ok:
+        failures.append(label)
+
+def setup_databases() -> int:
+    for path in (PRIMARY_PATH, REPLICA_PATH):
+        if os.path.exists(path):
+            os.remove(path)
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    try:
+        admin = User(name="Writer", email="writer@bench.test", password_hash="x", role="admin")
+        reader = User(name="Reader", email="reader@bench.test", password_hash="x", role="admin")
+        project = Project(name="Original name")
+        db.add_all([admin, reader, project])
+        db.flush()
+        db.add(Task(project_id=project.id, title="Task", assignee_user_id=admin.id, version=1))
+        db.commit()
+        project_id = project.id
+    finally:
+        db.close()
+    engine.dispose()
+    shutil.copyfile(PRIMARY_PATH, REPLICA_PATH)
+    return project_id # type: ignore
+
+def client_for(email: str) -> httpx.AsyncClient:
+    token = create_access_token({"sub": email, "role": "admin"}, timedelta(hours=1))
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                             headers={"Authorization": f"Bearer {token}"})
+
+async def project_name(client: httpx.AsyncClient, project_id: int) -> str:
+    response = await client.get(f"/projects/{project_id}")
+    return response.json()["name"]
+
+async def run(project_id: int):
+    try:
+        await checks(project_id)
+    finally:
+        await async_engine.dispose()
+        await replica_async_engine.dispose()
+
+async def checks(project_id: int):
+    async with client_for("writer@bench.test") as writer, client_for("reader@bench.test") as reader:
+        check("replica configured", replica_async_engine is not async_engine)
+        check("reads go to the replica", await project_name(reader, project_id) == "Original name")
+
+        response = await writer.put(f"/projects/{project_id}", json={"name": "New name"})
+        check("write goes to the primary", response.status_code == 200 and response.json()["name"] == "New name", str(response.status_code))
+        check("writer reads its own write", await project_name(writer, project_id) == "New name")
+        check("other clients still read the replica", await project_name(reader, project_id) == "Original name")
+        # The reader's replica render is cached under the generation the write bumped
+        listed = lambda response: [project["name"] for project in response.json()]
+        check("other clients list from the replica", listed(await reader.get("/projects")) == ["Original name"])
+        check("writer's listing skips the cached replica render", listed(await writer.get("/projects")) == ["New name"])
+        tasks = (await writer.get(f"/projects/{project_id}/tasks")).json()
+        check("task listing follows the writer to the primary", len(tasks) == 1)
+
+        # Another worker has no entry for this token; only the cookie routes it
+        recent_writers.clear()
+        check("cookie keeps the writer on the primary", await project_name(writer, project_id) == "New name")
+
+        await asyncio.sleep(READ_YOUR_WRITES_SECONDS + 0.2)
+        check("writer returns to the replica after the window", await project_name(writer, project_id) == "Original name")
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as anonymous:
+        response = await anonymous.post("/auth/signup", json={"name": "New", "email": "new@example.com", "password": "NewPass1!"})
+        check("signup on the primary", response.status_code == 201, str(response.status_code))
+        response = await anonymous.post("/auth/login", data={"email": "new@example.com", "password": "NewPass1!"})
+        check("login doesn't pin the client to the primary", response.status_code == 200 and READ_PRIMARY_COOKIE not in response.cookies, str(response.status_code))
+    async with client_for("new@example.com") as newcomer:
+        response = await newcomer.get("/protected")
+        check("user missing on the replica still authenticates", response.status_code == 200, str(response.status_code))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as probe:
+        response = await probe.get("/ready")
+        body = response.json()
+        check("readiness reports both databases", response.status_code == 200 and set(body["databases"]) == {"primary", "replica"}, str(body))
+        for name, database in body["databases"].items():
+            print(f"      {name}: latency {database.get('latency_ms')} ms, pool {database.get('pool')}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+    asyncio.run(run(setup_databases()))
+    if failures:
+        sys.exit(f"{len(failures)} check(s) failed")
+
+if __name__ == "__main__":
+    main()
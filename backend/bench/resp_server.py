@@ -0,0 +1,136 @@
+"""In-memory stand-in for Redis, speaking enough of its protocol for RESPONSE_CACHE=redis.
+
+Supports PING, AUTH, SELECT, GET, SET (NX, EX, PX), MGET, INCR, DEL, DBSIZE and FLUSHDB,
+with key expiry and LRU eviction past --max-keys. One keyspace; SELECT is accepted and ignored.
+Use it to run several API workers against one shared response cache without a Redis install:
+
+    python -m bench.resp_server --port 6390 &
+    RESPONSE_CACHE=redis RESPONSE_CACHE_URL=redis://localhost:6390/0 uvicorn app.main:app --workers 4
+
+Run from backend/:  python -m bench.resp_server --port 6390
+"""
+import argparse
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional
+
+class Store:
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self.data: "OrderedDict[bytes, tuple]" = OrderedDict()  # key -> (value, expires_at or None)
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        self.data.move_to_end(key)
+        return entry[0]
+
+    def set(self, key: bytes, value: bytes, ttl: Optional[float]):
+        self.data[key] = (value, time.monotonic() + ttl if ttl is not None else None)
+        self.data.move_to_end(key)
+        while len(self.data) > self.max_keys:
+            self.data.popitem(last=False)
+
+def encode(reply) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, Exception):
+        return b"-ERR %s\r\n" % str(reply).encode()
+    if isinstance(reply, str):
+        return b"+%s\r\n" % reply.encode()
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, list):
+        return b"*%d\r\n" % len(reply) + b"".join(encode(item) for item in reply)
+    return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+def execute(store: Store, args: list):
+    command = args[0].upper()
+    if command == b"PING":
+        return "PONG"
+    if command in (b"AUTH", b"SELECT"):
+        return "OK"
+    if command == b"GET":
+        return store.get(args[1])
+    if command == b"MGET":
+        return [store.get(key) for key in args[1:]]
+    if command == b"SET":
+        key, value, options = args[1], args[2], [arg.upper() for arg in args[3:]]
+        ttl = None
+        if b"PX" in options:
+            ttl = int(options[options.index(b"PX") + 1]) / 1000
+        elif b"EX" in options:
+            ttl = int(options[options.index(b"EX") + 1])
+        if b"NX" in options and store.get(key) is not None:
+            return None
+        store.set(key, value, ttl)
+        return "OK"
+    if command == b"INCR":
+        value = int(store.get(args[1]) or 0) + 1
+        entry = store.data.get(args[1])
+        store.set(args[1], str(value).encode(), entry[1] - time.monotonic() if entry and entry[1] else None)
+        return value
+    if command == b"DEL":
+        return sum(1 for key in args[1:] if store.data.pop(key, None) is not None)
+    if command == b"DBSIZE":
+        return len(store.data)
+    if command == b"FLUSHDB":
+        store.data.clear()
+        return "OK"
+    return Exception(f"unknown command '{command.decode()}'")
+
+async def read_command(reader: asyncio.StreamReader) -> Optional[list]:
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        return line.split()  # Inline command, as typed into telnet
+    args = []
+    for _ in range(int(line[1:])):
+        length = int((await reader.readline())[1:])
+        args.append((await reader.readexactly(length + 2))[:-2])
+    return args
+
+async def serve(host: str, port: int, max_keys: int) -> asyncio.AbstractServer:
+    store = Store(max_keys)
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                args = await read_command(reader)
+                if args is None:
+                    break
+                if args:
+                    writer.write(encode(execute(store, args)))
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+async def run(host: str, port: int, max_keys: int):
+    server = await serve(host, port, max_keys)
+    print(f"Listening on {host}:{port}, up to {max_keys} keys")
+    async with server:
+        await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    parser.add_argument("--max-keys", type=int, default=100000)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args.host, args.port, args.max_keys))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""GET /projects response cache: invalidation, stampede guard, hit rate and latency.
+
+Uses RESPONSE_CACHE=redis against bench.resp_server started in-process, unless
+RESPONSE_CACHE is already set (e.g. RESPONSE_CACHE=memory). Every check prints PASS
+or FAIL; SQL statements are counted with an engine event, so a hit must run none.
+
+  - repeated listings are hits and run no SQL; If-None-Match on a hit gives a 304
+  - create/update/delete project refresh every listing
+  - create_task and reassignment refresh the affected members' listings only
+  - 50 concurrent requests for an expired key render it once
+  - hit rate shows up in /metrics and /admin/cache-stats
+
+Run from backend/:  python -m bench.response_cache_check --projects 500
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import timedelta
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "novavantix_response_cache.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["MAX_PAGE_SIZE"] = "100000"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+os.environ.setdefault("RESPONSE_CACHE", "redis")
+STAND_IN = os.environ["RESPONSE_CACHE"] == "redis" and "RESPONSE_CACHE_URL" not in os.environ
+if STAND_IN:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        STAND_IN_PORT = probe.getsockname()[1]
+    os.environ["RESPONSE_CACHE_URL"] = f"redis://127.0.0.1:{STAND_IN_PORT}/0"
+
+import httpx
+from sqlalchemy import event, insert
+
+from app.db import Base, async_engine, engine
+from app.main import app, create_access_token
+from app.models import Project, Task, User
+from app.response_cache import project_listings
+from bench import resp_server
+
+statements = Counter()
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    statements["total"] += 1
+
+failures = []
+
+def check(label: str, ok: bool, detail: str = ""):
+    print(f"{'PASS' if ok else 'FAIL'}  {label}{f'  ({detail})' if detail else ''}")
+    if not ok:
+        failures.append(label)
+
+def setup_database(projects: int):
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": 1, "name": "Admin", "email": "admin@bench.test", "password_hash": "x", "role": "admin"},
+            {"id": 2, "name": "Alice", "email": "alice@bench.test", "password_hash": "x", "role": "member"},
+            {"id": 3, "name": "Bob", "email": "bob@bench.test", "password_hash": "x", "role": "member"},
+        ])
+        conn.execute(insert(Project), [{"id": i, "name": f"Project {i}", "description": "x" * 80, "version": 1} for i in range(1, projects + 1)])
+        conn.execute(insert(Task), [
+            {"project_id": i, "title": f"Task {i}", "status": "todo", "assignee_user_id": 2 + i % 2, "version": 1}
+            for i in range(1, projects + 1)
+        ])
+    engine.dispose()
+
+def client(email: str) -> httpx.AsyncClient:
+    token = create_access_token({"sub": email}, timedelta(hours=1))
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", headers={"Authorization": f"Bearer {token}"})
+
+PAGE = {"limit": 100000}
+
+async def listing(http: httpx.AsyncClient, **params):
+    statements.clear()
+    response = await http.get("/projects", params={**PAGE, **params})
+    return response, statements["total"]
+
+async def ids(http: httpx.AsyncClient) -> set:
+    response, _ = await listing(http)
+    return {project["id"] for project in response.json()} if response.status_code == 200 else set()
+
+async def run(projects: int, repeat: int):
+    server = await resp_server.serve("127.0.0.1", STAND_IN_PORT, 100000) if STAND_IN else None
+    try:
+        async with client("admin@bench.test") as admin, client("alice@bench.test") as alice, client("bob@bench.test") as bob:
+            await checks(admin, alice, bob, projects, repeat)
+    finally:
+        if project_listings.backend is not None:
+            await project_listings.backend.close()
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+        await async_engine.dispose()
+
+async def checks(admin, alice, bob, projects: int, repeat: int):
+    print(f"backend: {os.environ['RESPONSE_CACHE']}\n")
+    first, first_sql = await listing(admin)
+    second, second_sql = await listing(admin)
+    check("repeat listing is a hit and runs no SQL", second_sql == 0 and second.content == first.content, f"{first_sql} then {second_sql} statements")
+    statements.clear()
+    not_modified = await admin.get("/projects", params=PAGE, headers={"If-None-Match": first.headers["etag"]})
+    check("If-None-Match on a hit is a 304 without SQL", not_modified.status_code == 304 and statements["total"] == 0, str(not_modified.status_code))
+
+    created = (await admin.post("/projects", json={"name": "Fresh project"})).json()
+    check("create_project refreshes admin listings", created["id"] in await ids(admin))
+    await admin.put(f"/projects/{created['id']}", json={"name": "Renamed project"})
+    response, _ = await listing(admin)
+    check("update_project refreshes admin listings", any(project["name"] == "Renamed project" for project in response.json()))
+
+    before_alice, before_bob = await ids(alice), await ids(bob)
+    await listing(bob)
+    task = (await admin.post(f"/projects/{created['id']}/tasks", json={"title": "For Alice", "assignee_user_id": 2})).json()
+    check("create_task refreshes the assignee's listing", await ids(alice) == before_alice | {created["id"]})
+    _, bob_sql = await listing(bob)
+    check("other members' entries survive", bob_sql == 0, f"{bob_sql} statements")
+
+    await admin.patch(f"/tasks/{task['id']}", json={"assignee_user_id": 3, "version": task["version"]})
+    check("reassignment refreshes the old assignee", await ids(alice) == before_alice)
+    check("reassignment refreshes the new assignee", await ids(bob) == before_bob | {created["id"]})
+
+    await admin.delete(f"/projects/{created['id']}")
+    check("delete_project refreshes every listing", created["id"] not in await ids(admin) and created["id"] not in await ids(bob))
+
+    await project_listings.invalidate()
+    misses = project_listings.stats().get("miss", 0)
+    responses = await asyncio.gather(*(admin.get("/projects", params=PAGE) for _ in range(50)))
+    rendered = project_listings.stats().get("miss", 0) - misses
+    check("50 concurrent misses render once", all(r.status_code == 200 for r in responses) and rendered == 1, f"{rendered} render(s)")
+
+    async def timed(invalidate: bool) -> float:
+        samples = []
+        for _ in range(repeat):
+            if invalidate:
+                await project_listings.invalidate()
+            start = time.perf_counter()
+            await admin.get("/projects", params=PAGE)
+            samples.append(time.perf_counter() - start)
+        return statistics.median(samples) * 1000
+
+    miss_ms, hit_ms = await timed(True), await timed(False)
+    print(f"\n{projects} projects, one page: miss {miss_ms:.1f} ms, hit {hit_ms:.1f} ms (median of {repeat})\n")
+
+    stats = (await admin.get("/admin/cache-stats")).json()["project_listings"]
+    metrics_text = (await admin.get("/metrics")).text
+    check("hit rate reported", stats["hit_rate"] > 0 and 'response_cache_lookups_total{cache="projects",result="hit"}' in metrics_text, str(stats))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    setup_database(args.projects)
+    asyncio.run(run(args.projects, args.repeat))
+    if failures:
+        sys.exit(f"{len(failures)} check(s) failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Project search: the old `name ILIKE '%q%'` filter vs the in-process inverted index.
+
+Builds a synthetic SQLite dataset with word-like project names, descriptions and task
+titles, then times each query term three ways:
+
+  ilike name    the old filter, names only (what GET /projects?q= used to run)
+  ilike all     ILIKE over name, description and task titles, i.e. the same coverage as search
+  index         MemorySearch.search, ranked with prefix matching
+
+It also reports the one-off index build time, and the latency of a search made right after
+invalidate(), which the old index serves while a background task rebuilds it. MySQL FULLTEXT is not measured here; on
+MySQL run the same terms against /projects?q= with SEARCH_BACKEND=fulltext.
+
+Run from backend/:  python -m bench.search_bench --projects 100000 --tasks 1000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import statistics
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "novavantix_search_bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import exists, insert, or_, select, text
+
+from app.db import AsyncSessionLocal, Base, async_engine, engine
+from app.models import Project, Task, User
+from app.search import MemorySearch
+
+SYLLABLES = ["ka", "lo", "mi", "ra", "ne", "to", "su", "vi", "de", "po", "an", "el", "ur", "zo", "fi", "ba"]
+
+def make_vocabulary(size: int, rng: random.Random) -> list:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+def build_dataset(projects: int, tasks: int, ranked: list, seed: int = 7):
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    Base.metadata.create_all(engine)
+    rng = random.Random(seed)
+    # Zipf-like word choice over `ranked` (most frequent first), as in real text
+    cumulative, total = [], 0.0
+    for rank in range(len(ranked)):
+        total += 1 / (rank + 1)
+        cumulative.append(total)
+    words = lambda n: " ".join(rng.choices(ranked, cum_weights=cumulative, k=n))
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": i, "name": f"User {i}", "email": f"user{i}@bench.test", "password_hash": "x", "role": "member"}
+            for i in range(1, 201)
+        ])
+        for start in range(0, projects, 10000):
+            conn.execute(insert(Project), [
+                {"id": i, "name": words(2).title(), "description": words(8)}
+                for i in range(start + 1, min(start + 10000, projects) + 1)
+            ])
+        for start in range(0, tasks, 10000):
+            conn.execute(insert(Task), [
+                {"project_id": rng.randint(1, projects), "title": words(4).capitalize(), "status": "todo",
+                 "assignee_user_id": rng.randint(1, 200), "version": 1}
+                for _ in range(start, min(start + 10000, tasks))
+            ])
+        conn.execute(text("ANALYZE"))
+
+def ilike_name(term: str, limit: int):
+    return select(Project).where(Project.name.ilike(f"%{term}%")).order_by(Project.id).limit(limit)
+
+def ilike_all(term: str, limit: int):
+    pattern = f"%{term}%"
+    titles = exists().where(Task.project_id == Project.id, Task.title.ilike(pattern))
+    return select(Project).where(or_(Project.name.ilike(pattern), Project.description.ilike(pattern), titles)).order_by(Project.id).limit(limit)
+
+def time_sql(statement, repeat: int) -> float:
+    samples = []
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(statement).all()
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+async def run(terms: list, limit: int, repeat: int, ilike_all_enabled: bool):
+    try:
+        await compare(terms, limit, repeat, ilike_all_enabled)
+    finally:
+        await async_engine.dispose()
+
+async def compare(terms: list, limit: int, repeat: int, ilike_all_enabled: bool):
+    search = MemorySearch()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        await search.search(db, "warmup", None, limit)
+        build = time.perf_counter() - start
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        index = search.index
+        print(f"index build: {build:.1f}s, {len(index.vocabulary)} terms, ~{(rss_after - rss_before) / 1024:.0f} MB peak RSS growth\n")
+
+        print(f"{'query':<14}{'ilike name':>14}{'ilike all':>14}{'index':>12}{'hits':>8}")
+        for term in terms:
+            by_name = time_sql(ilike_name(term, limit), repeat)
+            everywhere = time_sql(ilike_all(term, limit), max(1, repeat // 5)) if ilike_all_enabled else float("nan")
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                hits = await search.search(db, term, None, limit)
+                samples.append(time.perf_counter() - start)
+            indexed = statistics.median(samples) * 1000
+            print(f"{term:<14}{by_name:>12.1f}ms{everywhere:>12.1f}ms{indexed:>10.2f}ms{len(hits):>8}")
+
+        # An import or archive run invalidates the index; searches must not wait for the rebuild
+        old_index = search.index
+        start = time.perf_counter()
+        search.invalidate()
+        await search.search(db, terms[0], None, limit)
+        during = time.perf_counter() - start
+        await asyncio.sleep(0)
+        search.invalidate()  # Arrives mid-build: must cause one more build, not be lost
+        while search._rebuild is not None:
+            await asyncio.sleep(0.05)
+        rebuild = time.perf_counter() - start
+        print(f"\nsearch right after invalidate(): {during * 1000:.2f}ms; rebuilt in the background in {rebuild:.1f}s, "
+              f"index replaced: {search.index is not old_index}, up to date: {search._built_generation == search._generation}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=100000)
+    parser.add_argument("--tasks", type=int, default=1000000)
+    parser.add_argument("--words", type=int, default=20000, help="Vocabulary size")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--skip-ilike-all", action="store_true", help="Skip the slow name+description+titles ILIKE")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    ranked = rng.sample(make_vocabulary(args.words, rng), args.words)  # Frequency rank unrelated to spelling
+    start = time.perf_counter()
+    build_dataset(args.projects, args.tasks, ranked)
+    print(f"dataset: {args.projects} projects, {args.tasks} tasks in {time.perf_counter() - start:.0f}s")
+
+    common, mid, rare = ranked[0], ranked[len(ranked) // 10], ranked[-1]
+    terms = [common, mid, rare, rare[:3], f"{common} {mid[:3]}", "nomatchxyz"]
+    asyncio.run(run(terms, args.limit, args.repeat, not args.skip_ilike_all))
+
+if __name__ == "__main__":
+    main()
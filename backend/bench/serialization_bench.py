@@ -0,0 +1,148 @@
+"""Serializing a 10k-task listing: ORM objects + response_model vs column rows + orjson.
+
+Stages are timed separately on the same rows, median of --repeat runs:
+
+  fetch orm      select(Task) into ORM objects (identity map, instance state)
+  fetch rows     select(*TASK_COLUMNS) into plain Rows (what task_list_query does now)
+  fastapi        what FastAPI does for response_model=List[TaskResponse]: validate
+                 from attributes, dump to JSON-able Python, json.dumps
+  adapter        TypeAdapter validate_python(from_attributes) + dump_json (responses.models_response)
+  orjson rows    rows to dicts + orjson.dumps (responses.rows_response)
+
+plus the whole GET /projects/{id}/tasks request through the ASGI app, old handler vs
+current one. Every serializer's output is checked to decode to the same JSON.
+
+Run from backend/:  python -m bench.serialization_bench --tasks 10000
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List, Literal, Optional
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "novavantix_serialization_bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["MAX_PAGE_SIZE"] = "100000"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+import httpx
+import orjson
+from fastapi import Depends, Query, Response
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import AsyncSessionLocal, Base, async_engine, engine, get_async_db
+from app.main import app, create_access_token, get_current_user
+from app.models import Project, Task, User
+from app.pagination import paginate
+from app.queries import TASK_COLUMNS
+from app.responses import rows_response, task_list_adapter
+from app.schemas import TaskResponse
+
+async def legacy_get_project_tasks(project_id: int, response: Response, limit: int = Query(100), cursor: Optional[str] = Query(None),
+                                   current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    return await paginate(db, select(Task).where(Task.project_id == project_id), Task.id, limit, cursor, response)
+
+app.add_api_route("/legacy/projects/{project_id}/tasks", legacy_get_project_tasks, methods=["GET"], response_model=List[TaskResponse])
+
+def setup_database(tasks: int):
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    Base.metadata.create_all(engine)
+    now = datetime(2026, 1, 1, 9, 30, 15, 123456)
+    statuses: List[Literal["todo", "in_progress", "done"]] = ["todo", "in_progress", "done"]
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": 1, "name": "Bench Admin", "email": "admin@bench.test", "password_hash": "x", "role": "admin"}])
+        conn.execute(insert(Project), [{"id": 1, "name": "Bench Project", "version": 1}])
+        conn.execute(insert(Task), [
+            {"id": i, "project_id": 1, "title": f"Task number {i} with a realistic title", "status": statuses[i % 3],
+             "assignee_user_id": 1, "due_date": now + timedelta(days=i % 90) if i % 3 else None,
+             "created_at": now, "updated_at": now if i % 2 else None, "version": 1 + i % 5}
+            for i in range(1, tasks + 1)
+        ])
+    engine.dispose()
+
+def median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+async def amedian_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+def fastapi_serialize(objects) -> bytes:
+    # fastapi.routing.serialize_response with a pydantic v2 field, then JSONResponse.render
+    adapter = task_list_adapter
+    content = adapter.dump_python(adapter.validate_python(objects, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+async def run(tasks: int, repeat: int):
+    try:
+        await compare(tasks, repeat)
+    finally:
+        await async_engine.dispose()
+
+async def compare(tasks: int, repeat: int):
+    orm_query = select(Task).where(Task.project_id == 1).order_by(Task.id)
+    rows_query = select(*TASK_COLUMNS).where(Task.project_id == 1).order_by(Task.id)
+
+    async def fetch_orm():
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(orm_query)).scalars().all()
+
+    async def fetch_rows():
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(rows_query)).all()
+
+    objects, rows = await fetch_orm(), await fetch_rows()
+    outputs = {
+        "fastapi": fastapi_serialize(objects),
+        "adapter": task_list_adapter.dump_json(task_list_adapter.validate_python(objects, from_attributes=True)),
+        "orjson rows": bytes(rows_response(rows, Response()).body),
+    }
+    reference = json.loads(outputs["fastapi"])
+    for label, body in outputs.items():
+        assert json.loads(body) == reference, f"{label} output differs from response_model's"
+
+    print(f"{tasks} tasks, median of {repeat} runs\n")
+    print(f"{'fetch orm':<16}{await amedian_ms(fetch_orm, repeat):>9.1f} ms")
+    print(f"{'fetch rows':<16}{await amedian_ms(fetch_rows, repeat):>9.1f} ms")
+    print(f"{'fastapi':<16}{median_ms(lambda: fastapi_serialize(objects), repeat):>9.1f} ms")
+    print(f"{'adapter':<16}{median_ms(lambda: task_list_adapter.dump_json(task_list_adapter.validate_python(objects, from_attributes=True)), repeat):>9.1f} ms")
+    print(f"{'orjson rows':<16}{median_ms(lambda: rows_response(rows, Response()), repeat):>9.1f} ms")
+
+    token = create_access_token({"sub": "admin@bench.test", "role": "admin"}, timedelta(hours=1))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers={"Authorization": f"Bearer {token}"}) as client:
+        print()
+        bodies = {}
+        for label, path in (("old endpoint", "/legacy/projects/1/tasks"), ("current endpoint", "/projects/1/tasks")):
+            async def request():
+                response = await client.get(path, params={"limit": tasks})
+                bodies[label] = response.content
+            await request()  # Warm the auth caches
+            print(f"{label:<16}{await amedian_ms(request, repeat):>9.1f} ms  ({len(bodies[label]):,} bytes)")
+        assert orjson.loads(bodies["old endpoint"]) == orjson.loads(bodies["current endpoint"]), "endpoint responses differ"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    setup_database(args.tasks)
+    asyncio.run(run(args.tasks, args.repeat))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Worker startup time and first-request latency, with and without the startup warm-up.
+
+Each run starts a fresh server on a generated SQLite dataset (bench.datagen) and measures:
+
+  ready     time from spawning the process until GET /health answers
+  first     latency of the first request to each endpoint, as an admin, in this order:
+            GET /projects?q=billing (search), GET /projects/{id}/tasks, GET /projects
+  warm      median of the next --repeat requests to the same endpoint
+
+Configurations:
+
+  cold      uvicorn app.main:create_app --factory, DB_POOL_PREWARM=0 WARM_CACHES=false
+  warm      the same with the defaults: the lifespan opens the pool and builds the search index
+  launcher  python -m app.serve (workers and pools sized to this machine's cores)
+
+Every figure is the median over --runs runs.
+
+Run from backend/:  python -m bench.startup_bench --scale 5 --runs 5
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from jose import jwt
+
+from bench import datagen
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(tempfile.gettempdir(), "novavantix_startup.db")
+SERVER_LOG = os.path.join(tempfile.gettempdir(), "novavantix_startup_server.log")
+SECRET_KEY = "startup-bench"
+ENDPOINTS = [("search", "/projects", {"q": "billing"}), ("tasks", "/projects/1/tasks", {"limit": 50}), ("projects", "/projects", {"limit": 50})]
+
+CONFIGS = {
+    "cold": (["-m", "uvicorn", "app.main:create_app", "--factory"], {"DB_POOL_PREWARM": "0", "WARM_CACHES": "false"}),
+    "warm": (["-m", "uvicorn", "app.main:create_app", "--factory"], {}),
+    "launcher": (["-m", "app.serve"], {}),
+}
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def admin_token() -> str:
+    expire = datetime.utcnow() + timedelta(hours=1)
+    return jwt.encode({"sub": datagen.email("admin", 1), "exp": expire}, SECRET_KEY, algorithm="HS256")
+
+def start_and_measure(config: str, repeat: int) -> dict:
+    args, extra_env = CONFIGS[config]
+    port = free_port()
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{DB_PATH}", "SECRET_KEY": SECRET_KEY, "ADMISSION_CONTROL": "false", **extra_env}
+    with open(SERVER_LOG, "a") as log:
+        start = time.perf_counter()
+        server = subprocess.Popen([sys.executable, *args, "--port", str(port), "--log-level", "warning", "--no-access-log"],
+                                  cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        result = {}
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", headers={"Authorization": f"Bearer {admin_token()}"}) as client:
+            while True:
+                try:
+                    if client.get("/health", timeout=1).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if server.poll() is not None:
+                    raise SystemExit(f"server exited with {server.returncode}, see {SERVER_LOG}")
+                if time.perf_counter() - start > 60:
+                    raise SystemExit("server did not become healthy within 60s")
+                time.sleep(0.005)
+            result["ready"] = time.perf_counter() - start
+            for name, path, params in ENDPOINTS:
+                samples = []
+                for _ in range(repeat + 1):
+                    request_start = time.perf_counter()
+                    response = client.get(path, params=params, timeout=30)
+                    samples.append(time.perf_counter() - request_start)
+                    if response.status_code != 200:
+                        raise SystemExit(f"{path}: {response.status_code} {response.text[:200]}")
+                result[f"{name} first"] = samples[0]
+                result[f"{name} warm"] = statistics.median(samples[1:])
+        return result
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=5.0)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--configs", default="cold,warm,launcher")
+    args = parser.parse_args()
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    size = datagen.generate(f"sqlite:///{DB_PATH}", args.scale)
+    print(f"dataset: {size}")
+    open(SERVER_LOG, "w").close()
+    configs = args.configs.split(",")
+    results = {config: [] for config in configs}
+    for _ in range(args.runs):
+        for config in configs:  # Interleaved, so drift in the machine's load hits every config alike
+            results[config].append(start_and_measure(config, args.repeat))
+    keys = list(results[configs[0]][0])
+    print(f"\nmedian of {args.runs} runs, ms")
+    print(f"{'':>16}" + "".join(f"{config:>12}" for config in configs))
+    for key in keys:
+        print(f"{key:>16}" + "".join(f"{statistics.median(run[key] for run in results[config]) * 1000:>12.1f}" for config in configs))
+
+if __name__ == "__main__":
+    main()
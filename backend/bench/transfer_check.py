@@ -0,0 +1,191 @@
+"""Task export/import: round trips, per-line errors, memory and throughput.
+
+  - export of --tasks tasks as NDJSON and CSV re-imports into other projects with the same
+    titles (commas, quotes, newlines, non-ASCII), statuses, due dates and assignees
+  - the upload is sent in small chunks, so records straddle chunk boundaries
+  - import runs a fixed number of statements per chunk, not one User query per row
+  - bad lines are reported by line number and the rest still imports; counters stay exact
+  - peak Python memory of the export stays flat as the project grows, unlike building the
+    whole list the way one big GET /projects/{id}/tasks page does
+  - import rows/sec against one POST /projects/{id}/tasks per task
+
+Run from backend/:  python -m bench.transfer_check --tasks 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "novavantix_transfer.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["MAX_PAGE_SIZE"] = "1000000"
+os.environ["ADMISSION_CONTROL"] = "false"
+os.environ.setdefault("SECRET_KEY", "bench-secret")
+
+import httpx
+from fastapi import Response
+from sqlalchemy import event, insert, select
+
+from app.db import AsyncSessionLocal, Base, async_engine, engine
+from app.main import app, create_access_token
+from app.models import Project, Task, User
+from app.pagination import paginate
+from app.queries import TASK_COLUMNS, task_list_query
+from app.responses import rows_response
+from app.transfer import export_rows
+
+statements = Counter()
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    statements[statement.split(None, 1)[0].upper()] += 1
+
+failures = []
+
+def check(label: str, ok: bool, detail: str = ""):
+    print(f"{'PASS' if ok else 'FAIL'}  {label}{f'  ({detail})' if detail else ''}")
+    if not ok:
+        failures.append(label)
+
+TITLES = ["Plain title {i}", "Comma, separated {i}", 'Quoted "title" {i}', "Two\nlines {i}", "Ünïcödé 任务 {i}"]
+
+def setup_database(tasks: int):
+    if os.path.exists(DB_PATH):
+        os.remove(DB_PATH)
+    Base.metadata.create_all(engine)
+    due = datetime(2026, 3, 1, 12, 0)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": 1, "name": "Admin", "email": "admin@bench.test", "password_hash": "x", "role": "admin"},
+            {"id": 2, "name": "Member", "email": "member@bench.test", "password_hash": "x", "role": "member"},
+        ])
+        conn.execute(insert(Project), [{"id": i, "name": f"Project {i}", "version": 1} for i in range(1, 8)])
+        conn.execute(insert(Task), [
+            {"project_id": 1, "title": TITLES[i % len(TITLES)].format(i=i), "status": ("todo", "in_progress", "done")[i % 3],
+             "assignee_user_id": 1 + i % 2, "due_date": due + timedelta(days=i % 40) if i % 4 else None, "version": 1}
+            for i in range(tasks)
+        ])
+    engine.dispose()
+
+def client(email: str) -> httpx.AsyncClient:
+    token = create_access_token({"sub": email}, timedelta(hours=1))
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                             headers={"Authorization": f"Bearer {token}"}, timeout=600)
+
+async def chunked(body: bytes, size: int = 997):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+async def project_tasks(project_id: int) -> list:
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(select(Task.title, Task.status, Task.due_date, Task.assignee_user_id).where(Task.project_id == project_id).order_by(Task.id))).all()
+    return [tuple(row) for row in rows]
+
+async def peak_memory(make) -> float:
+    tracemalloc.start()
+    try:
+        await make()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+async def run(tasks: int, singles: int):
+    try:
+        async with client("admin@bench.test") as admin, client("member@bench.test") as member:
+            await checks(admin, member, tasks, singles)
+    finally:
+        await async_engine.dispose()
+
+async def checks(admin, member, tasks: int, singles: int):
+    source = await project_tasks(1)
+    exports = {}
+    for format in ("ndjson", "csv"):
+        start = time.perf_counter()
+        response = await admin.get("/projects/1/tasks/export", params={"format": format})
+        elapsed = time.perf_counter() - start
+        exports[format] = response.content
+        print(f"export {format}: {tasks} rows, {len(response.content) / 1e6:.1f} MB in {elapsed * 1000:.0f} ms ({tasks / elapsed:,.0f} rows/s)")
+    check("NDJSON export has one line per task", exports["ndjson"].count(b"\n") == tasks)
+
+    for format, project_id in (("ndjson", 2), ("csv", 3)):
+        statements.clear()
+        response = await admin.post(f"/projects/{project_id}/tasks/import", params={"format": format}, content=chunked(exports[format]))
+        summary = response.json()
+        print(f"import {format}: {summary['imported']} rows in {summary['seconds'] * 1000:.0f} ms ({summary['rows_per_second']:,.0f} rows/s), "
+              f"{sum(statements.values())} statements {dict(statements)}")
+        check(f"{format} round trip keeps every task", await project_tasks(project_id) == source, f"{summary['imported']} imported, {summary['failed']} failed")
+        check(f"{format} import statements are per chunk, not per row", sum(statements.values()) < tasks / 100)
+        stats = (await admin.get(f"/projects/{project_id}/stats")).json()
+        check(f"{format} import keeps the counters exact", stats["total"] == tasks, str(stats["by_status"]))
+
+    bad = b"\n".join([
+        b'{"title": "ok one"}',
+        b'{"title": "bad status", "status": "blocked"}',
+        b'not json',
+        b'',
+        b'{"title": "ghost assignee", "assignee_user_id": 999}',
+        b'["not", "an", "object"]',
+        b'{"status": "todo"}',
+        b'{"title": "ok two", "due_date": "2026-05-01T10:00:00"}',
+    ])
+    summary = (await admin.post("/projects/4/tasks/import", content=bad)).json()
+    lines = [error["line"] for error in summary["errors"]]
+    check("bad NDJSON lines are reported by line number", lines == [2, 3, 5, 6, 7] and summary["imported"] == 2, json.dumps(summary["errors"])[:200])
+
+    csv_body = b'title,status,assignee_user_id\r\n"Multi\nline, quoted",done,\r\nWrong,todo,999\r\nShort row\r\n'
+    summary = (await admin.post("/projects/5/tasks/import", content=csv_body, headers={"Content-Type": "text/csv"})).json()
+    check("CSV errors use the physical line", [error["line"] for error in summary["errors"]] == [4, 5] and summary["imported"] == 1,
+          json.dumps(summary["errors"]))
+
+    member_body = b'{"title": "mine"}\n{"title": "also mine", "assignee_user_id": 2}\n{"title": "theirs", "assignee_user_id": 1}\n'
+    summary = (await member.post("/projects/6/tasks/import", content=member_body)).json()
+    check("members can only import their own tasks", summary["imported"] == 2 and summary["errors"][0]["detail"] == "Only admins can assign to others")
+    exported = (await member.get("/projects/1/tasks/export")).content.splitlines()
+    check("members export only their own tasks", exported and all(json.loads(line)["assignee_user_id"] == 2 for line in exported), f"{len(exported)} rows")
+    csv_head = (await admin.get("/projects/1/tasks/export", params={"format": "csv", "fields": "title,status"})).content.split(b"\r\n", 1)[0]
+    check("fields= narrows the export", csv_head == b"id,title,status", csv_head.decode())
+
+    query = task_list_query(1, None, None, None, TASK_COLUMNS)
+    fields = [column.key for column in TASK_COLUMNS]
+
+    async def stream_export():
+        async for _ in export_rows(AsyncSessionLocal, query, fields, "ndjson"):
+            pass
+
+    async def whole_list():
+        async with AsyncSessionLocal() as db:
+            rows_response(await paginate(db, query, Task.id, tasks, None, Response()), Response())
+
+    streamed, listed = await peak_memory(stream_export), await peak_memory(whole_list)
+    small = await peak_memory(lambda: _small_export(query, fields))
+    print(f"\npeak Python memory: export {streamed:.1f} MB ({small:.1f} MB for the first chunk only), whole list {listed:.1f} MB")
+    check("export memory doesn't grow with the project", streamed < small * 2 and streamed < listed / 4)
+
+    start = time.perf_counter()
+    for i in range(singles):
+        await admin.post("/projects/7/tasks", json={"title": f"single {i}"})
+    single_rate = singles / (time.perf_counter() - start)
+    print(f"\none POST per task: {single_rate:,.0f} rows/s (over {singles})")
+
+async def _small_export(query, fields):
+    async for _ in export_rows(AsyncSessionLocal, query.where(Task.id <= 1000), fields, "ndjson"):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--singles", type=int, default=300, help="Single-task POSTs timed for comparison")
+    args = parser.parse_args()
+    setup_database(args.tasks)
+    asyncio.run(run(args.tasks, args.singles))
+    if failures:
+        sys.exit(f"{len(failures)} check(s) failed")
+
+if __name__ == "__main__":
+    main()
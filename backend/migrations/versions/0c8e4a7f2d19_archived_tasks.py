@@ -0,0 +1,46 @@
+"""archived tasks
+
+Revision ID: 0c8e4a7f2d19
+Revises: f6a2d9c4b871
+Create Date: 2026-10-17 22:31:08.774520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c8e4a7f2d19'
+down_revision: Union[str, Sequence[str], None] = 'f6a2d9c4b871'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('archived_tasks',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('status', sa.Enum('todo', 'in_progress', 'done', name='task_status'), nullable=False),
+    sa.Column('assignee_user_id', sa.Integer(), nullable=False),
+    sa.Column('due_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['assignee_user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_archived_tasks_project_id', 'archived_tasks', ['project_id'], unique=False)
+    op.create_index('ix_archived_tasks_assignee_project', 'archived_tasks', ['assignee_user_id', 'project_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_archived_tasks_assignee_project', table_name='archived_tasks')
+    op.drop_index('ix_archived_tasks_project_id', table_name='archived_tasks')
+    op.drop_table('archived_tasks')
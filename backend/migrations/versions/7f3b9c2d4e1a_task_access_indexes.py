@@ -0,0 +1,32 @@
+"""task access indexes
+
+Revision ID: 7f3b9c2d4e1a
+Revises: 2ac72246ffad
+Create Date: 2026-10-17 09:12:44.218305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f3b9c2d4e1a'
+down_revision: Union[str, Sequence[str], None] = '2ac72246ffad'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_tasks_project_id'), 'tasks', ['project_id'], unique=False)
+    op.create_index('ix_tasks_project_status', 'tasks', ['project_id', 'status'], unique=False)
+    op.create_index('ix_tasks_assignee_project', 'tasks', ['assignee_user_id', 'project_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tasks_assignee_project', table_name='tasks')
+    op.drop_index('ix_tasks_project_status', table_name='tasks')
+    op.drop_index(op.f('ix_tasks_project_id'), table_name='tasks')
@@ -0,0 +1,36 @@
+"""fulltext name and description
+
+Revision ID: a4e8c1d7f352
+Revises: 0c8e4a7f2d19
+Create Date: 2026-10-18 10:14:52.306218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4e8c1d7f352'
+down_revision: Union[str, Sequence[str], None] = '0c8e4a7f2d19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # MySQL only. MATCH needs an index on exactly its columns: search scores names and
+    # descriptions separately, with their own weights
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    op.execute("ALTER TABLE projects ADD FULLTEXT INDEX ft_projects_name (name) WITH PARSER ngram")
+    op.execute("ALTER TABLE projects ADD FULLTEXT INDEX ft_projects_description (description) WITH PARSER ngram")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    op.drop_index('ft_projects_description', table_name='projects')
+    op.drop_index('ft_projects_name', table_name='projects')
@@ -0,0 +1,44 @@
+"""monotonic task ids
+
+Revision ID: b5f9d2e8a613
+Revises: a4e8c1d7f352
+Create Date: 2026-10-18 11:02:37.518904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5f9d2e8a613'
+down_revision: Union[str, Sequence[str], None] = 'a4e8c1d7f352'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The highest task id ever handed out that is still on record, live or archived
+HIGHEST_ID = "SELECT coalesce(max(id), 0) FROM (SELECT id FROM tasks UNION ALL SELECT id FROM archived_tasks) AS ids"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # New task ids must never repeat an archived task's, so restoring it can put it back under
+    # its own id
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        # AUTOINCREMENT can only be set by recreating the table
+        with op.batch_alter_table('tasks', recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+            pass
+        op.execute("DELETE FROM sqlite_sequence WHERE name = 'tasks'")
+        op.execute(f"INSERT INTO sqlite_sequence (name, seq) SELECT 'tasks', ({HIGHEST_ID})")
+    elif bind.dialect.name == 'mysql':
+        highest = bind.execute(sa.text(HIGHEST_ID)).scalar()
+        op.execute(f"ALTER TABLE tasks AUTO_INCREMENT = {int(highest) + 1}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        with op.batch_alter_table('tasks', recreate='always', table_kwargs={'sqlite_autoincrement': False}):
+            pass
@@ -0,0 +1,28 @@
+"""project version
+
+Revision ID: b81e4f6a0c3d
+Revises: 7f3b9c2d4e1a
+Create Date: 2026-10-17 11:40:02.913574
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81e4f6a0c3d'
+down_revision: Union[str, Sequence[str], None] = '7f3b9c2d4e1a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('projects', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('projects', 'version')
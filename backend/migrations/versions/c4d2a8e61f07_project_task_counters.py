@@ -0,0 +1,58 @@
+"""project task counters
+
+Revision ID: c4d2a8e61f07
+Revises: b81e4f6a0c3d
+Create Date: 2026-10-17 14:05:37.482116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d2a8e61f07'
+down_revision: Union[str, Sequence[str], None] = 'b81e4f6a0c3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('project_task_counts',
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.Enum('todo', 'in_progress', 'done', name='task_status'), nullable=False),
+    sa.Column('assignee_user_id', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['assignee_user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('project_id', 'status', 'assignee_user_id')
+    )
+    op.create_table('project_due_counts',
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('assignee_user_id', sa.Integer(), nullable=False),
+    sa.Column('due_day', sa.Date(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['assignee_user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('project_id', 'assignee_user_id', 'due_day')
+    )
+    # Backfill from existing tasks; same queries as `python -m app.stats rebuild`
+    op.execute(
+        "INSERT INTO project_task_counts (project_id, status, assignee_user_id, count) "
+        "SELECT project_id, status, assignee_user_id, COUNT(*) FROM tasks "
+        "GROUP BY project_id, status, assignee_user_id"
+    )
+    op.execute(
+        "INSERT INTO project_due_counts (project_id, assignee_user_id, due_day, count) "
+        "SELECT project_id, assignee_user_id, DATE(due_date), COUNT(*) FROM tasks "
+        "WHERE due_date IS NOT NULL AND status != 'done' "
+        "GROUP BY project_id, assignee_user_id, DATE(due_date)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('project_due_counts')
+    op.drop_table('project_task_counts')
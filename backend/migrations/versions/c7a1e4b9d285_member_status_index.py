@@ -0,0 +1,28 @@
+"""member status index
+
+Revision ID: c7a1e4b9d285
+Revises: b5f9d2e8a613
+Create Date: 2026-10-18 11:40:15.927361
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a1e4b9d285'
+down_revision: Union[str, Sequence[str], None] = 'b5f9d2e8a613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_tasks_assignee_project_status', 'tasks', ['assignee_user_id', 'project_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tasks_assignee_project_status', table_name='tasks')
@@ -0,0 +1,35 @@
+"""fulltext search
+
+Revision ID: d9e5b7a3c210
+Revises: c4d2a8e61f07
+Create Date: 2026-10-17 16:22:48.105394
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9e5b7a3c210'
+down_revision: Union[str, Sequence[str], None] = 'c4d2a8e61f07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # MySQL only: other databases use the in-process index in app/search.py
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    op.execute("ALTER TABLE projects ADD FULLTEXT INDEX ft_projects_name_description (name, description) WITH PARSER ngram")
+    op.execute("ALTER TABLE tasks ADD FULLTEXT INDEX ft_tasks_title (title) WITH PARSER ngram")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    op.drop_index('ft_tasks_title', table_name='tasks')
+    op.drop_index('ft_projects_name_description', table_name='projects')
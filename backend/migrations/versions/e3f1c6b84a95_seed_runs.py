@@ -0,0 +1,37 @@
+"""seed runs
+
+Revision ID: e3f1c6b84a95
+Revises: d9e5b7a3c210
+Create Date: 2026-10-17 18:03:11.620457
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3f1c6b84a95'
+down_revision: Union[str, Sequence[str], None] = 'd9e5b7a3c210'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('seed_runs',
+    sa.Column('run_id', sa.String(length=64), nullable=False),
+    sa.Column('params', sa.String(length=1024), nullable=False),
+    sa.Column('first_user_id', sa.Integer(), nullable=False),
+    sa.Column('first_project_id', sa.Integer(), nullable=False),
+    sa.Column('first_task_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('run_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('seed_runs')
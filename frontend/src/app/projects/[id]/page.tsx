@@ -3,7 +3,7 @@
 import { useEffect, useState } from 'react';
 import { useRouter, useParams } from 'next/navigation';
 import { useAuth } from '@/components/AuthProvider';
-import api from '@/lib/api';
+import api, { getAllPages } from '@/lib/api';
 
 // Import defined interfaces from types.ts
 import { Project, Task } from '@/app/types';
@@ -30,16 +30,16 @@ export default function ProjectDetail() {
     useEffect(() => {
         const fetchProjectDetails = async () => {
             try {
-                const [projRes, tasksRes] = await Promise.all([
+                const [projRes, projectTasks] = await Promise.all([
                     api.get(`/projects/${projectId}`, {
                         headers: { Authorization: `Bearer ${localStorage.getItem('token')}` },
                     }),
-                    api.get(`/projects/${projectId}/tasks`, {
+                    getAllPages<Task>(`/projects/${projectId}/tasks`, {
                         headers: { Authorization: `Bearer ${localStorage.getItem('token')}` },
                     }),
                 ]);
                 setProject(projRes.data as Project);
-                setTasks(tasksRes.data as Task[]);
+                setTasks(projectTasks);
             } catch (err) {
                 setError('Failed to load project details');
                 console.error("Fetch error:", err);
@@ -51,12 +51,65 @@ export default function ProjectDetail() {
         fetchProjectDetails();
     }, [projectId]);
 
+    // Live updates: teammates' task changes are pushed over the project's change feed instead of refetched.
+    // The stream is opened with a short-lived, single-use ticket rather than the token, so each
+    // reconnect fetches a new ticket and resumes from the last event id seen.
+    useEffect(() => {
+        if (!localStorage.getItem('token')) return;
+        let source: EventSource | null = null;
+        let retry: ReturnType<typeof setTimeout> | undefined;
+        let lastEventId: string | undefined;
+        let closed = false;
+
+        const connect = async () => {
+            try {
+                const { data } = await api.post(`/projects/${projectId}/events/ticket`);
+                if (closed) return;
+                const since = lastEventId ? `&since=${encodeURIComponent(lastEventId)}` : '';
+                source = new EventSource(`${process.env.NEXT_PUBLIC_API_URL}/projects/${projectId}/events?ticket=${encodeURIComponent(data.ticket)}${since}`);
+                source.onmessage = handleMessage;
+                source.onerror = () => {
+                    source?.close();
+                    if (!closed) retry = setTimeout(connect, 2000);
+                };
+            } catch (err) {
+                console.error("Feed ticket error:", err);
+                if (!closed) retry = setTimeout(connect, 2000);
+            }
+        };
+
+        const handleMessage = (message: MessageEvent) => {
+            if (message.lastEventId) lastEventId = message.lastEventId;
+            const event = JSON.parse(message.data);
+            if (event.type === 'task.created' || event.type === 'task.updated') {
+                const incoming = event.task as Task;
+                setTasks(prev => prev.some(t => t.id === incoming.id)
+                    ? prev.map(t => t.id === incoming.id && t.version <= incoming.version ? incoming : t)
+                    : [...prev, incoming]);
+            } else if (event.type === 'task.removed' || event.type === 'task.deleted') {
+                setTasks(prev => prev.filter(t => t.id !== event.task.id));
+            } else if (event.type === 'reset' || event.type === 'tasks.imported') {
+                getAllPages<Task>(`/projects/${projectId}/tasks`).then(setTasks).catch(err => console.error("Feed reset error:", err));
+            } else if (event.type === 'project.deleted') {
+                router.push('/projects');
+            }
+        };
+
+        connect();
+        return () => {
+            closed = true;
+            clearTimeout(retry);
+            source?.close();
+        };
+    }, [projectId, router]);
+
     const handleCreateTask = async (taskData: { title: string; status?: 'todo' | 'in_progress' | 'done'; due_date?: string; assignee_user_id?: number }) => {
         try {
             const res = await api.post(`/projects/${projectId}/tasks`, taskData, {
                 headers: { Authorization: `Bearer ${localStorage.getItem('token')}` },
             });
-            setTasks([...tasks, res.data as Task]);
+            const created = res.data as Task;
+            setTasks(prev => prev.some(t => t.id === created.id) ? prev : [...prev, created]); // The feed may have delivered it already
             setError('');
         } catch (err) {
             setError('Failed to create task');
@@ -3,7 +3,7 @@
 import { useEffect, useState } from 'react';
 import { useRouter } from 'next/navigation';
 import { useAuth } from '@/components/AuthProvider';
-import api from '@/lib/api';
+import api, { getAllPages } from '@/lib/api';
 import ProjectCreateModal from '@/modals/projectCreateModal';
 
 export default function Projects() {
@@ -28,10 +28,10 @@ export default function Projects() {
     const fetchProjects = async () => {
         try {
             const url = searchQuery ? `/projects?q=${encodeURIComponent(searchQuery)}` : '/projects';
-            const response = await api.get(url, {
+            const allProjects = await getAllPages(url, {
                 headers: { Authorization: `Bearer ${localStorage.getItem('token')}` },
             });
-            setProjects(response.data);
+            setProjects(allProjects);
             setError(''); // Clear any previous errors
         } catch (err) {
             setError('Failed to fetch projects');
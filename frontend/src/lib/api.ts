@@ -1,4 +1,4 @@
-import axios from 'axios';
+import axios, { AxiosRequestConfig } from 'axios';
 
 const api = axios.create({
   baseURL: process.env.NEXT_PUBLIC_API_URL,
@@ -23,4 +23,16 @@ api.interceptors.response.use(
   }
 );
 
+// Paginated list endpoints return one page per call and the next page's cursor in X-Next-Cursor
+export async function getAllPages<T = any>(url: string, config: AxiosRequestConfig = {}): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: string | undefined;
+  do {
+    const response = await api.get<T[]>(url, { ...config, params: { ...config.params, cursor } });
+    items.push(...response.data);
+    cursor = response.headers['x-next-cursor'];
+  } while (cursor);
+  return items;
+}
+
 export default api;
\ No newline at end of file